@@ -1,28 +1,133 @@
-from flask import Blueprint, jsonify, request
-from data_manager.sqlite_data_manager import SQLiteDataManager
-from models.models import db 
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from data_manager.sqlite_data_manager import (DEFAULT_PAGE_SIZE, LIBRARY_FIELDS, MAX_PAGE_SIZE, MOVIE_FIELDS,
+                                              REVIEW_FIELDS, USER_FIELDS)
+from extensions import data_manager, http_cache
+from movie_export import (MOVIE_EXPORT_FIELDS, REVIEW_EXPORT_FIELDS, csv_stream, ndjson_stream,
+                          user_export_records)
+from movie_import import import_movies, parse_titles
+from jobs.tasks import enqueue_movie_refresh, enqueue_poster_download
+from posters.store import is_poster_url
+
 
 api = Blueprint('api', __name__)
 
-from flask import Blueprint, jsonify, request
-from data_manager.sqlite_data_manager import SQLiteDataManager
-from models.models import db
 
+class BatchArgumentError(ValueError):
+    """Raised for an invalid ids, include or fields query argument of a batch lookup."""
 
-api = Blueprint('api', __name__)
 
-data_manager = SQLiteDataManager(db)
+def batch_ids(args):
+    """Parse the comma-separated `ids` argument; None if it is absent."""
+    if 'ids' not in args:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(value) for value in args['ids'].split(',') if value.strip()))
+    except ValueError:
+        raise BatchArgumentError('ids must be comma-separated integers.') from None
+    if not ids:
+        raise BatchArgumentError('ids must not be empty.')
+    if len(ids) > current_app.config['API_BATCH_MAX_IDS']:
+        raise BatchArgumentError(f"At most {current_app.config['API_BATCH_MAX_IDS']} ids per request.")
+    return ids
+
+
+def batch_list_arg(args, name, allowed):
+    """Parse a comma-separated `include` or `fields[...]` argument, checking each value against `allowed`."""
+    if name not in args:
+        return None
+    values = [value.strip() for value in args[name].split(',') if value.strip()]
+    unknown = [value for value in values if value not in allowed]
+    if unknown:
+        raise BatchArgumentError(f"Unknown {name} value(s) {', '.join(unknown)}; use {', '.join(allowed)}.")
+    return values
+
+
+def batch_resource_keys(kind):
+    """Resource keys of a batch lookup, for http_cache.versioned."""
+    def keys():
+        try:
+            ids = batch_ids(request.args) or []
+        except BatchArgumentError:
+            ids = []
+        include = request.args.get('include', '').split(',')
+        if kind == 'users':
+            return ['users', *(f'user_movies:{user_id}' for user_id in ids if 'movies' in include),
+                    *(f'user_reviews:{user_id}' for user_id in ids if 'reviews' in include)]
+        return ['catalog', *(f'movie:{movie_id}' for movie_id in ids)]
+    return keys
+
+
+def batch_response(kind, entities, ids):
+    return jsonify({kind: [entities[entity_id] for entity_id in ids if entity_id in entities],
+                    'missing': [entity_id for entity_id in ids if entity_id not in entities]})
+
+
+@api.errorhandler(BatchArgumentError)
+def batch_argument_error(error):
+    return jsonify({'message': str(error)}), 400
 
 
 @api.route('users', methods=['GET'])
+@http_cache.versioned(batch_resource_keys('users'))
 def get_all_users():
-    users = data_manager.get_all_users()
-    return jsonify(users)
+    """
+    All users, or with ?ids=1,2,3 those users in one batch.
+
+    A batch can attach each user's library and reviews with
+    include=movies,reviews, and pick columns with fields[users],
+    fields[movies] and fields[reviews]. It costs one query per entity type
+    however many ids are asked for.
+    """
+    user_ids = batch_ids(request.args)
+    if user_ids is None:
+        return jsonify(data_manager.get_all_users())
+    users = data_manager.get_users_batch(
+        user_ids, fields=batch_list_arg(request.args, 'fields[users]', USER_FIELDS),
+        include=batch_list_arg(request.args, 'include', ('movies', 'reviews')) or (),
+        movie_fields=batch_list_arg(request.args, 'fields[movies]', LIBRARY_FIELDS),
+        review_fields=batch_list_arg(request.args, 'fields[reviews]', REVIEW_FIELDS)
+    )
+    return batch_response('users', users, user_ids)
+
+
+@api.route('movies', methods=['GET'])
+@http_cache.versioned(batch_resource_keys('movies'))
+def get_movies():
+    """
+    Catalog movies by ?ids=1,2,3, with include=stats,reviews and fields[movies], fields[reviews].
+    """
+    movie_ids = batch_ids(request.args)
+    if movie_ids is None:
+        raise BatchArgumentError('ids is required.')
+    movies = data_manager.get_movies_batch(
+        movie_ids, fields=batch_list_arg(request.args, 'fields[movies]', MOVIE_FIELDS),
+        include=batch_list_arg(request.args, 'include', ('stats', 'reviews')) or (),
+        review_fields=batch_list_arg(request.args, 'fields[reviews]', REVIEW_FIELDS)
+    )
+    return batch_response('movies', movies, movie_ids)
+
+def movie_list_args(args):
+    """Read the sort, filter and cursor query arguments of a movie listing."""
+    return {
+        'sort': args.get('sort', 'title'),
+        'order': args.get('order', 'asc'),
+        'after': args.get('after'),
+        'before': args.get('before'),
+        'limit': args.get('limit', default=DEFAULT_PAGE_SIZE, type=int),
+        'year_from': args.get('year_from', type=int),
+        'year_to': args.get('year_to', type=int),
+        'min_rating': args.get('min_rating', type=float),
+        'director': args.get('director') or None
+    }
+
 
 @api.route('users/<int:user_id>/movies', methods=['GET'])
+@http_cache.versioned(lambda user_id: ['users', f'user_movies:{user_id}'])
 def get_user_movies(user_id):
-    user_movies = data_manager.get_user_movies(user_id)
-    return jsonify(user_movies)
+    page = data_manager.get_user_movies_page(user_id, **movie_list_args(request.args))
+    if page is None:
+        return jsonify({'message': 'User not found.'}), 404
+    return jsonify(page)
 
 @api.route('/users/<int:user_id>/add_movie', methods=['POST'])
 def add_movie_to_user(user_id):
@@ -35,9 +140,17 @@ def add_movie_to_user(user_id):
         if not all(field in movie_data for field in required_fields):
             return jsonify({'message': 'Missing data.'}), 400
 
+        # The server downloads posters, so only URLs on the poster hosts are taken
+        if movie_data.get('Poster') not in (None, 'N/A') and not is_poster_url(movie_data['Poster']):
+            return jsonify({'message': 'Poster must be an OMDb poster URL.'}), 400
+
         # Add movie to the user
         result = data_manager.add_movie(user_id, movie_data)
 
+        if result and not isinstance(result, dict) and result.poster_hash is None:
+            # Downloaded by a job worker instead of holding up the response
+            enqueue_poster_download(current_app.extensions['job_queue'], result.id, result.poster)
+
         if result:
             return jsonify({'message': 'Movie added.'})
         else:
@@ -47,15 +160,35 @@ def add_movie_to_user(user_id):
         return jsonify({'message': f'Error: {str(e)}'}), 500
     
 
+@api.route('/users/<int:user_id>/movies/bulk', methods=['POST'])
+def bulk_add_movies(user_id):
+    content_type = 'csv' if request.mimetype in ('text/csv', 'text/plain') else 'json'
+    try:
+        titles = parse_titles(request.get_data(as_text=True), content_type)
+    except ValueError:
+        return jsonify({'message': 'Invalid title list.'}), 400
+
+    if not titles:
+        return jsonify({'message': 'Missing data.'}), 400
+    if len(titles) > current_app.config['BULK_IMPORT_MAX_TITLES']:
+        return jsonify({'message': 'Too many titles.'}), 413
+
+    result = import_movies(data_manager, current_app.extensions['omdb_client'], user_id, titles,
+                           concurrency=current_app.config['OMDB_BULK_CONCURRENCY'],
+                           job_queue=current_app.extensions['job_queue'])
+    if result is None:
+        return jsonify({'message': 'User not found.'}), 404
+    return jsonify(result)
+
+
 @api.route('/add_user', methods=['POST'])
 def add_user():
     user_name = request.json['name']
     user_email = request.json['email']
-    user = data_manager.get_user_by_name(user_name)
-    if user:
+    user = data_manager.create_user_if_absent(user_name, user_email)
+    if user is None:
         return jsonify({'message': 'User already exists.'}), 409
     else:
-        user = data_manager.add_user(user_name, user_email)
         return jsonify({'message': 'User added.'})
 
 @api.route('/users/<int:user_id>/update_movie/<int:movie_id>', methods=['PUT'])
@@ -86,7 +219,12 @@ def add_review(user_id, movie_id):
     movie = data_manager.get_movie_by_id(user_id, movie_id)
     if movie:
         review_text = request.json['review_text']
-        rating = request.json['rating']
+        try:
+            rating = float(request.json.get('rating'))
+        except (TypeError, ValueError):
+            return jsonify({'message': 'Rating must be a number between 0 and 10.'}), 400
+        if not 0 <= rating <= 10:
+            return jsonify({'message': 'Rating must be a number between 0 and 10.'}), 400
         data_manager.add_review(user_id, movie_id, review_text, rating)
         return jsonify({'message': 'Review added.'})
     else:
@@ -94,10 +232,129 @@ def add_review(user_id, movie_id):
     
 
 @api.route('/users/<int:user_id>/reviews', methods=['GET'])
+@http_cache.versioned(lambda user_id: ['users', f'user_movies:{user_id}', f'user_reviews:{user_id}'])
 def get_user_reviews(user_id):
-    user = data_manager.get_user_by_id(user_id)
-    if user:
-        reviews = data_manager.get_user_reviews(user_id)
-        return jsonify(reviews)
+    user_movies, reviews = data_manager.get_user_reviews(user_id)
+    if user_movies is not None:
+        return jsonify([user_movies, reviews])
     else:
         return jsonify({'message': 'User not found.'}), 404
+
+
+@api.route('/users/<int:user_id>/recommendations', methods=['GET'])
+def get_recommendations(user_id):
+    if data_manager.get_user_by_id(user_id) is None:
+        return jsonify({'message': 'User not found.'}), 404
+    limit = max(1, min(request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    # Ask for extra candidates: pending, failed or deleted movies are dropped below
+    scored = current_app.extensions['recommendations'].recommend(user_id, limit * 2)
+    if scored is None:
+        return jsonify({'message': 'Recommendations are still being built.'}), 503, {'Retry-After': '5'}
+    movies = data_manager.get_movies_by_ids(movie_id for movie_id, _ in scored)
+    recommendations = [dict(movies[movie_id].to_dict(), score=round(score, 4))
+                       for movie_id, score in scored if movie_id in movies]
+    return jsonify({'user_id': user_id, 'recommendations': recommendations[:limit]})
+
+
+def export_response(chunks, filename, mimetype):
+    # stream_with_context keeps the app context (and the database session)
+    # alive while the generator is consumed after the view returns.
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+@api.route('/users/<int:user_id>/export', methods=['GET'])
+def export_user(user_id):
+    user = data_manager.get_user_by_id(user_id)
+    if user is None:
+        return jsonify({'message': 'User not found.'}), 404
+    return export_response(ndjson_stream(user_export_records(data_manager, user)),
+                           f'user-{user_id}.ndjson', 'application/x-ndjson')
+
+
+@api.route('/users/<int:user_id>/export/<any(movies, reviews):kind>', methods=['GET'])
+def export_user_records(user_id, kind):
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'message': 'Format must be ndjson or csv.'}), 400
+    if data_manager.get_user_by_id(user_id) is None:
+        return jsonify({'message': 'User not found.'}), 404
+
+    if kind == 'movies':
+        records, fields = data_manager.iter_user_movies(user_id), MOVIE_EXPORT_FIELDS
+    else:
+        records, fields = data_manager.iter_user_reviews(user_id), REVIEW_EXPORT_FIELDS
+    if export_format == 'csv':
+        return export_response(csv_stream(records, fields), f'user-{user_id}-{kind}.csv', 'text/csv')
+    return export_response(ndjson_stream(records), f'user-{user_id}-{kind}.ndjson', 'application/x-ndjson')
+
+
+@api.route('/reviews', methods=['GET'])
+@http_cache.versioned(lambda: ['users', 'catalog', 'reviews'])
+def get_all_reviews():
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+    page = data_manager.get_all_movie_reviews(after=after, before=before, limit=limit)
+    return jsonify(page)
+
+
+@api.route('/omdb/cache', methods=['GET'])
+def get_omdb_cache_stats():
+    omdb_client = current_app.extensions['omdb_client']
+    return jsonify(omdb_client.get_stats())
+
+
+@api.route('/recommendations/stats', methods=['GET'])
+def get_recommendation_stats():
+    return jsonify(current_app.extensions['recommendations'].get_stats())
+
+
+@api.route('/movies/<int:movie_id>/refresh', methods=['POST'])
+def refresh_movie(movie_id):
+    if data_manager.get_movie_status(movie_id) is None:
+        return jsonify({'message': 'Movie not found.'}), 404
+    job_id = enqueue_movie_refresh(current_app.extensions['job_queue'], movie_id, max_age=0)
+    # None: a refresh of this movie is already queued or running
+    return jsonify({'job_id': job_id, 'queued': job_id is not None}), 202
+
+
+@api.route('/jobs/stats', methods=['GET'])
+def get_job_stats():
+    return jsonify(current_app.extensions['job_queue'].get_stats())
+
+
+@api.route('/movies/<int:movie_id>/status', methods=['GET'])
+def get_movie_status(movie_id):
+    movie = data_manager.get_movie_status(movie_id)
+    if movie is None:
+        return jsonify({'message': 'Movie not found.'}), 404
+    movie_fetcher = current_app.extensions['movie_fetcher']
+    return jsonify({'movie': movie, 'fetcher': movie_fetcher.get_stats()})
+
+
+@api.route('/movies/<int:movie_id>/stats', methods=['GET'])
+@http_cache.versioned(lambda movie_id: ['catalog', f'movie:{movie_id}'])
+def get_movie_stats(movie_id):
+    stats = data_manager.get_movie_stats(movie_id)
+    if stats is None:
+        return jsonify({'message': 'Movie not found.'}), 404
+    return jsonify(stats)
+
+
+@api.route('/movies/top-rated', methods=['GET'])
+@http_cache.versioned(lambda: ['catalog', 'reviews'])
+def get_top_rated_movies():
+    limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+    min_reviews = request.args.get('min_reviews', default=1, type=int)
+    return jsonify(data_manager.get_top_rated_movies(limit=limit, min_reviews=min_reviews))
+
+
+@api.route('/search', methods=['GET'])
+@http_cache.versioned(lambda: ['catalog', 'reviews'])
+def search():
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+    results = data_manager.search(query, limit=limit)
+    results['query'] = query
+    return jsonify(results)
@@ -1,9 +1,31 @@
-from flask import Flask, redirect, request, render_template, jsonify, url_for
-from data_manager.sqlite_data_manager import SQLiteDataManager
-from models.models import db
-from api_blueprint import api
+from flask import Flask, abort, redirect, request, render_template, jsonify, send_file, url_for
+from data_manager.sqlite_data_manager import DEFAULT_PAGE_SIZE
+from extensions import data_manager, http_cache
+from http_cache import release_id
+from models.models import db, utcnow
+from models.migrations import upgrade
+from models.engine import configure_app, setup_engine
+from api_blueprint import api, movie_list_args
+from omdb.client import OMDbClient
+from omdb.fetcher import MovieFetcher, FetchQueueFull
+from omdb.rate_limit import TokenBucket
+from omdb.refresher import MetadataRefresher
+from movie_import import import_movies, parse_titles
+from posters.store import PosterStore, is_poster_url
+from recommendations.index import RecommendationIndex
+from fragment_cache import FragmentCache, precompile_templates
+import json_provider
+from jobs.queue import JobQueue
+from jobs.tasks import enqueue_movie_refresh, enqueue_poster_download, movie_task_handlers
+from jobs.worker import JobWorker, run_worker_pool
+import click
+from datetime import timedelta
+import logging
+import metrics
 import os
-import requests
+
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.register_blueprint(api, url_prefix='/api')
@@ -17,14 +39,110 @@ if not os.path.exists(data_directory):
 # Set up the SQLAlchemy database URI
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(data_directory, 'database.db')
 
+# OMDb API client and its response cache
+app.config['OMDB_API_KEY'] = os.environ.get('OMDB_API_KEY', '770a6d70')
+app.config['OMDB_API_URL'] = os.environ.get('OMDB_API_URL', 'http://www.omdbapi.com/')
+app.config['OMDB_CACHE_PATH'] = os.path.join(data_directory, 'omdb_cache.db')
+app.config['OMDB_CACHE_SIZE'] = int(os.environ.get('OMDB_CACHE_SIZE', 1024))
+app.config['OMDB_CACHE_TTL'] = int(os.environ.get('OMDB_CACHE_TTL', 7 * 24 * 3600))
+app.config['OMDB_NEGATIVE_CACHE_TTL'] = int(os.environ.get('OMDB_NEGATIVE_CACHE_TTL', 3600))
+app.config['OMDB_FETCH_WORKERS'] = int(os.environ.get('OMDB_FETCH_WORKERS', 4))
+app.config['OMDB_FETCH_MAX_PENDING'] = int(os.environ.get('OMDB_FETCH_MAX_PENDING', 100))
+app.config['OMDB_BULK_CONCURRENCY'] = int(os.environ.get('OMDB_BULK_CONCURRENCY', 8))
+app.config['BULK_IMPORT_MAX_TITLES'] = int(os.environ.get('BULK_IMPORT_MAX_TITLES', 1000))
+
+# Local poster cache, served from /posters/<hash>
+app.config['POSTER_CACHE_PATH'] = os.path.join(data_directory, 'posters')
+app.config['POSTER_CACHE_MAX_BYTES'] = int(os.environ.get('POSTER_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+app.config['POSTER_THUMB_WIDTH'] = int(os.environ.get('POSTER_THUMB_WIDTH', 300))
+
+# Item-item recommendations: neighbors kept per movie, seconds between
+# incremental syncs (0 syncs inline on every request) and between full rebuilds
+app.config['RECOMMENDATIONS_PATH'] = os.path.join(data_directory, 'recommendations.pickle')
+app.config['RECOMMENDATIONS_TOP_K'] = int(os.environ.get('RECOMMENDATIONS_TOP_K', 50))
+app.config['RECOMMENDATIONS_SYNC_SECONDS'] = float(os.environ.get('RECOMMENDATIONS_SYNC_SECONDS', 1))
+app.config['RECOMMENDATIONS_REBUILD_SECONDS'] = float(os.environ.get('RECOMMENDATIONS_REBUILD_SECONDS', 24 * 3600))
+
+# Background jobs, kept in their own SQLite file and run by `flask run-workers`:
+# worker processes, seconds a claimed job is leased, attempts per job, delay
+# before the first retry (doubling per attempt) and how long finished jobs are kept
+app.config['JOBS_PATH'] = os.path.join(data_directory, 'jobs.db')
+app.config['JOBS_WORKER_PROCESSES'] = int(os.environ.get('JOBS_WORKER_PROCESSES', 2))
+app.config['JOBS_VISIBILITY_TIMEOUT'] = float(os.environ.get('JOBS_VISIBILITY_TIMEOUT', 120))
+app.config['JOBS_MAX_ATTEMPTS'] = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))
+app.config['JOBS_RETRY_DELAY'] = float(os.environ.get('JOBS_RETRY_DELAY', 30))
+app.config['JOBS_RETENTION_SECONDS'] = float(os.environ.get('JOBS_RETENTION_SECONDS', 7 * 24 * 3600))
+# Age after which a movie's OMDb details are fetched again
+app.config['MOVIE_REFRESH_MAX_AGE'] = float(os.environ.get('MOVIE_REFRESH_MAX_AGE', 30 * 24 * 3600))
+# `flask refresh-metadata`: OMDb requests per second, burst size and
+# concurrent requests
+app.config['OMDB_REFRESH_RATE'] = float(os.environ.get('OMDB_REFRESH_RATE', 5))
+app.config['OMDB_REFRESH_BURST'] = int(os.environ.get('OMDB_REFRESH_BURST', 10))
+app.config['OMDB_REFRESH_CONCURRENCY'] = int(os.environ.get('OMDB_REFRESH_CONCURRENCY', 4))
+
+# Rendered list rows kept in memory (0 disables the fragment cache), and
+# where compiled templates are stored between restarts
+app.config['FRAGMENT_CACHE_SIZE'] = int(os.environ.get('FRAGMENT_CACHE_SIZE', 10000))
+app.config['JINJA_BYTECODE_CACHE_PATH'] = os.path.join(data_directory, 'jinja_cache')
+
+# JSON API: most ids per batch lookup (/api/users?ids=...), and whether
+# responses are serialized with orjson when it is installed
+app.config['API_BATCH_MAX_IDS'] = int(os.environ.get('API_BATCH_MAX_IDS', 200))
+app.config['JSON_USE_ORJSON'] = os.environ.get('JSON_USE_ORJSON', '1') != '0'
+
+# Requests slower than this, or running more SQL statements, are logged
+app.config['METRICS_SLOW_REQUEST_MS'] = int(os.environ.get('METRICS_SLOW_REQUEST_MS', 500))
+app.config['METRICS_MAX_QUERIES'] = int(os.environ.get('METRICS_MAX_QUERIES', 20))
+# Bearer token required for /metrics; without one it is only served to
+# requests from this host that did not pass through a proxy
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN') or None
+
+# HTTP caching of read pages: seconds browsers may reuse a response without
+# revalidating, and a token mixed into every ETag. The token must be the same
+# in every worker and only change on deploys; it defaults to the git revision,
+# set HTTP_CACHE_SALT to the release id where the code is not a git checkout.
+app.config['HTTP_CACHE_MAX_AGE'] = int(os.environ.get('HTTP_CACHE_MAX_AGE', 0))
+app.config['HTTP_CACHE_SALT'] = os.environ.get('HTTP_CACHE_SALT') or release_id()
+
+# Connection pool and per-connection pragmas (WAL, busy timeout, ...)
+configure_app(app)
+
 # Initialize the SQLAlchemy instance with the Flask app
 db.init_app(app)
 
 with app.app_context():
-    if not os.path.exists(os.path.join(data_directory, 'database.db')):
+    # Check before setup_engine connects, which creates the file
+    new_database = not os.path.exists(os.path.join(data_directory, 'database.db'))
+    setup_engine(app, db)
+    if new_database:
         db.create_all()
-
-data_manager = SQLiteDataManager(db)
+    # Apply schema changes to databases created by older versions
+    upgrade(db)
+    # Per-route latency and SQL counts, served at /metrics
+    metrics.init_app(app, db.engine)
+
+json_provider.init_app(app)
+
+omdb_client = OMDbClient.from_config(app.config)
+app.extensions['omdb_client'] = omdb_client
+poster_store = PosterStore.from_config(app.config)
+app.extensions['poster_store'] = poster_store
+movie_fetcher = MovieFetcher(app, data_manager, omdb_client, max_workers=app.config['OMDB_FETCH_WORKERS'],
+                             max_pending=app.config['OMDB_FETCH_MAX_PENDING'], poster_store=poster_store)
+app.extensions['movie_fetcher'] = movie_fetcher
+recommendation_index = RecommendationIndex(app, db, snapshot_path=app.config['RECOMMENDATIONS_PATH'],
+                                           top_k=app.config['RECOMMENDATIONS_TOP_K'],
+                                           sync_interval=app.config['RECOMMENDATIONS_SYNC_SECONDS'],
+                                           rebuild_interval=app.config['RECOMMENDATIONS_REBUILD_SECONDS'])
+app.extensions['recommendations'] = recommendation_index
+job_queue = JobQueue(app.config['JOBS_PATH'], visibility_timeout=app.config['JOBS_VISIBILITY_TIMEOUT'],
+                     max_attempts=app.config['JOBS_MAX_ATTEMPTS'], retry_delay=app.config['JOBS_RETRY_DELAY'])
+app.extensions['job_queue'] = job_queue
+job_handlers = movie_task_handlers(job_queue, data_manager, omdb_client, poster_store,
+                                   max_age=app.config['MOVIE_REFRESH_MAX_AGE'])
+fragment_cache = FragmentCache(max_size=app.config['FRAGMENT_CACHE_SIZE'])
+fragment_cache.init_app(app)
+precompile_templates(app, app.config['JINJA_BYTECODE_CACHE_PATH'])
 
 
 @app.route('/')
@@ -39,6 +157,7 @@ def home():
 
 
 @app.route('/users', methods=['GET'])
+@http_cache.versioned(lambda: ['users'])
 def get_users():
     """
     Route to display all users.
@@ -59,41 +178,46 @@ def display_user_movies(user_id):
         user_id (int): User ID.
 
     Returns:
-        Response: Rendered template displaying user movies.
+        Response: Redirect to the get_user_movies route.
     """
-    user_movies = data_manager.get_user_movies(user_id)
-    user = data_manager.get_user_by_id(user_id)
-    if user_movies is None or user is None:
-        return "User not found.", 404
-    return render_template("user_movies.html", user_movies=user_movies, user_id=user_id)
+    return redirect(url_for('get_user_movies', user_id=user_id, **request.args))
 
 
 @app.route('/user_movies/<int:user_id>', methods=['GET'])
+@http_cache.versioned(lambda user_id: ['users', f'user_movies:{user_id}'])
 def get_user_movies(user_id):
     """
-    Route to get movies for a specific user.
+    Route to get movies for a specific user, one page at a time.
 
     Args:
         user_id (int): User ID.
 
+    Query Args:
+        sort (str): 'title', 'year', 'rating' or 'added'.
+        order (str): 'asc' or 'desc'.
+        after, before (str): Page cursors.
+        limit (int): Page size.
+        year_from, year_to, min_rating, director: Filters.
+
     Returns:
-        Response: Rendered template displaying user movies.
+        Response: Rendered template displaying a page of user movies.
     """
-    print(f"DEBUG: Inside get_user_movies with user_id: {user_id}")
-    user_movies = data_manager.get_user_movies(user_id)
+    logger.debug('Listing movies of user %s', user_id)
+    list_args = movie_list_args(request.args)
+    page = data_manager.get_user_movies_page(user_id, **list_args)
     user = data_manager.get_user_by_id(user_id)
     
-    if user_movies is None or user is None:
-        print("DEBUG: User not found or no movies available.")
+    if page is None or user is None:
+        logger.debug('User %s not found', user_id)
         return "User not found.", 404
 
-    print("DEBUG: Before rendering template")
-    return render_template("user_movies.html", user=user, user_movies=user_movies)
+    # Sort and filter arguments, carried over into the pagination links
+    filters = {name: value for name, value in list_args.items()
+               if value is not None and name not in ('after', 'before')}
 
+    return render_template("user_movies.html", user=user, user_movies=page['movies'], page=page, filters=filters)
 
 
-# app.py
-from flask import jsonify, redirect, url_for
 
 @app.route('/add_user', methods=["GET", "POST"])
 def add_user():
@@ -110,13 +234,11 @@ def add_user():
         if not user_name or not email:
             return jsonify({'error': 'User name or email is missing.'}), 400
 
-        # Check if either the user_name or email already exists
-        users = data_manager.get_all_users()
-        for user in users:
-            if user['name'] == user_name or user['email'] == email:
-                return jsonify({'error': 'User already exists.'}), 409
+        # Insert unless the user_name or email already exists
+        new_user = data_manager.create_user_if_absent(user_name, email)
+        if new_user is None:
+            return jsonify({'error': 'User already exists.'}), 409
 
-        new_user = data_manager.add_user(user_name, email)
         return redirect(url_for('get_users'))
 
     # Handle GET request
@@ -135,48 +257,56 @@ def add_movie(user_id):
     Returns:
         Response: Rendered template for adding a movie.
     """
-    print(f"DEBUG: user_id in add_movie route: {user_id}")
-
     if request.method == 'POST':
         # Check if the user exists
-        user_movies = data_manager.get_user_movies(user_id)
         user = data_manager.get_user_by_id(user_id)
         user_name = user.name if user else 'Unknown'
 
-        if user_movies is None:
+        if user is None:
             return jsonify({'error': 'User not found'}), 404
 
         # Extract the movie title from the request's form data
-        movie_title = request.form.get('title')
+        movie_title = (request.form.get('title') or '').strip()
+        if not movie_title:
+            return jsonify({'error': 'Movie title is missing.'}), 400
 
         # Check if the movie already exists for the user
-        movie_exist = next((movie for movie in user_movies if movie['title'] == movie_title), None)
+        movie_exist = data_manager.get_user_movie_by_title(user_id, movie_title)
+
+        if movie_exist and movie_exist['status'] == 'failed':
+            # The earlier OMDb lookup failed, try it again
+            try:
+                movie_fetcher.retry(movie_exist['id'], movie_exist['title'])
+            except FetchQueueFull:
+                return jsonify({'error': 'Too many pending movie lookups, try again shortly.'}), 503
+            return redirect(url_for('get_user_movies', user_id=user_id))
 
         if movie_exist:
             # Display information about the existing movie
             return render_template('add_movie.html', user_id=user_id, user_name=user_name, movie_exist=movie_exist,
                                    new_movie=None)
-        else:
-            # Fetch movie details from OMDb API
-            omdb_api_key = '770a6d70'  
-            omdb_api_url = f'http://www.omdbapi.com/?apikey={omdb_api_key}&t={movie_title}&plot=full'
-            response = requests.get(omdb_api_url)
-            movie_data_from_api = response.json()
-
-            if response.status_code == 200 and movie_data_from_api['Response'] == 'True':
-                # Add the movie to the user's list
-                new_movie = data_manager.add_movie(user_id, movie_data_from_api)
-                if new_movie is None:
-                    return jsonify({'error': 'Failed to add movie to user.'}), 500
-
-                # Redirect to user_movies.html after adding the movie
-                return redirect(url_for('get_user_movies', user_id=user_id))
-            else:
-                 return jsonify({'error': 'Failed to fetch movie details from OMDb API.'}), 500
+
+        # Another user may already have added it: link the catalog entry without calling OMDb
+        catalog_movie = data_manager.get_movie_by_title(movie_title)
+        if catalog_movie:
+            data_manager.add_existing_movie(user_id, catalog_movie.id)
+            # Its details may be old; the worker skips the refresh if they are not
+            enqueue_movie_refresh(job_queue, catalog_movie.id)
+            return redirect(url_for('get_user_movies', user_id=user_id))
+
+        # Queue the OMDb lookup and show the movie as pending until it completes
+        try:
+            new_movie = movie_fetcher.submit(user_id, movie_title)
+        except FetchQueueFull:
+            return jsonify({'error': 'Too many pending movie lookups, try again shortly.'}), 503
+        if new_movie is None:
+            return jsonify({'error': 'Failed to add movie to user.'}), 500
+
+        # Redirect to user_movies.html, which shows the pending movie
+        return redirect(url_for('get_user_movies', user_id=user_id))
 
     else:
         # If the request is GET, render the template for adding a movie
-        print(f"DEBUG: Rendering add_movie.html with user_id: {user_id}")
         user = data_manager.get_user_by_id(user_id)
         user_name = user.name if user else 'Unknown'
         return render_template('add_movie.html', user_id=user_id, user_name=user_name, movie_exist=None, new_movie=None)
@@ -225,15 +355,15 @@ def delete_movie(user_id, movie_id):
     Returns:
         Response: Redirect to user_movies or render delete_movie template.
     """
-    user = data_manager.get_user_by_id(user_id)
-    if user:
-        movie = data_manager.get_movie_by_id(user_id, movie_id)
-        if movie:
-            if request.method == 'POST':
-                result = data_manager.delete_movie(user_id, movie_id)
-                return redirect(url_for('get_user_movies', user_id=user_id))
-                # return render_template('delete_movie.html', user=user, movie=movie, result=result)
-            return render_template('delete_movie.html', user=user, movie=movie)
+    # The movie lookup joins on the user's link row, so it also proves the user exists
+    movie = data_manager.get_movie_by_id(user_id, movie_id)
+    if movie:
+        if request.method == 'POST':
+            result = data_manager.delete_movie(user_id, movie_id)
+            return redirect(url_for('get_user_movies', user_id=user_id))
+            # return render_template('delete_movie.html', user=user, movie=movie, result=result)
+        user = data_manager.get_user_by_id(user_id)
+        return render_template('delete_movie.html', user=user, movie=movie)
     return "User or movie not found.", 404
 
 
@@ -261,12 +391,18 @@ def add_review(user_id, movie_id):
         except ValueError:
             return "Invalid user_id or movie_id.", 400
 
-        # Get user and movie information for display in the template
-        user = data_manager.get_user_by_id(user_id)
+        try:
+            rating = float(rating)
+        except (TypeError, ValueError):
+            return "Rating must be a number between 0 and 10.", 400
+        if not 0 <= rating <= 10:
+            return "Rating must be a number between 0 and 10.", 400
+
+        # The movie is only found if it is in this user's library
         movie = data_manager.get_user_movie(user_id, movie_id)
 
         # Handle the case where user or movie is None
-        if user is None or movie is None:
+        if movie is None:
             return f"User or movie not found. user_id: {user_id}, movie_id: {movie_id}", 404
 
         # Add the review to the database
@@ -277,12 +413,12 @@ def add_review(user_id, movie_id):
 
     elif request.method == 'GET':
         # Handle GET request
-        user = data_manager.get_user_by_id(user_id)
         movie = data_manager.get_user_movie(user_id, movie_id)
 
         # Handle the case where user or movie is None
-        if user is None or movie is None:
+        if movie is None:
             return f"User or movie not found. user_id: {user_id}, movie_id: {movie_id}", 404
+        user = data_manager.get_user_by_id(user_id)
 
         # Retrieve all reviews for the movie when displaying the form
         reviews = data_manager.get_movie_reviews(movie_id)
@@ -308,12 +444,12 @@ def display_review(user_id, movie_id, review_id):
     Returns:
         Response: Rendered template displaying the review.
     """
-    user = data_manager.get_user_by_id(user_id)
     movie = data_manager.get_user_movie(user_id, movie_id)
     review = data_manager.get_review_by_id(review_id)
 
-    if user is None or movie is None or review is None:
+    if movie is None or review is None:
         return "User, movie, or review not found.", 404
+    user = data_manager.get_user_by_id(user_id)
 
     return render_template('display_review.html', user=user, movie=movie, review=review)
 
@@ -335,10 +471,12 @@ def get_movie_reviews(user_id, movie_id):
     if reviews is None or movie is None:
         return "Movie not found.", 404
 
-    return render_template('user_reviews.html', user_id=user_id, movie=movie, reviews=reviews)
+    user = data_manager.get_user_by_id(user_id)
+    return render_template('user_reviews.html', user=user, review_cards=[(movie, tuple(reviews))])
 
 
 @app.route('/users/<int:user_id>/reviews', methods=['GET'])
+@http_cache.versioned(lambda user_id: ['users', f'user_movies:{user_id}', f'user_reviews:{user_id}'])
 def get_user_reviews(user_id):
     """
     Route to display all reviews for a specific user.
@@ -351,33 +489,208 @@ def get_user_reviews(user_id):
     """
     try:
         user_movies, reviews = data_manager.get_user_reviews(user_id)
-        print("DEBUG: user_movies:", user_movies)
-        print("DEBUG: reviews:", reviews)
+        logger.debug('User %s has %d movies and %d reviews', user_id, len(user_movies or []), len(reviews or []))
         user = data_manager.get_user_by_id(user_id)
-        return render_template('user_reviews.html', user=user, user_movies=user_movies, reviews=reviews)
-    except Exception as e:
-        print("Error:", e)
+        # One (movie, its reviews) card per movie, so each card is a cacheable fragment
+        reviews_by_movie = {}
+        for review in reviews or ():
+            reviews_by_movie.setdefault(review.movie_id, []).append(review)
+        review_cards = [(movie, tuple(reviews_by_movie.get(movie.id, ()))) for movie in user_movies or ()]
+        return render_template('user_reviews.html', user=user, review_cards=review_cards)
+    except Exception:
+        logger.exception('Rendering the reviews of user %s failed', user_id)
         return "Internal Server Error", 500
 
 
 
 
 @app.route('/movie_reviews')
+@http_cache.versioned(lambda: ['users', 'catalog', 'reviews'])
 def movie_reviews():
     """
-    Route to display all movie reviews.
+    Route to display all movie reviews, one page at a time.
+
+    Query Args:
+        after (int): Show reviews with an id greater than this cursor.
+        before (int): Show reviews with an id lower than this cursor.
+        limit (int): Page size.
 
     Returns:
-        Response: Rendered template displaying all movie reviews.
+        Response: Rendered template displaying a page of movie reviews.
     """
-    # Get all movie reviews
-    all_movie_reviews = data_manager.get_all_movie_reviews()
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+
+    # Get one page of movie reviews
+    page = data_manager.get_all_movie_reviews(after=after, before=before, limit=limit)
 
     # Check if there are reviews available
-    if not all_movie_reviews:
+    if not page['reviews'] and after is None and before is None:
         return "No movie reviews available.", 404
-    
-    return render_template('movie_reviews.html', movie_reviews=all_movie_reviews)
+
+    return render_template('movie_reviews.html', movie_reviews=page['reviews'],
+                           next_cursor=page['next_cursor'], prev_cursor=page['prev_cursor'], limit=limit)
+
+
+@app.route('/posters/<poster_hash>')
+def get_poster(poster_hash):
+    """
+    Serve a cached poster. The URL is content-addressed, so it can be cached forever.
+
+    Args:
+        poster_hash (str): SHA-256 of the poster image.
+
+    Returns:
+        Response: The poster, its WebP/JPEG thumbnail when size=thumb, a
+            redirect to the upstream poster while it is being cached again, or 404.
+    """
+    size = request.args.get('size', 'full')
+    accept_webp = any(mimetype == 'image/webp' for mimetype, _ in request.accept_mimetypes)
+    found = poster_store.find(poster_hash, size, accept_webp)
+    if found is None:
+        # Evicted from the cache: a worker fetches it again, and until then the
+        # client gets the upstream URL rather than a request waiting on upstream
+        source = data_manager.get_poster_source(poster_hash)
+        if source is None or not is_poster_url(source[1]):
+            abort(404)
+        enqueue_poster_download(job_queue, *source)
+        return redirect(source[1])
+    path, mimetype = found
+    response = send_file(path, mimetype=mimetype, max_age=365 * 24 * 3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept')
+    return response
+
+
+@app.cli.command('backfill-posters')
+@click.option('--batch-size', type=int, default=50, help='Movies looked up per batch.')
+def backfill_posters_command(batch_size):
+    """Download and cache the posters of movies that only have an upstream URL."""
+    after_id = cached = failed = 0
+    while True:
+        movies = data_manager.get_movies_without_poster(after_id=after_id, limit=batch_size)
+        if not movies:
+            break
+        poster_hashes = {}
+        for movie_id, url in movies:
+            poster_hash = poster_store.download(url)
+            if poster_hash is None:
+                failed += 1
+            else:
+                poster_hashes[movie_id] = poster_hash
+        data_manager.set_movie_poster_hashes(poster_hashes)
+        cached += len(poster_hashes)
+        after_id = movies[-1][0]
+        click.echo(f'{cached} posters cached, {failed} failed (up to movie {after_id})')
+    click.echo(f'Done: {cached} posters cached, {failed} failed.')
+
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the per-movie review aggregates from the review table."""
+    data_manager.rebuild_movie_stats()
+    click.echo('Movie stats rebuilt.')
+
+
+@app.cli.command('precompute-recommendations')
+def precompute_recommendations_command():
+    """Build the item-item recommendation model from scratch and save its snapshot."""
+    model = recommendation_index.rebuild()
+    click.echo(f'Neighbors of {len(model.neighbors)} movies from {len(model.items_by_user)} users '
+               f'computed in {model.build_seconds}s ({recommendation_index.get_stats()["backend"]}).')
+
+
+def run_job_worker(stop):
+    """Body of one `run-workers` process: run queued jobs until `stop` is set."""
+    # Pooled connections inherited from the parent process must not be reused
+    db.engine.dispose(close=False)
+    JobWorker(app, job_queue, job_handlers, retention=app.config['JOBS_RETENTION_SECONDS']).run(stop)
+
+
+@app.cli.command('run-workers')
+@click.option('--processes', type=int, default=None, help='Worker processes; defaults to JOBS_WORKER_PROCESSES.')
+def run_workers_command(processes):
+    """Run queued background jobs until interrupted."""
+    run_worker_pool(run_job_worker, processes or app.config['JOBS_WORKER_PROCESSES'])
+
+
+@app.cli.command('refresh-stale-movies')
+@click.option('--max-age', type=float, default=None, help='Seconds; defaults to MOVIE_REFRESH_MAX_AGE.')
+@click.option('--batch-size', type=int, default=500, help='Movies read per batch.')
+def refresh_stale_movies_command(max_age, batch_size):
+    """Queue an OMDb refresh for every movie whose details are older than --max-age."""
+    max_age = app.config['MOVIE_REFRESH_MAX_AGE'] if max_age is None else max_age
+    fetched_before = utcnow() - timedelta(seconds=max_age)
+    after_id = queued = 0
+    while True:
+        movie_ids = data_manager.get_stale_movie_ids(fetched_before, after_id=after_id, limit=batch_size)
+        if not movie_ids:
+            break
+        queued += sum(enqueue_movie_refresh(job_queue, movie_id, max_age) is not None for movie_id in movie_ids)
+        after_id = movie_ids[-1]
+    click.echo(f'{queued} movie refreshes queued.')
+
+
+@app.cli.command('refresh-metadata')
+@click.option('--max-age', type=float, default=None, help='Seconds; defaults to MOVIE_REFRESH_MAX_AGE.')
+@click.option('--limit', type=int, default=None, help='Maximum OMDb lookups in this run, e.g. the daily quota.')
+@click.option('--batch-size', type=int, default=100, help='Movies per batch and transaction.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and start a new pass.')
+def refresh_metadata_command(max_age, limit, batch_size, restart):
+    """
+    Re-fetch the OMDb details of stale catalog movies, resuming from the last checkpoint.
+
+    Meant to run from cron in its own process, so it never holds up a web
+    worker; each batch is one short write transaction.
+    """
+    refresher = MetadataRefresher(
+        data_manager, omdb_client,
+        TokenBucket(app.config['OMDB_REFRESH_RATE'], app.config['OMDB_REFRESH_BURST']),
+        max_age=app.config['MOVIE_REFRESH_MAX_AGE'] if max_age is None else max_age,
+        batch_size=batch_size, concurrency=app.config['OMDB_REFRESH_CONCURRENCY']
+    )
+
+    def progress(summary):
+        click.echo(f"{summary['fetched']} fetched, {summary['changed']} changed (up to movie {summary['last_id']})")
+
+    summary = refresher.run(limit=limit, restart=restart, progress=progress)
+    state = 'pass finished' if summary['finished'] else f"resumes after movie {summary['last_id']}"
+    click.echo(f"Done in {summary['elapsed_seconds']}s ({summary['requests_per_second']} requests/s, "
+               f"{summary['rate_limited_seconds']}s rate limited): {summary['fetched']} fetched, "
+               f"{summary['changed']} changed, {summary['not_found']} not found, "
+               f"{summary['unreachable']} unreachable; {state}.")
+    if summary['unreachable']:
+        raise click.ClickException('OMDb could not be reached.')
+
+
+@app.cli.command('import-movies')
+@click.argument('user_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--concurrency', type=int, default=None, help='Maximum concurrent OMDb requests.')
+def import_movies_command(user_id, path, concurrency):
+    """
+    Import a JSON or CSV list of movie titles into a user's library.
+
+    Args:
+        user_id (int): User ID.
+        path (str): Path to a .json or .csv file.
+        concurrency (int): Maximum concurrent OMDb requests.
+    """
+    with open(path, encoding='utf-8') as titles_file:
+        titles = parse_titles(titles_file.read(), 'csv' if path.lower().endswith('.csv') else 'json')
+
+    result = import_movies(data_manager, omdb_client, user_id, titles,
+                           concurrency=concurrency or app.config['OMDB_BULK_CONCURRENCY'], job_queue=job_queue)
+    if result is None:
+        raise click.ClickException(f'User {user_id} not found.')
+
+    for outcome in result['outcomes']:
+        click.echo(f"{outcome['status']:>14}  {outcome['title']}")
+    click.echo(f"{len(titles)} titles in {result['elapsed_seconds']}s "
+               f"({result['titles_per_second']} titles/s, {result['omdb_requests']} OMDb requests): "
+               + ', '.join(f'{status}={count}' for status, count in sorted(result['summary'].items())))
 
 
 @app.errorhandler(404)
@@ -394,9 +707,5 @@ def page_not_found(error):
     return render_template('404.html', error=error), 404
 
 
-# Initialize the SQLiteDataManager with the SQLAlchemy db object
-data_manager = SQLiteDataManager(db)
-
-
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000, debug=True)
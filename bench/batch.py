@@ -0,0 +1,120 @@
+"""
+Assembling a multi-user dashboard from the JSON API: per-id calls against one batch call.
+
+Seeds a scratch database with bench.seed and starts the real app on it
+(test client, no HTTP server). It then fetches the libraries and reviews
+of --users random users two ways. The first calls
+/api/users/<id>/reviews once per user. The second is a single
+/api/users?ids=...&include=movies,reviews call. The second is also timed
+with sparse fieldsets. The data cache is cleared before every
+repetition, so both ways read from SQLite. The report has latency
+percentiles, SQL statements per dashboard and response sizes. It also
+times serializing the batch payload with Flask's default json provider
+and with orjson, when orjson is installed.
+
+Usage:
+    python -m bench.batch [--users 50] [--repeat 20] [--seed-users 1000] [--movies 10000] [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import summarize, write_report  # noqa: E402
+from bench.seed import build_database  # noqa: E402
+
+
+def run(users, repeat, seed_users, movies, seed_value=1):
+    # app.py keeps its database in ./data, so seed one there first
+    workdir = tempfile.mkdtemp(prefix='bench_batch_')
+    os.makedirs(os.path.join(workdir, 'data'))
+    seeded = build_database(os.path.join(workdir, 'data', 'database.db'), users=seed_users, movies=movies,
+                            seed_value=seed_value)
+    os.chdir(workdir)
+    os.environ.update(OMDB_FETCH_WORKERS='0', LOG_LEVEL='WARNING')
+    import app as application
+    from extensions import data_manager
+    from flask.json.provider import DefaultJSONProvider
+    from json_provider import ORJSONProvider, orjson
+    from models.models import db
+
+    app = application.app
+    client = app.test_client()
+    rng = random.Random(seed_value)
+    statements = [0]
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+    def dashboard_cases(user_ids):
+        ids = ','.join(map(str, user_ids))
+        return [
+            ('per-id calls', [f'/api/users/{user_id}/reviews' for user_id in user_ids]),
+            ('batch', [f'/api/users?ids={ids}&include=movies,reviews']),
+            ('batch, sparse fields', [f'/api/users?ids={ids}&include=movies,reviews&fields[users]=name'
+                                      '&fields[movies]=title,rating&fields[reviews]=movie_id,rating']),
+        ]
+
+    results = {}
+    samples = {}
+    for iteration in range(repeat):
+        user_ids = rng.sample(range(1, seed_users + 1), users)
+        for name, urls in dashboard_cases(user_ids):
+            data_manager.backend.clear()
+            statements[0] = 0
+            size = 0
+            started = time.perf_counter()
+            for url in urls:
+                response = client.get(url)
+                size += len(response.data)
+            entry = samples.setdefault(name, {'seconds': [], 'statements': 0, 'bytes': 0, 'requests': len(urls)})
+            entry['seconds'].append(time.perf_counter() - started)
+            entry['statements'] += statements[0]
+            entry['bytes'] += size
+    for name, entry in samples.items():
+        summary = summarize(entry['seconds'])
+        summary.update(requests=entry['requests'], statements=round(entry['statements'] / repeat, 1),
+                       response_kb=round(entry['bytes'] / repeat / 1024, 1))
+        results[name] = summary
+
+    # Serialization alone, on the full batch payload
+    with app.app_context():
+        payload = {'users': list(data_manager.get_users_batch(user_ids, include=('movies', 'reviews')).values())}
+        providers = [('json', DefaultJSONProvider(app))] + ([('orjson', ORJSONProvider(app))] if orjson else [])
+        for name, provider in providers:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                provider.response(payload)
+                timings.append(time.perf_counter() - started)
+            results[f'serialize with {name}'] = summarize(timings)
+        db.engine.dispose()
+    return {'seed': seeded, 'methods': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50, help='Users per dashboard.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed-users', type=int, default=1000)
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    results = run(args.users, args.repeat, args.seed_users, args.movies, args.seed)
+    path = write_report('batch', vars(args), results, output)
+    for name, summary in results['methods'].items():
+        line = f"{name:<24} p50 {summary['p50_ms']:>9.3f} ms  p95 {summary['p95_ms']:>9.3f} ms"
+        if 'statements' in summary:
+            line += (f"  {summary['requests']:>3} requests  {summary['statements']:>6} statements  "
+                     f"{summary['response_kb']:>8} KB")
+        print(line)
+    print(json.dumps({'report': path}))
@@ -0,0 +1,55 @@
+"""
+Compare two benchmark reports written by bench.micro or bench.http_load.
+
+Prints p50/p95/p99 per method or route for both runs and the relative
+change, flagging slowdowns above --threshold percent.
+
+Usage:
+    python -m bench.compare BASELINE.json CANDIDATE.json [--threshold 10]
+"""
+import argparse
+import json
+
+
+def load_entries(report):
+    results = report['results']
+    return results.get('methods') or results.get('routes') or {}
+
+
+def change(before, after):
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10, help='Percent p95 slowdown reported as a regression.')
+    args = parser.parse_args()
+
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+    print(f"{baseline['benchmark']}: {baseline['commit']} -> {candidate['commit']}")
+
+    before_entries, after_entries = load_entries(baseline), load_entries(candidate)
+    regressions = []
+    for name in sorted(set(before_entries) | set(after_entries)):
+        before, after = before_entries.get(name), after_entries.get(name)
+        if not before or not after or not before.get('count') or not after.get('count'):
+            print(f'{name:<40} only in {"candidate" if after else "baseline"}')
+            continue
+        columns = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            delta = change(before[key], after[key])
+            columns.append(f"{key[:3]} {before[key]:>9.3f} -> {after[key]:>9.3f}"
+                           + (f' ({delta:+.0f}%)' if delta is not None else ''))
+        print(f'{name:<40} ' + '  '.join(columns))
+        p95_change = change(before['p95_ms'], after['p95_ms'])
+        if p95_change is not None and p95_change > args.threshold:
+            regressions.append(name)
+
+    print(f"peak RSS {baseline['peak_rss_mb']} MB -> {candidate['peak_rss_mb']} MB")
+    if regressions:
+        print(f'p95 regressions over {args.threshold}%: ' + ', '.join(regressions))
@@ -0,0 +1,178 @@
+"""
+HTTP load driver for the main routes, with OMDb stubbed locally.
+
+Seeds a scratch database with bench.seed and starts the real app in a
+child process (its own werkzeug server, with omdb.fake_server as the
+OMDb API). Client threads in this process then replay a weighted mix of
+page views, API reads, searches, reviews and movie adds for --duration
+seconds. The report has per-route p50/p95/p99 latency, throughput, status
+counts and the server's peak RSS.
+
+With --conditional, clients remember ETags and revalidate like browsers.
+
+Usage:
+    python -m bench.http_load [--users 1000] [--movies 10000] [--clients 8]
+                              [--duration 20] [--conditional] [--output report.json]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import peak_rss_mb, summarize, write_report  # noqa: E402
+from bench.seed import build_database  # noqa: E402
+
+SEARCH_TERMS = ['night', 'city', 'golden river', 'shadw', 'the last', 'iron']
+# Titles only the fake OMDb knows, so adding them goes through the fetcher
+FRESH_MOVIES = [{'Title': f'Fresh Release {i}', 'Year': '2024', 'Director': 'Load Tester', 'imdbRating': '6.6',
+                 'imdbID': f'tt9{i:06d}', 'Poster': 'N/A'} for i in range(5000)]
+
+
+def serve(workdir, ready, stop, result):
+    """Child process: run the app against the seeded database until `stop` is set."""
+    from werkzeug.serving import make_server
+
+    from omdb.fake_server import FakeOMDbServer
+
+    fake_omdb = FakeOMDbServer(FRESH_MOVIES)
+    fake_omdb.start()
+    os.chdir(workdir)
+    os.environ.update(OMDB_API_URL=fake_omdb.url, LOG_LEVEL='WARNING', METRICS_SLOW_REQUEST_MS='100000',
+                      METRICS_MAX_QUERIES='100000')
+    import app as application
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, application.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ready.put(server.server_port)
+    stop.wait()
+    server.shutdown()
+    application.movie_fetcher.shutdown()
+    fake_omdb.stop()
+    result.put({'peak_rss_mb': peak_rss_mb(), 'omdb_requests': fake_omdb.request_count})
+
+
+def route_mix(rng, users, links):
+    """Weighted (weight, route name, request factory) entries; factories return (method, path, data)."""
+    def user():
+        return rng.randint(1, users)
+
+    def link():
+        return rng.choice(links)
+
+    return [
+        (10, 'GET /users', lambda: ('GET', '/users', None)),
+        (25, 'GET /user_movies/<id>', lambda: ('GET', f'/user_movies/{user()}', None)),
+        (5, 'GET /user_movies/<id>?sort=year', lambda: ('GET', f'/user_movies/{user()}?sort=year&order=desc', None)),
+        (8, 'GET /users/<id>/reviews', lambda: ('GET', f'/users/{user()}/reviews', None)),
+        (8, 'GET /movie_reviews', lambda: ('GET', f'/movie_reviews?after={rng.randint(0, 500)}', None)),
+        (10, 'GET /api/users/<id>/movies', lambda: ('GET', f'/api/users/{user()}/movies', None)),
+        (8, 'GET /api/search', lambda: ('GET', f'/api/search?q={rng.choice(SEARCH_TERMS)}', None)),
+        (5, 'GET /api/movies/<id>/stats', lambda: ('GET', f'/api/movies/{link()[1]}/stats', None)),
+        (3, 'GET /api/movies/top-rated', lambda: ('GET', '/api/movies/top-rated', None)),
+        (5, 'GET /api/users/<id>/recommendations', lambda: ('GET', f'/api/users/{user()}/recommendations', None)),
+        (4, 'POST /add_review', lambda: ('POST', '/add_review/{}/{}'.format(*link()),
+                                         {'review_text': 'Load test review', 'rating': str(rng.randint(0, 10))})),
+        (2, 'POST /users/<id>/add_movie', lambda: ('POST', f'/users/{user()}/add_movie',
+                                                   {'title': rng.choice(FRESH_MOVIES)['Title']})),
+    ]
+
+
+def client(base_url, mix, deadline, conditional, samples, statuses, seed_value):
+    rng = random.Random(seed_value)
+    weights = [weight for weight, _, _ in mix]
+    session = requests.Session()
+    etags = {}
+    while time.time() < deadline:
+        _, name, make_request = rng.choices(mix, weights)[0]
+        method, path, data = make_request()
+        headers = {'If-None-Match': etags[path]} if conditional and path in etags else {}
+        started = time.perf_counter()
+        response = session.request(method, base_url + path, data=data, headers=headers, allow_redirects=False)
+        elapsed = time.perf_counter() - started
+        if conditional and response.headers.get('ETag'):
+            etags[path] = response.headers['ETag']
+        samples.setdefault(name, []).append(elapsed)
+        status = f'{name} {response.status_code}'
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+def run(users, movies, clients, duration, conditional, seed_value=1):
+    workdir = tempfile.mkdtemp(prefix='bench_http_')
+    os.makedirs(os.path.join(workdir, 'data'))
+    database_path = os.path.join(workdir, 'data', 'database.db')
+    seeded = build_database(database_path, users=users, movies=movies, seed_value=seed_value)
+    with sqlite3.connect(database_path) as conn:
+        links = conn.execute('SELECT user_id, movie_id FROM user_movies_relationship').fetchall()
+
+    ready, result = multiprocessing.Queue(), multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(workdir, ready, stop, result))
+    server.start()
+    base_url = f'http://127.0.0.1:{ready.get(timeout=60)}'
+
+    rng = random.Random(seed_value)
+    mix = route_mix(rng, users, links)
+    per_client = [({}, {}) for _ in range(clients)]
+    started = time.perf_counter()
+    deadline = time.time() + duration
+    threads = [threading.Thread(target=client, args=(base_url, mix, deadline, conditional, samples, statuses,
+                                                     seed_value + index))
+               for index, (samples, statuses) in enumerate(per_client)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    server_stats = result.get(timeout=60)
+    server.join()
+
+    samples, statuses = {}, {}
+    for client_samples, client_statuses in per_client:
+        for name, values in client_samples.items():
+            samples.setdefault(name, []).extend(values)
+        for status, count in client_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    all_samples = [value for values in samples.values() for value in values]
+    return {
+        'seed': seeded,
+        'overall': summarize(all_samples, elapsed),
+        'routes': {name: summarize(values, elapsed) for name, values in sorted(samples.items())},
+        'statuses': statuses,
+        'server': server_stats
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--conditional', action='store_true', help='Revalidate with If-None-Match like a browser.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    results = run(args.users, args.movies, args.clients, args.duration, args.conditional, args.seed)
+    path = write_report('http_load', vars(args), results, args.output)
+    for name, summary in results['routes'].items():
+        print(f"{name:<36} n={summary['count']:<6} p50 {summary['p50_ms']:>8.2f} ms  "
+              f"p95 {summary['p95_ms']:>8.2f} ms  p99 {summary['p99_ms']:>8.2f} ms")
+    overall = results['overall']
+    print(f"overall: {overall['ops_per_second']} req/s, p99 {overall['p99_ms']} ms, "
+          f"server peak RSS {results['server']['peak_rss_mb']} MB, statuses {results['statuses']}")
+    print(json.dumps({'report': path}))
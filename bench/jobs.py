@@ -0,0 +1,89 @@
+"""
+Throughput and latency of the SQLite job queue.
+
+Enqueues --jobs jobs into a scratch queue, timing each enqueue (one INSERT
+and commit, what a route pays), then drains them with each of the
+--processes pool sizes of JobWorker processes. Each job sleeps for
+--job-ms, standing in for an OMDb call; with --job-ms 0 the drain rate is
+the queue's own overhead (a claim and a completion, two SQLite writes, per
+job). The report has enqueue latency percentiles, the drain throughput
+and the run time percentiles from JobQueue.get_stats().
+
+Usage:
+    python -m bench.jobs [--jobs 2000] [--job-ms 10] [--processes 1 2 4] [--output report.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import summarize, write_report  # noqa: E402
+from jobs.queue import JobQueue  # noqa: E402
+from jobs.worker import JobWorker  # noqa: E402
+
+
+def drain(path, job_seconds, stop):
+    handlers = {'sleep': lambda payload: time.sleep(job_seconds)}
+    JobWorker(Flask(__name__), JobQueue(path), handlers, poll_interval=0.01).run(stop)
+
+
+def run(jobs, job_ms, processes):
+    results = {}
+    enqueue = []
+    for count in processes:
+        path = os.path.join(tempfile.mkdtemp(prefix='bench_jobs_'), 'jobs.db')
+        queue = JobQueue(path)
+        for index in range(jobs):
+            started = time.perf_counter()
+            queue.enqueue('sleep', {'index': index}, dedupe_key=f'sleep:{index}')
+            enqueue.append(time.perf_counter() - started)
+
+        stop = multiprocessing.Event()
+        workers = [multiprocessing.Process(target=drain, args=(path, job_ms / 1000, stop)) for _ in range(count)]
+        started = time.perf_counter()
+        for process in workers:
+            process.start()
+        while queue.get_stats()['depth']['done'] < jobs:
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for process in workers:
+            process.join()
+
+        stats = queue.get_stats()['tasks']['sleep']
+        results[f'drain [{count} processes]'] = {
+            'jobs': jobs,
+            'seconds': round(elapsed, 2),
+            'jobs_per_second': round(jobs / elapsed, 1),
+            'run_p50_ms': stats['run_p50_ms'],
+            'run_p95_ms': stats['run_p95_ms']
+        }
+    results['enqueue'] = summarize(enqueue)
+    return {'methods': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--job-ms', type=float, default=10, help='Milliseconds each job takes.')
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4], help='Worker pool sizes to try.')
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    results = run(args.jobs, args.job_ms, args.processes)
+    path = write_report('jobs', vars(args), results, args.output)
+    for name, summary in results['methods'].items():
+        if 'p50_ms' in summary:
+            print(f"{name:<24} p50 {summary['p50_ms']:>8.3f} ms  p95 {summary['p95_ms']:>8.3f} ms  "
+                  f"p99 {summary['p99_ms']:>8.3f} ms")
+        else:
+            print(f"{name:<24} {summary['jobs']} jobs in {summary['seconds']}s ({summary['jobs_per_second']} jobs/s), "
+                  f"run p50 {summary['run_p50_ms']} ms")
+    print(json.dumps({'report': path}))
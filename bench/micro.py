@@ -0,0 +1,159 @@
+"""
+Microbenchmarks for every public SQLiteDataManager method.
+
+Seeds a scratch database with bench.seed, then calls each method
+--iterations times with randomized arguments and reports latency
+percentiles and throughput per method. Reads run before writes, so the
+read numbers are measured on the seeded data only.
+
+Usage:
+    python -m bench.micro [--users 1000] [--movies 10000] [--iterations 200]
+                          [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import summarize, write_report  # noqa: E402
+from bench.seed import build_database, create_app, movie_title  # noqa: E402
+from data_manager.sqlite_data_manager import SQLiteDataManager  # noqa: E402
+from models.models import db, UserMoviesRelationship  # noqa: E402
+
+OMDB_MOVIE = {'Title': 'Benchmark Movie', 'Director': 'Bench Director', 'Year': '2001', 'imdbRating': '7.1',
+              'Poster': 'N/A', 'Response': 'True'}
+
+
+def benchmark_cases(data_manager, rng, users, movies, largest_user):
+    """
+    (name, setup, call) triples. setup(iteration) returns the call arguments
+    and is not timed.
+    """
+    def user(_):
+        return (rng.randint(1, users),)
+
+    def user_movie(_):
+        user_id = rng.randint(1, users)
+        movie_id = db.session.query(UserMoviesRelationship.movie_id).filter_by(user_id=user_id).limit(1).scalar()
+        return user_id, movie_id or rng.randint(1, movies)
+
+    def movie(_):
+        return (rng.randint(1, movies),)
+
+    def pending_movie(iteration):
+        return data_manager.add_pending_movie(rng.randint(1, users), f'Pending {iteration}').id, OMDB_MOVIE
+
+    def page_cursor(_):
+        page = data_manager.get_user_movies_page(largest_user, sort='year', limit=50)
+        return largest_user, page['next_cursor']
+
+    return [
+        # Reads
+        ('get_all_users', lambda _: (), data_manager.get_all_users),
+        ('get_user_by_id', user, data_manager.get_user_by_id),
+        ('get_user_by_name', lambda _: (f'user{rng.randint(1, users)}',), data_manager.get_user_by_name),
+        ('get_user_movie', user_movie, data_manager.get_user_movie),
+        ('get_movie_by_id', user_movie, data_manager.get_movie_by_id),
+        ('get_user_movies', user, data_manager.get_user_movies),
+        ('get_user_movies[largest]', lambda _: (largest_user,), data_manager.get_user_movies),
+        ('iter_user_movies[largest]', lambda _: (largest_user,),
+         lambda user_id: sum(1 for _ in data_manager.iter_user_movies(user_id))),
+        ('get_user_movies_page', user, data_manager.get_user_movies_page),
+        ('get_user_movies_page[largest, page 2]', page_cursor,
+         lambda user_id, cursor: data_manager.get_user_movies_page(user_id, sort='year', after=cursor, limit=50)),
+        ('search', lambda _: (rng.choice(['night', 'city lov', 'shadw', 'golden river']),), data_manager.search),
+        ('get_movie_by_title', lambda _: (movie_title(rng.randint(1, movies)),), data_manager.get_movie_by_title),
+        ('get_movie_status', movie, data_manager.get_movie_status),
+        ('get_movie_user_ids', movie, data_manager.get_movie_user_ids),
+        ('get_user_movie_title_keys', user, data_manager.get_user_movie_title_keys),
+        ('get_movie_ids_by_title_keys', lambda _: ([movie_title(rng.randint(1, movies)).lower() for _ in range(50)],),
+         data_manager.get_movie_ids_by_title_keys),
+        ('get_movie_stats', movie, data_manager.get_movie_stats),
+        ('get_top_rated_movies', lambda _: (), data_manager.get_top_rated_movies),
+        ('get_review_by_id', lambda _: (rng.randint(1, 1000),), data_manager.get_review_by_id),
+        ('get_movie_reviews', movie, data_manager.get_movie_reviews),
+        ('get_user_reviews', user, data_manager.get_user_reviews),
+        ('iter_user_reviews[largest]', lambda _: (largest_user,),
+         lambda user_id: sum(1 for _ in data_manager.iter_user_reviews(user_id))),
+        ('get_all_movie_reviews', lambda _: (rng.randint(0, 1000),),
+         lambda after: data_manager.get_all_movie_reviews(after=after)),
+        ('get_resource_versions', user, lambda user_id: data_manager.get_resource_versions(
+            ['users', f'user_movies:{user_id}', f'user_reviews:{user_id}'])),
+        ('get_movies_without_poster', lambda _: (), data_manager.get_movies_without_poster),
+        ('get_poster_source', lambda _: ('0' * 64,), data_manager.get_poster_source),
+        # Writes
+        ('create_user_if_absent', lambda iteration: (f'bench{iteration}', f'bench{iteration}@example.com'),
+         data_manager.create_user_if_absent),
+        ('add_user', lambda iteration: (f'added{iteration}', f'added{iteration}@example.com'), data_manager.add_user),
+        ('add_movie', lambda iteration: (rng.randint(1, users), dict(OMDB_MOVIE, Title=f'Bench {iteration}')),
+         data_manager.add_movie),
+        ('add_existing_movie', lambda _: (rng.randint(1, users), rng.randint(1, movies)),
+         data_manager.add_existing_movie),
+        ('bulk_add_movies[50]', lambda iteration: (rng.randint(1, users), [
+            {'title': f'Bulk {iteration} {i}', 'title_key': f'bulk {iteration} {i}', 'director': 'D', 'year': 2000,
+             'rating': 5.0, 'poster': None} for i in range(25)], [rng.randint(1, movies) for _ in range(25)]),
+         data_manager.bulk_add_movies),
+        ('add_pending_movie', lambda iteration: (rng.randint(1, users), f'Queued {iteration}'),
+         data_manager.add_pending_movie),
+        ('complete_pending_movie', pending_movie, data_manager.complete_pending_movie),
+        ('mark_movie_pending', movie, data_manager.mark_movie_pending),
+        ('fail_pending_movie', movie, data_manager.fail_pending_movie),
+        ('set_movie_poster_hashes', lambda _: ({rng.randint(1, movies): 'f' * 64},),
+         data_manager.set_movie_poster_hashes),
+        ('update_movie', lambda _: (rng.randint(1, users), rng.randint(1, movies), {'rating': 6.5}),
+         data_manager.update_movie),
+        ('add_review', lambda _: (rng.randint(1, users), rng.randint(1, movies), 'Benchmark review', 7),
+         data_manager.add_review),
+        ('delete_movie', user_movie, data_manager.delete_movie),
+        ('rebuild_movie_stats[one movie]', lambda _: ([rng.randint(1, movies)],), data_manager.rebuild_movie_stats),
+    ]
+
+
+def run(users, movies, iterations, seed_value=1):
+    path = os.path.join(tempfile.mkdtemp(prefix='bench_micro_'), 'micro.db')
+    seeded = build_database(path, users=users, movies=movies, seed_value=seed_value)
+
+    app = create_app(path)
+    results = {'seed': seeded, 'methods': {}}
+    with app.app_context():
+        data_manager = SQLiteDataManager(db)
+        rng = random.Random(seed_value)
+        largest_user = db.session.query(UserMoviesRelationship.user_id).group_by(
+            UserMoviesRelationship.user_id).order_by(func.count().desc()).limit(1).scalar()
+        for name, setup, call in benchmark_cases(data_manager, rng, users, movies, largest_user):
+            samples = []
+            for iteration in range(iterations):
+                args = setup(iteration)
+                # Start every call with an empty identity map, as a request would
+                db.session.remove()
+                started = time.perf_counter()
+                call(*args)
+                samples.append(time.perf_counter() - started)
+            db.session.remove()
+            results['methods'][name] = summarize(samples)
+        db.engine.dispose()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    results = run(args.users, args.movies, args.iterations, args.seed)
+    path = write_report('micro', vars(args), results, args.output)
+    for name, summary in results['methods'].items():
+        print(f"{name:<40} p50 {summary['p50_ms']:>9.3f} ms  p95 {summary['p95_ms']:>9.3f} ms  "
+              f"p99 {summary['p99_ms']:>9.3f} ms")
+    print(json.dumps({'report': path}))
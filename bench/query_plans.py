@@ -0,0 +1,145 @@
+"""
+Before/after query-plan report for the SQLiteDataManager read methods.
+
+Seeds a scratch database, records the SQL each data manager method emits
+and runs EXPLAIN QUERY PLAN for it twice: once with only the primary keys
+(the schema before secondary indexes were added) and once with the full
+schema from models.models.
+
+Usage:
+    python -m bench.query_plans [--users 200] [--movies 2000] [--output report.txt]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+from flask import Flask
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager.sqlite_data_manager import SQLiteDataManager  # noqa: E402
+from models.models import db, User, Movie, Review, UserMoviesRelationship  # noqa: E402
+from omdb.cache import normalize_title  # noqa: E402
+
+
+def create_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    db.init_app(app)
+    return app
+
+
+def seed(users, movies, seed_value=1):
+    rng = random.Random(seed_value)
+    db.session.add_all(User(id=i, name=f'user{i}', email=f'user{i}@example.com') for i in range(1, users + 1))
+    db.session.add_all(Movie(id=i, title=f'Movie {i}', title_key=normalize_title(f'Movie {i}'), director='Director',
+                             year=1950 + i % 70, rating=round(rng.uniform(1, 10), 1))
+                       for i in range(1, movies + 1))
+    links = {(rng.randint(1, users), rng.randint(1, movies)) for _ in range(users * 20)}
+    db.session.add_all(UserMoviesRelationship(user_id=user_id, movie_id=movie_id) for user_id, movie_id in links)
+    db.session.add_all(Review(user_id=user_id, movie_id=movie_id, review_text='Great', rating=rng.randint(1, 10))
+                       for user_id, movie_id in list(links)[:users * 5])
+    db.session.commit()
+
+
+def capture_statements(data_manager, user_id, movie_id):
+    """Run every read method once and record the SELECTs each one issues."""
+    calls = [
+        ('get_all_users', lambda: data_manager.get_all_users()),
+        ('get_user_by_id', lambda: data_manager.get_user_by_id(user_id)),
+        ('get_user_by_name', lambda: data_manager.get_user_by_name(f'user{user_id}')),
+        ('get_user_movies', lambda: data_manager.get_user_movies(user_id)),
+        ('get_user_movie', lambda: data_manager.get_user_movie(user_id, movie_id)),
+        ('get_movie_by_id', lambda: data_manager.get_movie_by_id(user_id, movie_id)),
+        ('get_movie_by_title', lambda: data_manager.get_movie_by_title(f'Movie {movie_id}')),
+        ('get_movie_reviews', lambda: data_manager.get_movie_reviews(movie_id)),
+        ('get_user_reviews', lambda: data_manager.get_user_reviews(user_id)),
+        ('get_all_movie_reviews', lambda: data_manager.get_all_movie_reviews(after=10)),
+        ('get_user_movie_title_keys', lambda: data_manager.get_user_movie_title_keys(user_id)),
+        ('get_movie_ids_by_title_keys', lambda: data_manager.get_movie_ids_by_title_keys(['movie 1', 'movie 2'])),
+        ('add_movie (catalog lookup)', lambda: data_manager.add_movie(user_id, {
+            'Title': f'Movie {movie_id}', 'Director': 'Director', 'Year': '2000', 'imdbRating': '5.0'})),
+    ]
+    captured = []
+    current = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            current.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for name, call in calls:
+            current.clear()
+            call()
+            db.session.rollback()
+            captured.append((name, list(current)))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return captured
+
+
+def explain(conn, statement, parameters):
+    rows = conn.execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def drop_secondary_indexes(path):
+    conn = sqlite3.connect(path)
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_autoindex%'")]
+    for name in names:
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.commit()
+    conn.close()
+
+
+def build_report(users, movies):
+    workdir = tempfile.mkdtemp(prefix='query_plans_')
+    after_path = os.path.join(workdir, 'after.db')
+    before_path = os.path.join(workdir, 'before.db')
+
+    app = create_app(after_path)
+    with app.app_context():
+        db.create_all()
+        seed(users, movies)
+        db.engine.dispose()
+
+    with open(after_path, 'rb') as src, open(before_path, 'wb') as dst:
+        dst.write(src.read())
+    drop_secondary_indexes(before_path)
+
+    with app.app_context():
+        captured = capture_statements(SQLiteDataManager(db), user_id=users // 2, movie_id=movies // 2)
+        db.engine.dispose()
+
+    before = sqlite3.connect(before_path)
+    after = sqlite3.connect(after_path)
+    lines = [f'Query plans for {users} users / {movies} movies', '']
+    for name, statements in captured:
+        lines.append(f'== {name} ==')
+        for statement, parameters in statements:
+            lines.append('  ' + ' '.join(statement.split()))
+            lines.extend('    before: ' + step for step in explain(before, statement, parameters))
+            lines.extend('    after:  ' + step for step in explain(after, statement, parameters))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--movies', type=int, default=2000)
+    parser.add_argument('--output', help='Write the report to this file instead of stdout.')
+    args = parser.parse_args()
+
+    report = build_report(args.users, args.movies)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(report + '\n')
+    else:
+        print(report)
@@ -0,0 +1,91 @@
+"""
+Build time, serving latency and incremental update cost of the recommendation model.
+
+Seeds a scratch database with bench.seed and builds the item-item model
+once from scratch. It then times --iterations recommendation lookups for
+random users, and the same number of incremental syncs after a new library
+movie or a new review. Each sync reads the new rows and recomputes only
+the neighbor lists of the movie that changed.
+
+Usage:
+    python -m bench.recommendations [--users 1000] [--movies 10000] [--iterations 200]
+                                    [--top-k 50] [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import summarize, write_report  # noqa: E402
+from bench.seed import build_database, create_app  # noqa: E402
+from data_manager.sqlite_data_manager import SQLiteDataManager  # noqa: E402
+from models.models import db  # noqa: E402
+from recommendations.index import RecommendationIndex  # noqa: E402
+
+
+def timed(call, *arguments):
+    started = time.perf_counter()
+    call(*arguments)
+    return time.perf_counter() - started
+
+
+def run(users, movies, iterations, top_k, seed_value=1):
+    workdir = tempfile.mkdtemp(prefix='bench_recommendations_')
+    database_path = os.path.join(workdir, 'database.db')
+    seeded = build_database(database_path, users=users, movies=movies, seed_value=seed_value)
+
+    app = create_app(database_path)
+    rng = random.Random(seed_value)
+    with app.app_context():
+        data_manager = SQLiteDataManager(db)
+        index = RecommendationIndex(app, db, top_k=top_k, sync_interval=0)
+        model = index.rebuild()
+
+        # What the API serves between background syncs
+        recommend = [timed(model.recommend, rng.randint(1, users), 20) for _ in range(iterations)]
+
+        add_movie, add_review = [], []
+        for _ in range(iterations):
+            user_id = rng.randint(1, users)
+            data_manager.add_existing_movie(user_id, rng.randint(1, movies))
+            add_movie.append(timed(index.refresh))
+            movie_id = rng.choice(list(model.items_by_user.get(user_id) or [1]))
+            data_manager.add_review(user_id, movie_id, 'Benchmark review', rng.randint(0, 10))
+            add_review.append(timed(index.refresh))
+
+        stats = index.get_stats()
+        db.engine.dispose()
+    return {
+        'seed': seeded,
+        'model': stats,
+        'methods': {
+            'recommend': summarize(recommend),
+            'sync after add_existing_movie': summarize(add_movie),
+            'sync after add_review': summarize(add_review)
+        }
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    results = run(args.users, args.movies, args.iterations, args.top_k, args.seed)
+    path = write_report('recommendations', vars(args), results, args.output)
+    model = results['model']
+    print(f"built {model['movies']} movies / {model['users']} users in {model['build_seconds']}s ({model['backend']})")
+    for name, summary in results['methods'].items():
+        print(f"{name:<32} p50 {summary['p50_ms']:>8.3f} ms  p95 {summary['p95_ms']:>8.3f} ms  "
+              f"p99 {summary['p99_ms']:>8.3f} ms")
+    print(json.dumps({'report': path}))
@@ -0,0 +1,137 @@
+"""
+Cost of a full OMDb metadata refresh: per-movie writes against batches.
+
+Seeds a scratch database with bench.seed and serves every movie from the
+fake OMDb server by imdbID, with --changed of them carrying a new rating.
+The catalog is then refreshed twice. The first way fetches and stores one
+movie at a time, a commit per movie, like the refresh_movie job. The second
+uses MetadataRefresher: concurrent lookups and one transaction per batch,
+rewriting only the changed rows. The report has the throughput, the SQL
+statements and commits, and how long each write transaction held
+SQLite's write lock. The lock is the only thing a web worker can wait on.
+
+Usage:
+    python -m bench.refresh [--movies 2000] [--changed 0.05] [--latency-ms 20]
+                            [--batch-size 100] [--concurrency 4] [--rate 0] [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event, select, update
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import summarize, write_report  # noqa: E402
+from bench.seed import build_database, create_app  # noqa: E402
+from data_manager.sqlite_data_manager import SQLiteDataManager  # noqa: E402
+from models.models import db, Movie  # noqa: E402
+from omdb.client import OMDbClient  # noqa: E402
+from omdb.fake_server import FakeOMDbServer  # noqa: E402
+from omdb.rate_limit import TokenBucket  # noqa: E402
+from omdb.refresher import MetadataRefresher  # noqa: E402
+
+
+def omdb_movies(rng, changed):
+    """OMDb responses for every catalog movie, a `changed` fraction of them with a new rating."""
+    movies = []
+    for row in db.session.execute(select(Movie.title, Movie.director, Movie.year, Movie.rating, Movie.poster,
+                                         Movie.imdb_id)):
+        rating = round(row.rating % 9 + 0.5, 1) if rng.random() < changed else row.rating
+        movies.append({'Title': row.title, 'Director': row.director, 'Year': str(row.year), 'imdbRating': str(rating),
+                       'Poster': row.poster, 'imdbID': row.imdb_id})
+    return movies
+
+
+def per_movie(data_manager, client, _):
+    """One lookup and one transaction per movie, as the refresh_movie job does."""
+    for movie_id, imdb_id in db.session.execute(select(Movie.id, Movie.imdb_id).order_by(Movie.id)).all():
+        data_manager.refresh_movie(movie_id, client.get_movie_by_imdb_id(imdb_id))
+
+
+def run(movies, changed, latency_ms, batch_size, concurrency, rate, seed_value=1):
+    workdir = tempfile.mkdtemp(prefix='bench_refresh_')
+    database_path = os.path.join(workdir, 'database.db')
+    seeded = build_database(database_path, users=max(10, movies // 10), movies=movies, seed_value=seed_value)
+    app = create_app(database_path)
+    rng = random.Random(seed_value)
+    results = {}
+
+    with app.app_context():
+        data_manager = SQLiteDataManager(db)
+        counts = {'statements': 0, 'commits': 0}
+        lock_samples = []
+        transaction = {}
+
+        def before_execute(conn, cursor, statement, *args):
+            counts['statements'] += 1
+            # The write lock is taken by the first write and held until the commit
+            if 'started' not in transaction and not statement.lstrip().upper().startswith(('SELECT', 'PRAGMA')):
+                transaction['started'] = time.perf_counter()
+
+        def on_commit(conn):
+            counts['commits'] += 1
+            if 'started' in transaction:
+                lock_samples.append(time.perf_counter() - transaction.pop('started'))
+
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        event.listen(db.engine, 'commit', on_commit)
+
+        def refresher(data_manager, client, bucket):
+            MetadataRefresher(data_manager, client, bucket, max_age=0, batch_size=batch_size,
+                              concurrency=concurrency).run()
+
+        served = omdb_movies(rng, changed)
+        seeded_values = [row._asdict() for row in db.session.execute(select(Movie.id, Movie.rating))]
+        for name, method in [('per movie', per_movie), (f'batches of {batch_size}', refresher)]:
+            fake = FakeOMDbServer(served, latency=latency_ms / 1000).start()
+            client = OMDbClient('bench', fake.url, cache=None, pool_size=max(10, concurrency))
+            bucket = TokenBucket(rate or 1e9, max(1, concurrency))
+            # Every method starts from the seeded values
+            db.session.execute(update(Movie), seeded_values)
+            db.session.execute(update(Movie).values(fetched_at=None))
+            db.session.commit()
+            counts.update(statements=0, commits=0)
+            lock_samples.clear()
+
+            started = time.perf_counter()
+            method(data_manager, client, bucket)
+            elapsed = time.perf_counter() - started
+            fake.stop()
+
+            results[name] = {
+                'movies': len(served),
+                'seconds': round(elapsed, 2),
+                'movies_per_second': round(len(served) / elapsed, 1),
+                'statements_per_movie': round(counts['statements'] / len(served), 2),
+                'commits': counts['commits'],
+                'write_lock': summarize(lock_samples),
+                'omdb_requests': fake.request_count
+            }
+        db.engine.dispose()
+    return {'seed': seeded, 'methods': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--movies', type=int, default=2000)
+    parser.add_argument('--changed', type=float, default=0.05, help='Fraction of movies with new OMDb values.')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Fake OMDb response time.')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0, help='OMDb requests per second; 0 for no limit.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    results = run(args.movies, args.changed, args.latency_ms, args.batch_size, args.concurrency, args.rate, args.seed)
+    path = write_report('refresh', vars(args), results, args.output)
+    for name, summary in results['methods'].items():
+        print(f"{name:<16} {summary['movies_per_second']:>8} movies/s  {summary['statements_per_movie']:>6} statements "
+              f"per movie  {summary['commits']:>5} commits  write lock p50 {summary['write_lock']['p50_ms']} ms "
+              f"p99 {summary['write_lock']['p99_ms']} ms")
+    print(json.dumps({'report': path}))
@@ -0,0 +1,157 @@
+"""
+Render time of the list pages, with and without the fragment cache.
+
+Renders users.html, user_movies.html, user_reviews.html and
+movie_reviews.html for --sizes synthetic rows each, inside a request
+context of the real app (no database reads, so only Jinja is measured).
+Every page is rendered four ways: with the fragment cache disabled, cold
+(cache cleared before each render), warm, and warm with one row changed
+between renders, which is what a page costs after a single edit.
+
+It also times compiling every template from source against loading it
+from the bytecode cache that app.py fills at startup.
+
+Usage:
+    python -m bench.render [--sizes 1000 10000] [--repeat 20] [--output report.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemBytecodeCache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import summarize, write_report  # noqa: E402
+from data_manager.rows import LibraryMovieRow, MovieRow, ReviewListingRow, ReviewRow, UserRow  # noqa: E402
+
+
+def users(count):
+    return [UserRow(i, f'User {i}', f'user{i}@example.com') for i in range(1, count + 1)]
+
+
+def library(count):
+    return [LibraryMovieRow(i, f'Movie <{i}>', f'Director {i % 97}', 1950 + i % 70, round(5 + i % 50 / 10, 1), 'N/A',
+                            None, 'ready', '2024-01-01 00:00:00', i % 3, 7.5 if i % 3 else None)
+            for i in range(1, count + 1)]
+
+
+def review_cards(count):
+    return [(MovieRow(i, f'Movie <{i}>', 'Director', 2000, 7.0, 'N/A', None, 'ready'),
+             tuple(ReviewRow(i * 10 + j, 1, i, f'Review {j} of movie {i} & more', 5 + j) for j in range(i % 3)))
+            for i in range(1, count + 1)]
+
+
+def listing(count):
+    return [ReviewListingRow(i, f'User {i % 500}', f'Movie <{i}>', f'Review {i} & more', i % 11)
+            for i in range(1, count + 1)]
+
+
+def edit_row(rows, iteration):
+    """A copy of `rows` with one row changed, as after an edit or a new review."""
+    index = iteration % len(rows)
+    row = rows[index]
+    if isinstance(row, tuple):
+        movie, reviews = row
+        edited = (movie, reviews + (ReviewRow(-iteration, 1, movie.id, 'New review', 9),))
+    else:
+        field = {UserRow: 'name', LibraryMovieRow: 'title'}.get(type(row), 'review_text')
+        edited = type(row)(**dict(row.to_dict(), **{field: f'Edited {iteration}'}))
+    return rows[:index] + [edited] + rows[index + 1:]
+
+
+def pages(count):
+    """(template, context, list argument, rows) entries."""
+    user = UserRow(1, 'User 1', 'user1@example.com')
+    movie_page = {'total': count, 'sort': 'title', 'order': 'asc', 'prev_cursor': None, 'next_cursor': None}
+    return [
+        ('users.html', {}, 'users', users(count)),
+        ('user_movies.html', {'user': user, 'page': movie_page, 'filters': {}}, 'user_movies', library(count)),
+        ('user_reviews.html', {'user': user}, 'review_cards', review_cards(count)),
+        ('movie_reviews.html', {'prev_cursor': None, 'next_cursor': None, 'limit': count}, 'movie_reviews',
+         listing(count)),
+    ]
+
+
+def time_renders(render, repeat, before=None):
+    samples = []
+    for iteration in range(repeat):
+        arguments = before(iteration) if before else ()
+        started = time.perf_counter()
+        render(*arguments)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def compile_times(app, repeat):
+    """Compile every template from source, then load it from a fresh bytecode cache."""
+    names = app.jinja_env.list_templates(extensions=['html'])
+    cache_directory = tempfile.mkdtemp(prefix='bench_jinja_')
+
+    def compile_all(bytecode_cache):
+        environment = Environment(loader=app.jinja_loader, autoescape=True, bytecode_cache=bytecode_cache)
+        for name in names:
+            environment.get_template(name)
+
+    compile_all(FileSystemBytecodeCache(cache_directory))
+    return {
+        f'compile {len(names)} templates': time_renders(lambda: compile_all(None), repeat),
+        f'load {len(names)} templates from bytecode': time_renders(
+            lambda: compile_all(FileSystemBytecodeCache(cache_directory)), repeat)
+    }
+
+
+def run(sizes, repeat):
+    # app.py creates its data directory in the working directory
+    os.chdir(tempfile.mkdtemp(prefix='bench_render_'))
+    os.environ.update(OMDB_FETCH_WORKERS='0', LOG_LEVEL='WARNING')
+    import app as application
+    from flask import render_template
+
+    app = application.app
+    fragment_cache = app.extensions['fragment_cache']
+    backend = fragment_cache.backend
+    results = {}
+
+    def clear(_):
+        fragment_cache.clear()
+        return ()
+
+    with app.test_request_context():
+        for count in sizes:
+            backend.max_size = max(backend.max_size, count)
+            for template, context, name, rows in pages(count):
+                def render(rows=rows):
+                    return render_template(template, **context, **{name: rows})
+
+                label = f'{template} [{count}]'
+                fragment_cache.backend = None
+                results[f'{label} no cache'] = time_renders(render, repeat)
+                fragment_cache.backend = backend
+                results[f'{label} cold'] = time_renders(render, repeat, clear)
+                render()
+                results[f'{label} warm'] = time_renders(render, repeat)
+                results[f'{label} one row changed'] = time_renders(
+                    render, repeat, lambda iteration: (edit_row(rows, iteration),))
+                fragment_cache.clear()
+    results.update(compile_times(app, repeat))
+    return {'methods': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Rows per page.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    results = run(args.sizes, args.repeat)
+    path = write_report('render', vars(args), results, output)
+    for name, summary in results['methods'].items():
+        print(f"{name:<44} p50 {summary['p50_ms']:>9.3f} ms  p95 {summary['p95_ms']:>9.3f} ms  "
+              f"p99 {summary['p99_ms']:>9.3f} ms")
+    print(json.dumps({'report': path}))
@@ -0,0 +1,94 @@
+"""
+Shared timing statistics and JSON report output for the benchmark scripts.
+
+Every report records the git commit, Python version and run parameters
+next to the results, so runs on different commits can be compared with
+`python -m bench.compare`.
+"""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+REPORT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def summarize(samples, elapsed=None):
+    """
+    Latency percentiles of a list of durations in seconds.
+
+    Args:
+        samples (list): Durations in seconds.
+        elapsed (float): Wall time the samples were collected in, for throughput.
+
+    Returns:
+        dict: count, p50/p95/p99/max in milliseconds and ops per second.
+    """
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 3)
+
+    summary = {
+        'count': len(ordered),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3)
+    }
+    total = elapsed if elapsed is not None else sum(ordered)
+    summary['ops_per_second'] = round(len(ordered) / total, 1) if total else None
+    return summary
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(REPORT_DIRECTORY), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def write_report(name, parameters, results, output=None):
+    """
+    Save a benchmark report as JSON.
+
+    Args:
+        name (str): Benchmark name, e.g. 'micro' or 'http_load'.
+        parameters (dict): Command-line parameters of the run.
+        results (dict): Benchmark results.
+        output (str): File to write; defaults to bench/results/<name>-<commit>-<time>.json.
+
+    Returns:
+        str: Path of the written report.
+    """
+    commit = git_commit()
+    report = {
+        'benchmark': name,
+        'commit': commit,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'peak_rss_mb': peak_rss_mb(),
+        'results': results
+    }
+    if output is None:
+        os.makedirs(REPORT_DIRECTORY, exist_ok=True)
+        output = os.path.join(REPORT_DIRECTORY, f'{name}-{commit}-{time.strftime("%Y%m%d%H%M%S")}.json')
+    with open(output, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    return output
@@ -0,0 +1,131 @@
+"""
+Time and memory of materializing large listings, per 10,000 rows.
+
+Seeds a scratch database with bench.seed, then loads --rows movies and
+reviews four ways: full ORM entities, ORM entities copied into dicts (how
+the data manager used to build listings), column-only selects copied into
+dicts, and column-only selects into the immutable rows of
+data_manager.rows. Every load starts from an empty session, so the ORM
+cases pay for identity-map bookkeeping like a real request does.
+
+Time is the latency of the whole load; memory is measured with
+tracemalloc as the bytes still held by the result (plus the session) and
+the peak while loading.
+
+Usage:
+    python -m bench.rows [--users 1000] [--movies 20000] [--rows 10000]
+                         [--repeat 20] [--output report.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import summarize, write_report  # noqa: E402
+from bench.seed import build_database, create_app  # noqa: E402
+from data_manager.rows import MovieRow, ReviewRow  # noqa: E402
+from data_manager.sqlite_data_manager import MOVIE_COLUMNS, REVIEW_COLUMNS  # noqa: E402
+from models.models import db, Movie, Review  # noqa: E402
+
+
+def movie_dict(movie):
+    return {'id': movie.id, 'title': movie.title, 'director': movie.director, 'year': movie.year,
+            'rating': movie.rating, 'poster': movie.poster, 'poster_hash': movie.poster_hash, 'status': movie.status}
+
+
+def review_dict(review):
+    return {'id': review.id, 'user_id': review.user_id, 'movie_id': review.movie_id,
+            'review_text': review.review_text, 'rating': review.rating}
+
+
+def loaders(rows):
+    """(name, load) pairs; every load returns a list of `rows` results."""
+    def entities(model):
+        return lambda: model.query.order_by(model.id).limit(rows).all()
+
+    def columns(columns):
+        return lambda: db.session.execute(select(*columns).order_by(columns[0]).limit(rows)).all()
+
+    movie_entities, review_entities = entities(Movie), entities(Review)
+    movie_columns, review_columns = columns(MOVIE_COLUMNS), columns(REVIEW_COLUMNS)
+    return [
+        ('movies: orm entities', movie_entities),
+        ('movies: orm -> dict', lambda: [movie_dict(movie) for movie in movie_entities()]),
+        ('movies: columns -> dict', lambda: [dict(row._mapping) for row in movie_columns()]),
+        ('movies: columns -> MovieRow', lambda: [MovieRow(*row) for row in movie_columns()]),
+        ('reviews: orm entities', review_entities),
+        ('reviews: orm -> dict', lambda: [review_dict(review) for review in review_entities()]),
+        ('reviews: columns -> dict', lambda: [dict(row._mapping) for row in review_columns()]),
+        ('reviews: columns -> ReviewRow', lambda: [ReviewRow(*row) for row in review_columns()]),
+    ]
+
+
+def measure_memory(load):
+    """Bytes still allocated after the load (result plus session) and the peak while loading."""
+    db.session.remove()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = load()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(result)
+    del result
+    db.session.remove()
+    return count, retained - baseline, peak - baseline
+
+
+def run(users, movies, rows, repeat, seed_value=1):
+    workdir = tempfile.mkdtemp(prefix='bench_rows_')
+    database_path = os.path.join(workdir, 'database.db')
+    seeded = build_database(database_path, users=users, movies=movies, seed_value=seed_value)
+
+    app = create_app(database_path)
+    results = {}
+    with app.app_context():
+        for name, load in loaders(rows):
+            # Warm up the statement cache and the page cache first
+            load()
+            samples = []
+            for _ in range(repeat):
+                db.session.remove()
+                started = time.perf_counter()
+                load()
+                samples.append(time.perf_counter() - started)
+            count, retained, peak = measure_memory(load)
+            scale = 10000 / count if count else 0
+            summary = summarize(samples)
+            summary.update({
+                'rows': count,
+                'ms_per_10k': round(summary['p50_ms'] * scale, 2),
+                'retained_kb_per_10k': round(retained * scale / 1024, 1),
+                'peak_kb_per_10k': round(peak * scale / 1024, 1)
+            })
+            results[name] = summary
+        db.session.remove()
+        db.engine.dispose()
+    return {'seed': seeded, 'methods': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--movies', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=10000, help='Rows per load.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    results = run(args.users, args.movies, args.rows, args.repeat, args.seed)
+    path = write_report('rows', vars(args), results, args.output)
+    for name, summary in results['methods'].items():
+        print(f"{name:<32} n={summary['rows']:<6} {summary['ms_per_10k']:>8.2f} ms/10k  "
+              f"retained {summary['retained_kb_per_10k']:>8.1f} KB/10k  peak {summary['peak_kb_per_10k']:>8.1f} KB/10k")
+    print(json.dumps({'report': path}))
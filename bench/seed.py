@@ -0,0 +1,168 @@
+"""
+Synthetic dataset generator for benchmarks.
+
+Builds a database with the application's full schema (models.models plus
+the migrations) and fills it with N users, M movies, libraries whose sizes
+follow a power law (most users have a few movies, a handful have
+thousands) and reviews. Popular movies are picked more often than obscure
+ones, so the catalog also has a long tail. The same --seed always produces
+the same data.
+
+Usage:
+    python -m bench.seed PATH [--users 1000] [--movies 10000] [--alpha 1.2]
+                              [--max-library 5000] [--review-ratio 0.2] [--seed 1]
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+from flask import Flask
+from sqlalchemy import insert
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine import configure_app, setup_engine  # noqa: E402
+from models.migrations import upgrade  # noqa: E402
+from models.models import db, Movie, Review, User, UserMoviesRelationship, utcnow  # noqa: E402
+from models.stats import rebuild_movie_stats  # noqa: E402
+from omdb.cache import normalize_title  # noqa: E402
+
+WORDS = ['Night', 'City', 'Love', 'Dark', 'Last', 'Blue', 'King', 'War', 'Star', 'Dream', 'Road', 'Ghost', 'Heart',
+         'Fire', 'Silent', 'Lost', 'Golden', 'River', 'Winter', 'Shadow', 'Iron', 'Wild', 'Secret', 'Empire']
+DIRECTORS = [f'{first} {last}' for first in ('Ana', 'Ben', 'Chen', 'Dara', 'Eli', 'Farah', 'Goran', 'Hana')
+             for last in ('Ito', 'Jovanovic', 'Kim', 'Lopez', 'Moreau', 'Novak', 'Okafor', 'Petrov')]
+REVIEW_TEXTS = ['A masterpiece of modern cinema.', 'Great acting, weak ending.', 'Too long, but worth it.',
+                'The soundtrack carries the whole film.', 'Would not watch again.', 'A surprising, clever plot.']
+BATCH_SIZE = 5000
+
+
+def create_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    configure_app(app)
+    db.init_app(app)
+    return app
+
+
+def library_sizes(rng, users, movies, alpha, max_library):
+    """Pareto-distributed library sizes: the median user has a few movies, the top ones thousands."""
+    return [min(int(rng.paretovariate(alpha)), max_library, movies) for _ in range(users)]
+
+
+def movie_title(index):
+    first, second = WORDS[index % len(WORDS)], WORDS[(index // len(WORDS)) % len(WORDS)]
+    return f'The {first} {second} {index}'
+
+
+def _batched(rows):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def seed(users=1000, movies=10000, alpha=1.2, max_library=5000, review_ratio=0.2, seed_value=1):
+    """
+    Fill the current app's database with synthetic data.
+
+    Returns:
+        dict: Row counts per table and the library size distribution.
+    """
+    rng = random.Random(seed_value)
+    now = utcnow()
+
+    for batch in _batched({'id': i, 'name': f'user{i}', 'email': f'user{i}@example.com'}
+                          for i in range(1, users + 1)):
+        db.session.execute(insert(User), batch)
+
+    movie_rows = ({'id': i, 'title': movie_title(i), 'title_key': normalize_title(movie_title(i)),
+                   'director': DIRECTORS[i % len(DIRECTORS)], 'year': 1950 + i % 75,
+                   'rating': round(rng.uniform(1, 10), 1), 'poster': f'https://posters.example.com/{i}.jpg',
+                   'imdb_id': f'tt{i:07d}', 'status': 'ready'} for i in range(1, movies + 1))
+    for batch in _batched(movie_rows):
+        db.session.execute(insert(Movie), batch)
+
+    # Zipf-like popularity: movie k is picked with weight 1 / k
+    cumulative = list(itertools.accumulate(1 / rank for rank in range(1, movies + 1)))
+    sizes = library_sizes(rng, users, movies, alpha, max_library)
+    links = reviews = 0
+    link_batch, review_batch = [], []
+    for user_id, size in enumerate(sizes, start=1):
+        library = set()
+        while len(library) < size:
+            library.add(bisect.bisect_left(cumulative, rng.random() * cumulative[-1]) + 1)
+        for movie_id in library:
+            link_batch.append({'user_id': user_id, 'movie_id': movie_id, 'added_at': now})
+            if rng.random() < review_ratio:
+                review_batch.append({'user_id': user_id, 'movie_id': movie_id, 'rating': rng.randint(0, 10),
+                                     'review_text': rng.choice(REVIEW_TEXTS)})
+        if len(link_batch) >= BATCH_SIZE:
+            db.session.execute(insert(UserMoviesRelationship), link_batch)
+            links += len(link_batch)
+            link_batch = []
+        if len(review_batch) >= BATCH_SIZE:
+            db.session.execute(insert(Review), review_batch)
+            reviews += len(review_batch)
+            review_batch = []
+    if link_batch:
+        db.session.execute(insert(UserMoviesRelationship), link_batch)
+        links += len(link_batch)
+    if review_batch:
+        db.session.execute(insert(Review), review_batch)
+        reviews += len(review_batch)
+
+    rebuild_movie_stats(db.session)
+    db.session.commit()
+
+    sizes.sort()
+    return {
+        'users': users,
+        'movies': movies,
+        'links': links,
+        'reviews': reviews,
+        'library_size': {'median': sizes[len(sizes) // 2], 'p99': sizes[int(len(sizes) * 0.99)], 'max': sizes[-1]}
+    }
+
+
+def build_database(path, **options):
+    """
+    Create a database with the full application schema at `path` and seed it.
+
+    Returns:
+        dict: The summary from seed(), plus the seconds it took.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    started = time.perf_counter()
+    app = create_app(path)
+    with app.app_context():
+        setup_engine(app, db)
+        db.create_all()
+        upgrade(db)
+        summary = seed(**options)
+        db.engine.dispose()
+    summary['seconds'] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--alpha', type=float, default=1.2, help='Pareto shape of the library sizes.')
+    parser.add_argument('--max-library', type=int, default=5000)
+    parser.add_argument('--review-ratio', type=float, default=0.2, help='Share of library entries with a review.')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(json.dumps(build_database(args.path, users=args.users, movies=args.movies, alpha=args.alpha,
+                                   max_library=args.max_library, review_ratio=args.review_ratio,
+                                   seed_value=args.seed), indent=2))
@@ -0,0 +1,124 @@
+"""
+Concurrent read/write load test: SQLite defaults vs. the tuned engine setup.
+
+Starts reader and writer processes (standing in for gunicorn workers)
+against a scratch database, once with SQLAlchemy's defaults and once with
+models.engine's pragmas and pool settings, and reports throughput and
+"database is locked" errors for each.
+
+Usage:
+    python -m bench.sqlite_load [--readers 4] [--writers 4] [--duration 5]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine import engine_options, install_pragmas, load_settings  # noqa: E402
+
+READ_QUERY = text(
+    'SELECT movie.id, movie.title FROM movie '
+    'JOIN user_movies_relationship ON user_movies_relationship.movie_id = movie.id '
+    'WHERE user_movies_relationship.user_id = :user_id'
+)
+WRITE_QUERY = text(
+    "INSERT INTO review (user_id, movie_id, review_text, rating) VALUES (:user_id, :movie_id, 'Load test', 7)"
+)
+
+
+def make_engine(path, tuned):
+    if not tuned:
+        return create_engine('sqlite:///' + path)
+    pragmas, pool = load_settings({})
+    engine = create_engine('sqlite:///' + path, **engine_options(pragmas, pool))
+    install_pragmas(engine, pragmas)
+    return engine
+
+
+def seed(path, users=100, movies=1000):
+    engine = create_engine('sqlite:///' + path)
+    rng = random.Random(1)
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE user (id INTEGER PRIMARY KEY, name TEXT, email TEXT)'))
+        conn.execute(text('CREATE TABLE movie (id INTEGER PRIMARY KEY, title TEXT)'))
+        conn.execute(text('CREATE TABLE user_movies_relationship (user_id INTEGER, movie_id INTEGER, '
+                          'PRIMARY KEY (user_id, movie_id))'))
+        conn.execute(text('CREATE TABLE review (id INTEGER PRIMARY KEY, user_id INTEGER, movie_id INTEGER, '
+                          'review_text TEXT, rating FLOAT)'))
+        conn.execute(text('INSERT INTO user (id, name, email) VALUES (:id, :name, :email)'),
+                     [{'id': i, 'name': f'user{i}', 'email': f'user{i}@example.com'} for i in range(1, users + 1)])
+        conn.execute(text('INSERT INTO movie (id, title) VALUES (:id, :title)'),
+                     [{'id': i, 'title': f'Movie {i}'} for i in range(1, movies + 1)])
+        links = {(rng.randint(1, users), rng.randint(1, movies)) for _ in range(users * 30)}
+        conn.execute(text('INSERT INTO user_movies_relationship (user_id, movie_id) VALUES (:user_id, :movie_id)'),
+                     [{'user_id': user_id, 'movie_id': movie_id} for user_id, movie_id in links])
+    engine.dispose()
+
+
+def worker(path, tuned, role, duration, start_at, results):
+    engine = make_engine(path, tuned)
+    rng = random.Random(os.getpid())
+    ops = errors = 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    deadline = start_at + duration
+    while time.time() < deadline:
+        try:
+            if role == 'reader':
+                with engine.connect() as conn:
+                    conn.execute(READ_QUERY, {'user_id': rng.randint(1, 100)}).fetchall()
+            else:
+                with engine.begin() as conn:
+                    conn.execute(WRITE_QUERY, {'user_id': rng.randint(1, 100), 'movie_id': rng.randint(1, 1000)})
+            ops += 1
+        except OperationalError:
+            errors += 1
+    engine.dispose()
+    results.put((role, ops, errors))
+
+
+def run(tuned, readers, writers, duration):
+    path = os.path.join(tempfile.mkdtemp(prefix='sqlite_load_'), 'load.db')
+    seed(path)
+    results = multiprocessing.Queue()
+    start_at = time.time() + 1
+    processes = [multiprocessing.Process(target=worker, args=(path, tuned, role, duration, start_at, results))
+                 for role in ['reader'] * readers + ['writer'] * writers]
+    for process in processes:
+        process.start()
+    totals = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+    for _ in processes:
+        role, ops, errors = results.get()
+        totals['reads' if role == 'reader' else 'writes'] += ops
+        totals['read_errors' if role == 'reader' else 'write_errors'] += errors
+    for process in processes:
+        process.join()
+    totals['reads_per_second'] = round(totals['reads'] / duration, 1)
+    totals['writes_per_second'] = round(totals['writes'] / duration, 1)
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5)
+    args = parser.parse_args()
+
+    report = {
+        'readers': args.readers,
+        'writers': args.writers,
+        'duration': args.duration,
+        'default': run(False, args.readers, args.writers, args.duration),
+        'tuned': run(True, args.readers, args.writers, args.duration)
+    }
+    print(json.dumps(report, indent=2))
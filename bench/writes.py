@@ -0,0 +1,127 @@
+"""
+Statements and commits per SQLiteDataManager.add_movie call.
+
+Seeds a scratch database with bench.seed, then adds movies --iterations
+times in four ways: a movie new to the catalog, a catalog movie the user
+does not have yet, a movie the user already has, and batches of new movies
+added with one bulk_add_movies call, for comparison. The report has latency
+percentiles plus the SQL statements and commits (each one a WAL append and,
+depending on PRAGMA synchronous, an fsync) per added movie.
+
+Usage:
+    python -m bench.writes [--users 1000] [--movies 10000] [--iterations 200]
+                           [--batch 50] [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.report import summarize, write_report  # noqa: E402
+from bench.seed import build_database, create_app  # noqa: E402
+from data_manager.sqlite_data_manager import SQLiteDataManager, parse_omdb_movie  # noqa: E402
+from models.models import db, Movie, UserMoviesRelationship  # noqa: E402
+from omdb.cache import normalize_title  # noqa: E402
+
+
+def omdb_response(title, director, year, rating):
+    return {'Title': title, 'Director': director, 'Year': str(year), 'imdbRating': str(rating), 'Poster': 'N/A',
+            'Response': 'True'}
+
+
+def catalog_movie(movie_id):
+    movie = db.session.execute(select(Movie.title, Movie.director, Movie.year, Movie.rating).where(
+        Movie.id == movie_id)).first()
+    return omdb_response(*movie)
+
+
+def benchmark_cases(data_manager, rng, users, movies, batch):
+    """(name, movies added per call, setup, call) entries; setup(iteration) returns the call arguments."""
+    def new_movie(iteration):
+        return rng.randint(1, users), omdb_response(f'Write Bench {iteration}', 'Bench Director', 2001, 7.1)
+
+    def catalog(_):
+        return rng.randint(1, users), catalog_movie(rng.randint(1, movies))
+
+    def linked(_):
+        user_id, movie_id = db.session.execute(select(
+            UserMoviesRelationship.user_id, UserMoviesRelationship.movie_id
+        ).limit(1).offset(rng.randint(0, 500))).first()
+        return user_id, catalog_movie(movie_id)
+
+    def new_batch(iteration):
+        movies = [parse_omdb_movie(omdb_response(f'Write Batch {iteration}-{i}', 'Bench Director', 2002, 6.4))
+                  for i in range(batch)]
+        return rng.randint(1, users), [dict(movie, title_key=normalize_title(movie['title'])) for movie in movies], ()
+
+    return [
+        ('add_movie[new]', 1, new_movie, data_manager.add_movie),
+        ('add_movie[catalog]', 1, catalog, data_manager.add_movie),
+        ('add_movie[already linked]', 1, linked, data_manager.add_movie),
+        (f'bulk_add_movies[batch of {batch}]', batch, new_batch, data_manager.bulk_add_movies),
+    ]
+
+
+def run(users, movies, iterations, batch, seed_value=1):
+    workdir = tempfile.mkdtemp(prefix='bench_writes_')
+    database_path = os.path.join(workdir, 'database.db')
+    seeded = build_database(database_path, users=users, movies=movies, seed_value=seed_value)
+
+    app = create_app(database_path)
+    counts = {'statements': 0, 'commits': 0}
+
+    def count(name):
+        def listener(*args, **kwargs):
+            counts[name] += 1
+        return listener
+
+    results = {}
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count('statements'))
+        event.listen(db.engine, 'commit', count('commits'))
+        data_manager = SQLiteDataManager(db)
+        rng = random.Random(seed_value)
+        for name, per_call, setup, call in benchmark_cases(data_manager, rng, users, movies, batch):
+            samples = []
+            statements = commits = 0
+            for iteration in range(iterations):
+                arguments = setup(iteration)
+                db.session.commit()
+                counts.update(statements=0, commits=0)
+                started = time.perf_counter()
+                call(*arguments)
+                samples.append(time.perf_counter() - started)
+                statements += counts['statements']
+                commits += counts['commits']
+                db.session.remove()
+            summary = summarize(samples)
+            summary['statements_per_movie'] = round(statements / (iterations * per_call), 2)
+            summary['commits_per_movie'] = round(commits / (iterations * per_call), 3)
+            results[name] = summary
+        db.engine.dispose()
+    return {'seed': seeded, 'methods': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=50, help='Movies per commit in the batch case.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Report path; defaults to bench/results/.')
+    args = parser.parse_args()
+
+    results = run(args.users, args.movies, args.iterations, args.batch, args.seed)
+    path = write_report('writes', vars(args), results, args.output)
+    for name, summary in results['methods'].items():
+        print(f"{name:<40} p50 {summary['p50_ms']:>8.3f} ms  p95 {summary['p95_ms']:>8.3f} ms  "
+              f"{summary['statements_per_movie']:>6} statements  {summary['commits_per_movie']:>6} commits per movie")
+    print(json.dumps({'report': path}))
@@ -0,0 +1,268 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from flask import g, has_app_context
+
+from .data_manager_interface import DataManagerInterface
+
+_MISSING = object()
+
+
+class CacheBackend(ABC):
+    """
+    Storage for cached data manager results.
+
+    Implement this on top of a shared store (Redis, memcached, ...) to share
+    cached results and invalidations between worker processes.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """Return the cached value, or _MISSING."""
+        pass
+
+    @abstractmethod
+    def set(self, key, value):
+        pass
+
+    @abstractmethod
+    def delete(self, keys):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    Process-local, size-bounded LRU cache.
+
+    Entries also expire after `ttl` seconds, which bounds how long another
+    worker process can serve a value that was invalidated elsewhere.
+    """
+
+    def __init__(self, max_size=2048, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.stats['misses'] += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every CachingDataManager in the process, so a write made through
+# one instance invalidates what the others have cached.
+default_backend = LRUCacheBackend(max_size=int(os.environ.get('DATA_CACHE_SIZE', 2048)),
+                                  ttl=float(os.environ.get('DATA_CACHE_TTL', 30)))
+
+
+class CachingDataManager(DataManagerInterface):
+    """
+    Read-through cache around a data manager.
+
+    Read results are memoized for the current request (in flask.g) and kept
+    in a process-wide backend. Every write method drops exactly the keys it
+    can have changed. Methods not defined here pass straight through.
+
+    The data manager returns immutable rows (data_manager.rows), never
+    session-bound ORM objects, so every read is safe to share between
+    requests.
+    """
+
+    def __init__(self, data_manager, backend=None):
+        self.data_manager = data_manager
+        self.backend = backend if backend is not None else default_backend
+
+    def __getattr__(self, name):
+        return getattr(self.data_manager, name)
+
+    # Cache plumbing
+
+    def _memo(self):
+        if not has_app_context():
+            return None
+        if '_data_manager_memo' not in g:
+            g._data_manager_memo = {}
+        return g._data_manager_memo
+
+    def scope_to_versions(self, versions):
+        """
+        Key the cached reads of the current request by resource versions.
+
+        http_cache.versioned calls this with the versions its ETag is built
+        from. A write made by another process (a job worker, the metadata
+        refresher, another web worker) bumps those versions in the database
+        but cannot invalidate this process's cache, so without the scope a
+        new ETag could be sent with a stale cached body. Scoped entries are
+        only reused while the versions are unchanged; the old ones age out
+        of the LRU.
+
+        Args:
+            versions (dict): Maps resource keys to (version, updated_at).
+        """
+        if has_app_context():
+            g._data_cache_scope = tuple(sorted((key, version) for key, (version, _) in versions.items()))
+
+    def _cached(self, key, loader):
+        memo = self._memo()
+        if memo is not None and key in memo:
+            return memo[key]
+        scope = g.get('_data_cache_scope') if has_app_context() else None
+        backend_key = key if scope is None else (key, scope)
+        value = self.backend.get(backend_key)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.backend.set(backend_key, value)
+        if memo is not None:
+            memo[key] = value
+        return value
+
+    def _invalidate(self, *keys):
+        self.backend.delete(keys)
+        memo = self._memo()
+        if memo is not None:
+            for key in keys:
+                memo.pop(key, None)
+
+    def _invalidate_users(self, user_ids):
+        keys = []
+        for user_id in user_ids:
+            keys += [f'user:{user_id}', f'user_movies:{user_id}', f'user_reviews:{user_id}']
+        self._invalidate(*keys)
+
+    def _invalidate_movie(self, movie_id, user_ids=None):
+        if user_ids is None:
+            user_ids = self.data_manager.get_movie_user_ids(movie_id)
+        self._invalidate(f'movie_reviews:{movie_id}')
+        self._invalidate_users(user_ids)
+
+    # Reads
+
+    def get_all_users(self):
+        return self._cached('users', self.data_manager.get_all_users)
+
+    def get_user_by_id(self, user_id):
+        return self._cached(f'user:{user_id}', lambda: self.data_manager.get_user_by_id(user_id))
+
+    def get_user_movies(self, user_id):
+        return self._cached(f'user_movies:{user_id}', lambda: self.data_manager.get_user_movies(user_id))
+
+    def get_user_reviews(self, user_id):
+        return self._cached(f'user_reviews:{user_id}', lambda: self.data_manager.get_user_reviews(user_id))
+
+    def get_movie_reviews(self, movie_id):
+        return self._cached(f'movie_reviews:{movie_id}', lambda: self.data_manager.get_movie_reviews(movie_id))
+
+    # Writes
+
+    def add_user(self, user_name, email):
+        result = self.data_manager.add_user(user_name, email)
+        self._invalidate('users')
+        return result
+
+    def create_user_if_absent(self, user_name, email):
+        result = self.data_manager.create_user_if_absent(user_name, email)
+        if result is not None:
+            self._invalidate('users')
+        return result
+
+    def add_movie(self, user_id, movie_data):
+        result = self.data_manager.add_movie(user_id, movie_data)
+        self._invalidate_users([user_id])
+        return result
+
+    def add_existing_movie(self, user_id, movie_id):
+        result = self.data_manager.add_existing_movie(user_id, movie_id)
+        self._invalidate_users([user_id])
+        return result
+
+    def add_pending_movie(self, user_id, title):
+        result = self.data_manager.add_pending_movie(user_id, title)
+        self._invalidate_users([user_id])
+        return result
+
+    def bulk_add_movies(self, user_id, new_movies, existing_movie_ids):
+        result = self.data_manager.bulk_add_movies(user_id, new_movies, existing_movie_ids)
+        self._invalidate_users([user_id])
+        return result
+
+    def mark_movie_pending(self, movie_id):
+        self.data_manager.mark_movie_pending(movie_id)
+        self._invalidate_movie(movie_id)
+
+    def complete_pending_movie(self, movie_id, movie_data):
+        # Links may move to another movie row, so collect the users first
+        user_ids = self.data_manager.get_movie_user_ids(movie_id)
+        result = self.data_manager.complete_pending_movie(movie_id, movie_data)
+        self._invalidate_movie(movie_id, user_ids)
+        if result is not None and result.id != movie_id:
+            self._invalidate(f'movie_reviews:{result.id}')
+        return result
+
+    def fail_pending_movie(self, movie_id):
+        self.data_manager.fail_pending_movie(movie_id)
+        self._invalidate_movie(movie_id)
+
+    def set_movie_poster_hashes(self, poster_hashes):
+        self.data_manager.set_movie_poster_hashes(poster_hashes)
+        for movie_id in poster_hashes:
+            self._invalidate_movie(movie_id)
+
+    def refresh_movie(self, movie_id, movie_data):
+        result = self.data_manager.refresh_movie(movie_id, movie_data)
+        self._invalidate_movie(movie_id)
+        return result
+
+    def apply_movie_refreshes(self, changes, fetched_ids, checkpoint=None):
+        self.data_manager.apply_movie_refreshes(changes, fetched_ids, checkpoint)
+        for movie_id in changes:
+            self._invalidate_movie(movie_id)
+
+    def update_movie(self, user_id, movie_id, movie_data):
+        result = self.data_manager.update_movie(user_id, movie_id, movie_data)
+        # The movie row is shared, so every library holding it changes
+        self._invalidate_movie(movie_id)
+        return result
+
+    def delete_movie(self, user_id, movie_id):
+        result = self.data_manager.delete_movie(user_id, movie_id)
+        self._invalidate_users([user_id])
+        return result
+
+    def add_review(self, user_id, movie_id, review_text, rating):
+        result = self.data_manager.add_review(user_id, movie_id, review_text, rating)
+        self._invalidate(f'movie_reviews:{movie_id}', f'user_reviews:{user_id}')
+        return result
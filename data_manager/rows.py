@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+
+
+class Row:
+    """
+    Immutable result row returned by the read methods of SQLiteDataManager.
+
+    Rows are frozen slots dataclasses: they hold only the selected columns,
+    cannot lazy-load anything during template rendering and are safe to
+    share between requests through the cache. They also read like the dicts
+    the data manager used to return (`row['title']`, `dict(row)`), and
+    Flask serializes them as JSON objects.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self.__match_args__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__match_args__
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__match_args__}
+
+
+@dataclass(frozen=True, slots=True)
+class UserRow(Row):
+    id: int
+    name: str
+    email: str
+
+
+@dataclass(frozen=True, slots=True)
+class MovieRow(Row):
+    id: int
+    title: str
+    director: str
+    year: int
+    rating: float
+    poster: str
+    poster_hash: str
+    status: str
+
+
+@dataclass(frozen=True, slots=True)
+class LibraryMovieRow(Row):
+    """A movie as listed in a user's library, with review aggregates."""
+    id: int
+    title: str
+    director: str
+    year: int
+    rating: float
+    poster: str
+    poster_hash: str
+    status: str
+    added_at: str
+    review_count: int
+    user_rating: float
+
+
+@dataclass(frozen=True, slots=True)
+class ReviewRow(Row):
+    id: int
+    user_id: int
+    movie_id: int
+    review_text: str
+    rating: float
+
+
+@dataclass(frozen=True, slots=True)
+class ReviewListingRow(Row):
+    """A review with the names shown next to it in the global review listing."""
+    id: int
+    user_name: str
+    movie_title: str
+    review_text: str
+    rating: float
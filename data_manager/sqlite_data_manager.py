@@ -1,206 +1,970 @@
+import base64
+import json
+import re
+from datetime import datetime
+from difflib import SequenceMatcher
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import delete, func, insert, or_, select, text, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from .data_manager_interface import DataManagerInterface
-from models.models import User, Movie, UserMoviesRelationship, Review
+from .rows import LibraryMovieRow, MovieRow, ReviewListingRow, ReviewRow, UserRow
+from models.models import (User, Movie, UserMoviesRelationship, Review, MovieStats, RefreshCheckpoint,
+                           ResourceVersion, utcnow)
+from models.stats import empty_histogram, rating_bucket, rebuild_movie_stats
+from omdb.cache import normalize_title
 # from sqlalchemy.exc import IntegrityError
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CLAUSE_CHUNK = 500
+# Minimum edit similarity (difflib ratio) for a fuzzy title match
+FUZZY_MIN_SIMILARITY = 0.65
+# Fuzzy candidates fetched per requested result
+FUZZY_CANDIDATES = 5
+# A typo in a title this short can leave it no trigram in common with the
+# query ('haet' / 'heat'), so such queries also look at titles of about the
+# same length that start with the same letter
+FUZZY_SHORT_QUERY_LENGTH = 8
+# Rows fetched from the cursor at a time while streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+
+# Columns selected for each row type, in the row's field order
+USER_COLUMNS = (User.id, User.name, User.email)
+MOVIE_COLUMNS = (Movie.id, Movie.title, Movie.director, Movie.year, Movie.rating, Movie.poster, Movie.poster_hash,
+                 Movie.status)
+REVIEW_COLUMNS = (Review.id, Review.user_id, Review.movie_id, Review.review_text, Review.rating)
+
+# Fields the batch reads can return (sparse fieldsets), mapped to their column
+USER_FIELDS = {column.key: column for column in USER_COLUMNS}
+MOVIE_FIELDS = {column.key: column for column in (*MOVIE_COLUMNS, Movie.imdb_id)}
+LIBRARY_FIELDS = dict(MOVIE_FIELDS, added_at=UserMoviesRelationship.added_at)
+REVIEW_FIELDS = {column.key: column for column in REVIEW_COLUMNS}
+MOVIE_STATS_FIELDS = {'review_count': MovieStats.review_count, 'rating_mean': MovieStats.rating_mean}
+
+# Sort keys accepted by get_user_movies_page, mapped to their column
+MOVIE_SORTS = {
+    'title': Movie.title_key,
+    'year': Movie.year,
+    'rating': Movie.rating,
+    'added': UserMoviesRelationship.added_at
+}
+
+
+def encode_cursor(value, movie_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, movie_id]).encode()).decode()
+
+
+def decode_cursor(cursor, sort):
+    """Return the (sort value, movie id) pair in a cursor, or None if it is invalid."""
+    try:
+        value, movie_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort == 'added':
+            value = datetime.fromisoformat(value)
+        return value, int(movie_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def search_terms(query):
+    """Split a search query into lower-cased word tokens."""
+    return re.findall(r'\w+', (query or '').casefold())
+
+
+def trigrams(text):
+    text = ' '.join(search_terms(text))
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def fuzzy_similarity(terms, title):
+    """Best edit similarity between the query and any same-length run of words in the title."""
+    query = ' '.join(terms)
+    words = search_terms(title)
+    spans = [' '.join(words[i:i + len(terms)]) for i in range(max(1, len(words) - len(terms) + 1))]
+    return max(SequenceMatcher(None, query, span).ratio() for span in spans)
+
+
+def parse_omdb_movie(movie_data):
+    """
+    Extract the Movie columns from an OMDb API response.
+
+    OMDb reports missing values as 'N/A' and series years as ranges
+    ('2010–2013'); those become 0 / the first year.
+    """
+    year = (movie_data.get('Year') or '')[:4]
+    rating = movie_data.get('imdbRating')
+    imdb_id = movie_data.get('imdbID')
+    return {
+        'title': movie_data.get('Title'),
+        'director': movie_data.get('Director') or '',
+        'year': int(year) if year.isdigit() else 0,
+        'rating': float(rating) if rating and rating != 'N/A' else 0.0,
+        'poster': movie_data.get('Poster'),
+        'imdb_id': imdb_id if imdb_id and imdb_id != 'N/A' else None
+    }
+
+
+def movie_changes(movie, movie_data):
+    """
+    Columns of a catalog movie that differ from a fresh OMDb response.
+
+    Args:
+        movie (Mapping): Current values of the columns parse_omdb_movie returns.
+        movie_data (dict): OMDb API response.
+
+    Returns:
+        dict: New values of the changed columns only. A new title also sets
+        title_key and a new poster URL clears poster_hash; a known imdb_id is
+        never replaced by a missing one.
+    """
+    changes = {name: value for name, value in parse_omdb_movie(movie_data).items()
+               if value != movie[name] and not (name == 'imdb_id' and value is None)}
+    if 'title' in changes:
+        changes['title_key'] = normalize_title(changes['title'])
+    if 'poster' in changes:
+        changes['poster_hash'] = None
+    return changes
+
 
 class SQLiteDataManager(DataManagerInterface):
     def __init__(self, db):
         self.db = db
-    
+
+    def _bump_versions(self, *keys):
+        # Runs in the caller's transaction, so a version only moves if the write commits
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        table = ResourceVersion.__table__
+        statement = sqlite_insert(table)
+        statement = statement.on_conflict_do_update(index_elements=[table.c.key], set_={
+            'version': table.c.version + 1, 'updated_at': statement.excluded.updated_at
+        })
+        now = utcnow()
+        self.db.session.execute(statement, [{'key': key, 'version': 1, 'updated_at': now} for key in keys])
+
+    def _library_keys(self, movie_id):
+        # Every library listing a movie shows its details and review stats
+        return [f'user_movies:{user_id}' for user_id in self.get_movie_user_ids(movie_id)]
+
+    def get_resource_versions(self, keys):
+        """
+        Look up the change counters of the given resources.
+
+        Returns:
+            dict: Maps each key that has been written to (version, updated_at).
+        """
+        rows = self.db.session.query(ResourceVersion.key, ResourceVersion.version, ResourceVersion.updated_at).filter(
+            ResourceVersion.key.in_(list(keys))
+        ).all()
+        return {row.key: (row.version, row.updated_at) for row in rows}
+
+    # Reads select only the columns they return and build immutable rows
+    # (data_manager.rows) instead of hydrating identity-mapped ORM entities.
+
+    def _user_exists(self, user_id):
+        return self.db.session.execute(select(User.id).where(User.id == user_id)).first() is not None
 
     def get_all_users(self):
-        users = User.query.all()
-        return [{'id': user.id, 'name': user.name, 'email': user.email} for user in users]
+        return [UserRow(*row) for row in self.db.session.execute(select(*USER_COLUMNS))]
 
-    
     def get_user_by_id(self, user_id):
-        user = User.query.get(user_id)
-        if user:
-            return user
-        return None
-    
+        row = self.db.session.execute(select(*USER_COLUMNS).where(User.id == user_id)).first()
+        return UserRow(*row) if row else None
+
     def get_movie_by_id(self, user_id, movie_id):
-        movies = self.get_user_movies(user_id)
-        for movie in movies:
-            if movie['id'] == movie_id:
-                return movie
-        return None
-    
+        return self.get_user_movie(user_id, movie_id)
+
     def get_user_movie(self, user_id, movie_id):
-        user = User.query.get(user_id)
-        if user:
-            movie = Movie.query.get(movie_id)
-            if movie and movie in user.movies:
-                return {
-                    'id': movie.id,
-                    'title': movie.title,
-                    'director': movie.director,
-                    'year': movie.year,
-                    'rating': movie.rating
-                }
-        return None
-        
-       
-    def get_user_movies(self, user_id):
-        user = User.query.get(user_id)
-        if user:
-            movies = Movie.query.join(UserMoviesRelationship, (UserMoviesRelationship.movie_id == Movie.id)).filter_by(
-                user_id=user_id).all()
+        # A single primary-key join: the link row proves both that the user
+        # exists and that the movie is in their library.
+        row = self.db.session.execute(
+            select(*MOVIE_COLUMNS).join(UserMoviesRelationship, UserMoviesRelationship.movie_id == Movie.id).where(
+                UserMoviesRelationship.user_id == user_id, Movie.id == movie_id
+            )
+        ).first()
+        return MovieRow(*row) if row else None
 
-            return [{'id': movie.id, 'title': movie.title, 'director': movie.director,
-                 'year': movie.year, 'rating': movie.rating, 'poster': movie.poster} for movie in movies]
-        return []
+    def get_user_movies(self, user_id):
+        # An unknown user simply has no link rows, so no separate user lookup
+        rows = self.db.session.execute(
+            select(*MOVIE_COLUMNS).join(UserMoviesRelationship, UserMoviesRelationship.movie_id == Movie.id).where(
+                UserMoviesRelationship.user_id == user_id
+            )
+        )
+        return [MovieRow(*row) for row in rows]
     
+    def iter_user_movies(self, user_id, batch_size=EXPORT_BATCH_SIZE):
+        """
+        Yield a user's library one movie dict at a time, for exports.
+
+        Rows are streamed from the cursor `batch_size` at a time, so memory
+        use does not grow with the size of the library.
+        """
+        statement = select(
+            Movie.id, Movie.title, Movie.director, Movie.year, Movie.rating, Movie.poster, Movie.status,
+            UserMoviesRelationship.added_at
+        ).join(UserMoviesRelationship, UserMoviesRelationship.movie_id == Movie.id).where(
+            UserMoviesRelationship.user_id == user_id
+        ).order_by(Movie.id).execution_options(yield_per=batch_size)
+        for row in self.db.session.execute(statement):
+            yield {'id': row.id, 'title': row.title, 'director': row.director, 'year': row.year,
+                   'rating': row.rating, 'poster': row.poster, 'status': row.status,
+                   'added_at': row.added_at.isoformat() if row.added_at else None}
+
+    def get_user_movies_page(self, user_id, sort='title', order='asc', after=None, before=None,
+                             limit=DEFAULT_PAGE_SIZE, year_from=None, year_to=None, min_rating=None, director=None):
+        """
+        Return one page of a user's movies, sorted and filtered in SQL.
+
+        Pages are keyset-paginated on (sort column, movie id); `after` and
+        `before` take the opaque cursors returned with the previous page.
+
+        Returns:
+            dict: 'movies', 'total' (matching the filters), 'next_cursor',
+            'prev_cursor', 'sort' and 'order', or None if the user does not exist.
+        """
+        if not self._user_exists(user_id):
+            return None
+        sort = sort if sort in MOVIE_SORTS else 'title'
+        descending = order == 'desc'
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sort_column = MOVIE_SORTS[sort]
+
+        query = self.db.session.query(
+            *MOVIE_COLUMNS, UserMoviesRelationship.added_at, MovieStats.review_count, MovieStats.rating_mean,
+            sort_column.label('sort_value')
+        ).join(UserMoviesRelationship, UserMoviesRelationship.movie_id == Movie.id).outerjoin(
+            MovieStats, MovieStats.movie_id == Movie.id
+        ).filter(
+            UserMoviesRelationship.user_id == user_id
+        )
+        if year_from is not None:
+            query = query.filter(Movie.year >= year_from)
+        if year_to is not None:
+            query = query.filter(Movie.year <= year_to)
+        if min_rating is not None:
+            query = query.filter(Movie.rating >= min_rating)
+        if director:
+            query = query.filter(Movie.director.contains(director, autoescape=True))
+
+        total = query.order_by(None).count()
+
+        # Walking backwards from `before` means flipping the order and
+        # reversing the rows afterwards.
+        cursor = decode_cursor(before, sort) if before else None
+        backwards = cursor is not None
+        if not backwards and after:
+            cursor = decode_cursor(after, sort)
+        if cursor is not None:
+            key = tuple_(sort_column, Movie.id)
+            query = query.filter(key < tuple_(*cursor) if descending != backwards else key > tuple_(*cursor))
+        if descending != backwards:
+            query = query.order_by(sort_column.desc(), Movie.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Movie.id.asc())
+
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+
+        movies = [LibraryMovieRow(*row[:len(MOVIE_COLUMNS)], row.added_at.isoformat() if row.added_at else None,
+                                  row.review_count or 0, row.rating_mean) for row in rows]
+
+        next_cursor = prev_cursor = None
+        if rows:
+            if backwards or has_more:
+                next_cursor = encode_cursor(rows[-1].sort_value, rows[-1].id)
+            if (after and not backwards) or (backwards and has_more):
+                prev_cursor = encode_cursor(rows[0].sort_value, rows[0].id)
+
+        return {
+            'movies': movies,
+            'total': total,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'sort': sort,
+            'order': 'desc' if descending else 'asc'
+        }
+
+    def search(self, query, limit=DEFAULT_PAGE_SIZE):
+        """
+        Full-text search over catalog movies (title, director) and reviews.
+
+        Every word is matched as a prefix, so partial input finds results
+        while typing. When no movie matches, titles are matched again on
+        edit similarity, which tolerates typos ('matirx' finds 'The Matrix').
+        Those candidates share a trigram or a word's first two letters with
+        the query; short queries also consider titles of about their length
+        that start with the same letter ('haet' finds 'Heat'), so a typo in
+        the first letter of a short title is not found.
+
+        Returns:
+            dict: Ranked 'movies' and 'reviews', and whether the movie
+            results came from the 'fuzzy' fallback.
+        """
+        terms = search_terms(query)
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        if not terms:
+            return {'movies': [], 'reviews': [], 'fuzzy': False}
+        match = ' '.join(f'"{term}"*' for term in terms)
+
+        movie_rows = self.db.session.execute(text(
+            'SELECT movie.id, movie.title, movie.director, movie.year, movie.rating, movie.poster '
+            'FROM movie_fts JOIN movie ON movie.id = movie_fts.rowid '
+            "WHERE movie_fts MATCH :match AND movie.status = 'ready' "
+            'ORDER BY bm25(movie_fts, 10.0, 1.0) LIMIT :limit'
+        ), {'match': match, 'limit': limit}).mappings().all()
+
+        fuzzy = False
+        if not movie_rows:
+            # Candidates share a trigram or the first two letters of a word
+            # with the query, or for a short query its first letter and about
+            # its length; they are then ranked by edit similarity.
+            candidates = {}
+            query_trigrams = trigrams(query)
+            if query_trigrams:
+                rows = self.db.session.execute(text(
+                    'SELECT movie.id, movie.title, movie.director, movie.year, movie.rating, movie.poster '
+                    'FROM movie_trigram_fts JOIN movie ON movie.id = movie_trigram_fts.rowid '
+                    "WHERE movie_trigram_fts MATCH :match AND movie.status = 'ready' "
+                    'ORDER BY bm25(movie_trigram_fts) LIMIT :limit'
+                ), {'match': ' OR '.join(f'"{gram}"' for gram in query_trigrams),
+                    'limit': limit * FUZZY_CANDIDATES}).mappings().all()
+                candidates.update((row['id'], row) for row in rows)
+            rows = self.db.session.execute(text(
+                'SELECT movie.id, movie.title, movie.director, movie.year, movie.rating, movie.poster '
+                'FROM movie_fts JOIN movie ON movie.id = movie_fts.rowid '
+                "WHERE movie_fts MATCH :match AND movie.status = 'ready' LIMIT :limit"
+            ), {'match': 'title : (' + ' OR '.join(f'"{term[:2]}"*' for term in terms) + ')',
+                'limit': limit * FUZZY_CANDIDATES}).mappings().all()
+            candidates.update((row['id'], row) for row in rows)
+            query_key = ' '.join(terms)
+            if len(query_key) <= FUZZY_SHORT_QUERY_LENGTH:
+                # A range on ix_movie_title_key
+                rows = self.db.session.execute(text(
+                    'SELECT movie.id, movie.title, movie.director, movie.year, movie.rating, movie.poster '
+                    'FROM movie WHERE movie.title_key >= :first AND movie.title_key < :after_first '
+                    'AND length(movie.title_key) BETWEEN :shortest AND :longest '
+                    "AND movie.status = 'ready' LIMIT :limit"
+                ), {'first': query_key[0], 'after_first': chr(ord(query_key[0]) + 1),
+                    'shortest': len(query_key) - 1, 'longest': len(query_key) + 1,
+                    'limit': limit * FUZZY_CANDIDATES}).mappings().all()
+                candidates.update((row['id'], row) for row in rows)
+
+            scored = sorted(((fuzzy_similarity(terms, row['title']), row) for row in candidates.values()),
+                            key=lambda pair: -pair[0])
+            movie_rows = [row for score, row in scored if score >= FUZZY_MIN_SIMILARITY][:limit]
+            fuzzy = bool(movie_rows)
+
+        review_rows = self.db.session.execute(text(
+            'SELECT review.id, review.movie_id, review.rating, movie.title AS movie_title, user.name AS user_name, '
+            "snippet(review_fts, 0, '[', ']', '...', 16) AS snippet "
+            'FROM review_fts JOIN review ON review.id = review_fts.rowid '
+            'JOIN movie ON movie.id = review.movie_id JOIN user ON user.id = review.user_id '
+            'WHERE review_fts MATCH :match ORDER BY bm25(review_fts) LIMIT :limit'
+        ), {'match': match, 'limit': limit}).mappings().all()
+
+        return {
+            'movies': [dict(row) for row in movie_rows],
+            'reviews': [dict(row) for row in review_rows],
+            'fuzzy': fuzzy
+        }
+
+    def get_user_movie_by_title(self, user_id, title):
+        """
+        Return the movie in a user's library with the same normalized title, or None.
+
+        The title_key index finds the few catalog movies with that title and
+        an EXISTS probe on the link's primary key keeps the user's, so the
+        cost does not grow with the size of the library.
+        """
+        in_library = select(UserMoviesRelationship.movie_id).where(
+            UserMoviesRelationship.user_id == user_id, UserMoviesRelationship.movie_id == Movie.id
+        ).exists()
+        row = self.db.session.execute(
+            select(*MOVIE_COLUMNS).where(Movie.title_key == normalize_title(title), in_library).limit(1)
+        ).first()
+        return MovieRow(*row) if row else None
+
     def get_user_by_name(self, user_name):
-        user = User.query.filter_by(name=user_name).first()
-        return user
-        
+        row = self.db.session.execute(select(*USER_COLUMNS).where(User.name == user_name)).first()
+        return UserRow(*row) if row else None
+
+    def get_movie_by_title(self, title):
+        # Only fetched movies: a pending placeholder has no details yet and may
+        # never get any. A second user adding the title meanwhile gets a lookup
+        # of their own, which complete_pending_movie merges into the first.
+        row = self.db.session.execute(select(*MOVIE_COLUMNS).where(
+            Movie.title_key == normalize_title(title), Movie.status == 'ready'
+        ).limit(1)).first()
+        return MovieRow(*row) if row else None
+
+    def create_user_if_absent(self, user_name, email):
+        # The unique name/email indexes make this a single atomic statement:
+        # concurrent signups for the same name or email cannot both succeed.
+        statement = sqlite_insert(User).values(name=user_name, email=email).on_conflict_do_nothing()
+        user_id = self.db.session.execute(statement.returning(User.id)).scalar()
+        if user_id is not None:
+            self._bump_versions('users')
+        self.db.session.commit()
+        if user_id is None:
+            return None
+        return {'id': user_id, 'name': user_name, 'email': email}
 
     def add_user(self, user_name, email):
        new_user = User(name=user_name, email=email)
        self.db.session.add(new_user)
+       self._bump_versions('users')
        self.db.session.commit()
        return {'id': new_user.id, 'name': new_user.name, 'email': new_user.email}
 
+    def _link_movie(self, user_id, movie_id):
+        # INSERT OR IGNORE on the (user_id, movie_id) primary key: an existing
+        # or concurrently inserted link is left alone instead of duplicated.
+        statement = sqlite_insert(UserMoviesRelationship).values(user_id=user_id, movie_id=movie_id)
+        return self.db.session.execute(statement.on_conflict_do_nothing()).rowcount > 0
+
     def add_movie(self, user_id, movie_data):
-        user = self.get_user_by_id(user_id)
+        """
+        Add a movie from an OMDb response to a user's library as one unit of work.
 
-        if user:
-            # Extract relevant movie data from the API response
-            title = movie_data.get('Title')
-            director = movie_data.get('Director')
-            year = int(movie_data.get('Year'))
-            rating = float(movie_data.get('imdbRating'))
-            poster = movie_data.get('Poster')
-
-            # Check if the movie already exists in the database
-            existing_movie = Movie.query.filter_by(title=title, director=director, year=year, rating=rating).first()
-
-            if existing_movie:
-                # Check if the relationship already exists
-                if existing_movie not in user.movies:
-                    # Add the existing movie to the user's list
-                    user.movies.append(existing_movie)
-
-                # Create a new relationship if it doesn't exist
-                if UserMoviesRelationship.query.filter_by(user_id=user.id, movie_id=existing_movie.id).first() is None:
-                    relationship = UserMoviesRelationship(user_id=user.id, movie_id=existing_movie.id)
-                    self.db.session.add(relationship)
+        An identical catalog movie is reused, otherwise one is inserted; the
+        link is then inserted unless it exists. Both happen in one transaction
+        with a single commit; bulk_add_movies adds many movies per commit.
 
-                self.db.session.commit()
+        Returns:
+            MovieRow: The catalog movie, {'error': ...} if the user already has
+            a different movie with this title, or None if the user does not exist.
+        """
+        if not self._user_exists(user_id):
+            return None
 
-                # Return the existing movie
-                return existing_movie
-            else:
-                # Check if the relationship already exists
-                if Movie.query.filter(Movie.users.any(id=user_id)).filter_by(title=title).first():
-                    return {'error': 'Movie already added to the user.'}
-                
-                # Create a new Movie instance
-                new_movie = Movie(title=title, director=director, year=year, rating=rating, poster=poster)
-
-                # Add the new movie to the user's list
-                user.movies.append(new_movie)
-
-                # Add the new movie to the database
-                self.db.session.add(new_movie)
-                self.db.session.commit()
+        fields = parse_omdb_movie(movie_data)
+        movie = self.db.session.execute(select(*MOVIE_COLUMNS).where(
+            Movie.title == fields['title'], Movie.director == fields['director'], Movie.year == fields['year'],
+            Movie.rating == fields['rating']
+        ).limit(1)).first()
 
-                # Create a new relationship
-                if UserMoviesRelationship.query.filter_by(user_id=user.id, movie_id=new_movie.id).first() is None:
-                    relationship = UserMoviesRelationship(user_id=user.id, movie_id=new_movie.id)
-                    self.db.session.add(relationship)
+        new_movie = movie is None
+        if new_movie:
+            same_title = self.db.session.execute(select(Movie.id).join(
+                UserMoviesRelationship, UserMoviesRelationship.movie_id == Movie.id
+            ).where(UserMoviesRelationship.user_id == user_id, Movie.title == fields['title']).limit(1)).first()
+            if same_title:
+                return {'error': 'Movie already added to the user.'}
+            movie = self.db.session.execute(insert(Movie).values(
+                **fields, title_key=normalize_title(fields['title']), fetched_at=utcnow()
+            ).returning(*MOVIE_COLUMNS)).first()
 
-                self.db.session.commit()
+        if self._link_movie(user_id, movie.id) or new_movie:
+            self._bump_versions(f'user_movies:{user_id}', *(['catalog'] if new_movie else []))
+        self.db.session.commit()
+        return MovieRow(*movie)
 
-                return new_movie
-        else:
+    def add_existing_movie(self, user_id, movie_id):
+        row = self.db.session.execute(select(*MOVIE_COLUMNS).where(Movie.id == movie_id)).first()
+        if row is None or not self._user_exists(user_id):
             return None
-        
+        if self._link_movie(user_id, movie_id):
+            self._bump_versions(f'user_movies:{user_id}')
+            self.db.session.commit()
+        return MovieRow(*row)
+
+    def get_movies_by_ids(self, movie_ids):
+        """Return {movie_id: MovieRow} for those of the given ids that are ready catalog movies."""
+        movie_ids = list(movie_ids)
+        movies = {}
+        for start in range(0, len(movie_ids), IN_CLAUSE_CHUNK):
+            rows = self.db.session.execute(select(*MOVIE_COLUMNS).where(
+                Movie.id.in_(movie_ids[start:start + IN_CLAUSE_CHUNK]), Movie.status == 'ready'
+            ))
+            movies.update((row.id, MovieRow(*row)) for row in rows)
+        return movies
+
+    def _rows_in(self, statement, column, ids):
+        # One IN (...) query per IN_CLAUSE_CHUNK ids, however many rows each id has
+        for start in range(0, len(ids), IN_CLAUSE_CHUNK):
+            yield from self.db.session.execute(statement.where(column.in_(ids[start:start + IN_CLAUSE_CHUNK])))
+
+    def _group_rows_in(self, owners, key, statement, column, ids):
+        # Attach the rows of each id to its owner dict as a list under `key`
+        for owner in owners.values():
+            owner[key] = []
+        for row in self._rows_in(statement, column, ids):
+            values = dict(row._mapping)
+            owners[values.pop('owner_id')][key].append(values)
+
+    def get_users_batch(self, user_ids, fields=None, include=(), movie_fields=None, review_fields=None):
+        """
+        Look up many users, optionally with their libraries and reviews, in a fixed number of queries.
+
+        Each entity type costs one IN (...) query per IN_CLAUSE_CHUNK ids, so
+        the query count does not grow with the number of users or movies.
+        Only the requested columns are selected.
+
+        Args:
+            user_ids (iterable): User IDs.
+            fields (iterable): USER_FIELDS to return, all by default; 'id' is always returned.
+            include (iterable): 'movies' and/or 'reviews' to attach to each user.
+            movie_fields (iterable): LIBRARY_FIELDS of the attached movies, all by default.
+            review_fields (iterable): REVIEW_FIELDS of the attached reviews, all by default.
+
+        Returns:
+            dict: Maps each user ID that exists to a dict of its fields.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        columns = [USER_FIELDS[name] for name in dict.fromkeys(['id', *(fields or USER_FIELDS)])]
+        users = {row.id: dict(row._mapping) for row in self._rows_in(select(*columns), User.id, user_ids)}
+        found_ids = list(users)
+        if 'movies' in include:
+            columns = [LIBRARY_FIELDS[name] for name in dict.fromkeys(['id', *(movie_fields or LIBRARY_FIELDS)])]
+            statement = select(UserMoviesRelationship.user_id.label('owner_id'), *columns).join(
+                Movie, Movie.id == UserMoviesRelationship.movie_id
+            ).order_by(Movie.title_key, Movie.id)
+            self._group_rows_in(users, 'movies', statement, UserMoviesRelationship.user_id, found_ids)
+            # ISO 8601, like the library pages and the export
+            for user in users.values():
+                for movie in user['movies']:
+                    if movie.get('added_at') is not None:
+                        movie['added_at'] = movie['added_at'].isoformat()
+        if 'reviews' in include:
+            columns = [REVIEW_FIELDS[name] for name in dict.fromkeys(['id', *(review_fields or REVIEW_FIELDS)])]
+            statement = select(Review.user_id.label('owner_id'), *columns).order_by(Review.id)
+            self._group_rows_in(users, 'reviews', statement, Review.user_id, found_ids)
+        return users
+
+    def get_movies_batch(self, movie_ids, fields=None, include=(), review_fields=None):
+        """
+        Look up many catalog movies, optionally with review stats and reviews, in a fixed number of queries.
+
+        Like get_users_batch. Include 'stats' to add review_count and
+        rating_mean to each movie (from the same query), and 'reviews' to
+        attach its reviews.
+
+        Returns:
+            dict: Maps each movie ID that exists to a dict of its fields.
+        """
+        movie_ids = list(dict.fromkeys(movie_ids))
+        columns = [MOVIE_FIELDS[name] for name in dict.fromkeys(['id', *(fields or MOVIE_FIELDS)])]
+        statement = select(*columns)
+        if 'stats' in include:
+            statement = select(*columns, *MOVIE_STATS_FIELDS.values()).select_from(Movie).outerjoin(
+                MovieStats, MovieStats.movie_id == Movie.id)
+        movies = {}
+        for row in self._rows_in(statement, Movie.id, movie_ids):
+            movie = movies[row.id] = dict(row._mapping)
+            if 'stats' in include:
+                movie['review_count'] = movie['review_count'] or 0
+        if 'reviews' in include:
+            columns = [REVIEW_FIELDS[name] for name in dict.fromkeys(['id', *(review_fields or REVIEW_FIELDS)])]
+            statement = select(Review.movie_id.label('owner_id'), *columns).order_by(Review.id)
+            self._group_rows_in(movies, 'reviews', statement, Review.movie_id, list(movies))
+        return movies
+
+    def get_movie_status(self, movie_id):
+        row = self.db.session.execute(select(
+            Movie.id, Movie.title, Movie.status, Movie.fetched_at, Movie.imdb_id
+        ).where(Movie.id == movie_id)).first()
+        if row:
+            return dict(row._mapping)
+        return None
+
+    def get_stale_movie_ids(self, fetched_before, after_id=0, limit=DEFAULT_PAGE_SIZE):
+        """Return the ids of ready movies whose OMDb details were last fetched before `fetched_before`, or never."""
+        rows = self.db.session.execute(select(Movie.id).where(
+            Movie.id > after_id, Movie.status == 'ready',
+            or_(Movie.fetched_at.is_(None), Movie.fetched_at < fetched_before)
+        ).order_by(Movie.id).limit(limit))
+        return [movie_id for movie_id, in rows]
+
+    def get_stale_movies(self, fetched_before, after_id=0, limit=DEFAULT_PAGE_SIZE):
+        """Like get_stale_movie_ids, but return dicts of the id and the columns OMDb provides."""
+        rows = self.db.session.execute(select(
+            Movie.id, Movie.imdb_id, Movie.title, Movie.director, Movie.year, Movie.rating, Movie.poster
+        ).where(
+            Movie.id > after_id, Movie.status == 'ready',
+            or_(Movie.fetched_at.is_(None), Movie.fetched_at < fetched_before)
+        ).order_by(Movie.id).limit(limit))
+        return [dict(row._mapping) for row in rows]
+
+    def refresh_movie(self, movie_id, movie_data):
+        """
+        Store re-fetched OMDb details of a catalog movie.
+
+        Cache versions only move if a displayed column changed; a new poster
+        URL also drops the cached poster.
+
+        Returns:
+            MovieRow: The updated movie, or None if it does not exist.
+        """
+        movie = self.db.session.execute(select(*MOVIE_COLUMNS, Movie.imdb_id).where(Movie.id == movie_id)).first()
+        if movie is None:
+            return None
+        changes = movie_changes(movie._mapping, movie_data)
+        movie = self.db.session.execute(update(Movie).where(Movie.id == movie_id).values(
+            **changes, fetched_at=utcnow()
+        ).returning(*MOVIE_COLUMNS)).first()
+        if changes:
+            self._bump_versions(*self._refreshed_movie_keys({movie_id: changes}))
+        self.db.session.commit()
+        return MovieRow(*movie)
+
+    def _refreshed_movie_keys(self, changes):
+        # Catalog movie details show in every library holding them, and
+        # titles also appear in review listings
+        movie_ids = list(changes)
+        keys = ['catalog', *(['reviews'] if any('title' in values for values in changes.values()) else []),
+                *(f'movie:{movie_id}' for movie_id in movie_ids)]
+        for start in range(0, len(movie_ids), IN_CLAUSE_CHUNK):
+            rows = self.db.session.execute(select(UserMoviesRelationship.user_id).where(
+                UserMoviesRelationship.movie_id.in_(movie_ids[start:start + IN_CLAUSE_CHUNK])
+            ).distinct())
+            keys += [f'user_movies:{user_id}' for user_id, in rows]
+        return keys
+
+    def apply_movie_refreshes(self, changes, fetched_ids, checkpoint=None):
+        """
+        Store one batch of a metadata refresh in a single transaction.
+
+        Only the movies in `changes` are rewritten, with one bulk UPDATE, and
+        only their cache versions move. The other fetched movies just get a
+        new fetched_at. The checkpoint commits with the batch, so a resumed
+        refresh never skips or repeats a stored batch.
+
+        Args:
+            changes (dict): Maps movie IDs to their changed columns (see movie_changes).
+            fetched_ids (iterable): IDs of every movie OMDb answered for, changed or not.
+            checkpoint (dict): Values for save_refresh_checkpoint, including 'name'.
+        """
+        now = utcnow()
+        fetched_ids = list(fetched_ids)
+        for start in range(0, len(fetched_ids), IN_CLAUSE_CHUNK):
+            self.db.session.execute(update(Movie).where(
+                Movie.id.in_(fetched_ids[start:start + IN_CLAUSE_CHUNK])
+            ).values(fetched_at=now))
+        if changes:
+            self.db.session.execute(update(Movie), [dict(values, id=movie_id) for movie_id, values in changes.items()])
+            self._bump_versions(*self._refreshed_movie_keys(changes))
+        if checkpoint is not None:
+            self._save_refresh_checkpoint(**checkpoint)
+        self.db.session.commit()
+
+    def get_refresh_checkpoint(self, name):
+        row = self.db.session.execute(select(
+            RefreshCheckpoint.last_id, RefreshCheckpoint.pass_started_at, RefreshCheckpoint.pass_finished_at,
+            RefreshCheckpoint.updated_at
+        ).where(RefreshCheckpoint.name == name)).first()
+        return dict(row._mapping) if row else None
+
+    def save_refresh_checkpoint(self, name, **values):
+        """Insert or update the named checkpoint's last_id, pass_started_at and pass_finished_at."""
+        self._save_refresh_checkpoint(name, **values)
+        self.db.session.commit()
+
+    def _save_refresh_checkpoint(self, name, **values):
+        values['updated_at'] = utcnow()
+        statement = sqlite_insert(RefreshCheckpoint).values(name=name, **values)
+        self.db.session.execute(statement.on_conflict_do_update(index_elements=['name'], set_=values))
+
+    def get_movie_user_ids(self, movie_id):
+        rows = self.db.session.query(UserMoviesRelationship.user_id).filter_by(movie_id=movie_id).all()
+        return [user_id for user_id, in rows]
+
+    def get_user_movie_title_keys(self, user_id):
+        rows = self.db.session.query(Movie.title_key).join(
+            UserMoviesRelationship, UserMoviesRelationship.movie_id == Movie.id
+        ).filter(UserMoviesRelationship.user_id == user_id).all()
+        return {title_key for title_key, in rows}
+
+    def get_movie_ids_by_title_keys(self, title_keys):
+        title_keys = list(title_keys)
+        movie_ids = {}
+        for start in range(0, len(title_keys), IN_CLAUSE_CHUNK):
+            rows = self.db.session.query(Movie.title_key, Movie.id).filter(
+                Movie.title_key.in_(title_keys[start:start + IN_CLAUSE_CHUNK]), Movie.status != 'failed'
+            ).order_by(Movie.id).all()
+            for title_key, movie_id in rows:
+                movie_ids.setdefault(title_key, movie_id)
+        return movie_ids
+
+    def bulk_add_movies(self, user_id, new_movies, existing_movie_ids):
+        """
+        Insert new catalog movies and link them plus existing ones to a user,
+        all in a single transaction.
+
+        Args:
+            user_id (int): User ID.
+            new_movies (list): Movie column dicts, each including 'title_key'.
+            existing_movie_ids (iterable): IDs of catalog movies to link.
+
+        Returns:
+            dict: Maps the title_key of each new movie to its ID.
+        """
+        new_movies = list(new_movies)
+        new_ids = {}
+        if new_movies:
+            fetched_at = utcnow()
+            self.db.session.execute(insert(Movie), [dict(movie, fetched_at=fetched_at) for movie in new_movies])
+            title_keys = [movie['title_key'] for movie in new_movies]
+            for start in range(0, len(title_keys), IN_CLAUSE_CHUNK):
+                rows = self.db.session.query(Movie.title_key, func.max(Movie.id)).filter(
+                    Movie.title_key.in_(title_keys[start:start + IN_CLAUSE_CHUNK])
+                ).group_by(Movie.title_key).all()
+                new_ids.update(rows)
+
+        links = [{'user_id': user_id, 'movie_id': movie_id}
+                 for movie_id in set(existing_movie_ids) | set(new_ids.values())]
+        if links:
+            self.db.session.execute(sqlite_insert(UserMoviesRelationship).on_conflict_do_nothing(), links)
+        self._bump_versions(f'user_movies:{user_id}', *(['catalog'] if new_movies else []))
+        self.db.session.commit()
+        return new_ids
+
+    def add_pending_movie(self, user_id, title):
+        if self.db.session.get(User, user_id) is None:
+            return None
+        title = title.strip()
+        movie = self.db.session.execute(insert(Movie).values(
+            title=title, director='', year=0, rating=0.0, title_key=normalize_title(title), status='pending'
+        ).returning(*MOVIE_COLUMNS)).first()
+        self._link_movie(user_id, movie.id)
+        self._bump_versions(f'user_movies:{user_id}', 'catalog')
+        self.db.session.commit()
+        return MovieRow(*movie)
+
+    def mark_movie_pending(self, movie_id):
+        Movie.query.filter_by(id=movie_id).update({'status': 'pending'})
+        self._bump_versions(f'movie:{movie_id}', 'catalog', *self._library_keys(movie_id))
+        self.db.session.commit()
+
+    def complete_pending_movie(self, movie_id, movie_data):
+        if self.db.session.get(Movie, movie_id) is None:
+            return None
+        fields = parse_omdb_movie(movie_data)
+        title_key = normalize_title(fields['title'])
+
+        # The user typed a different spelling of a film that is already in the
+        # catalog: move the links over to that row and drop the placeholder.
+        existing_movie = self.db.session.execute(select(*MOVIE_COLUMNS).where(
+            Movie.title_key == title_key, Movie.id != movie_id, Movie.status == 'ready'
+        ).limit(1)).first()
+        user_ids = self.get_movie_user_ids(movie_id)
+        self._bump_versions(f'movie:{movie_id}', 'catalog', *(f'user_movies:{user_id}' for user_id in user_ids))
+        if existing_movie:
+            for user_id in user_ids:
+                self._link_movie(user_id, existing_movie.id)
+            self.db.session.execute(delete(UserMoviesRelationship).where(UserMoviesRelationship.movie_id == movie_id))
+            moved_reviews = self.db.session.execute(
+                update(Review).where(Review.movie_id == movie_id).values(movie_id=existing_movie.id)
+            ).rowcount
+            self.db.session.execute(delete(Movie).where(Movie.id == movie_id))
+            if moved_reviews:
+                rebuild_movie_stats(self.db.session, [movie_id, existing_movie.id])
+                reviewer_ids = self.db.session.query(Review.user_id).filter_by(movie_id=existing_movie.id).distinct()
+                self._bump_versions(f'movie:{existing_movie.id}', 'reviews', *self._library_keys(existing_movie.id),
+                                    *(f'user_reviews:{user_id}' for user_id, in reviewer_ids))
+            self.db.session.commit()
+            return MovieRow(*existing_movie)
+
+        movie = self.db.session.execute(update(Movie).where(Movie.id == movie_id).values(
+            **fields, title_key=title_key, status='ready', fetched_at=utcnow()
+        ).returning(*MOVIE_COLUMNS)).first()
+        self.db.session.commit()
+        return MovieRow(*movie)
+
+    def fail_pending_movie(self, movie_id):
+        Movie.query.filter_by(id=movie_id).update({'status': 'failed'})
+        self._bump_versions(f'movie:{movie_id}', 'catalog', *self._library_keys(movie_id))
+        self.db.session.commit()
+
+    def set_movie_poster_hashes(self, poster_hashes):
+        """Record cached poster hashes, given as {movie_id: poster_hash}, in one transaction."""
+        if not poster_hashes:
+            return
+        self.db.session.execute(update(Movie), [{'id': movie_id, 'poster_hash': poster_hash}
+                                                for movie_id, poster_hash in poster_hashes.items()])
+        keys = []
+        for movie_id in poster_hashes:
+            keys += [f'movie:{movie_id}', *self._library_keys(movie_id)]
+        self._bump_versions(*keys)
+        self.db.session.commit()
+
+    def get_poster_source(self, poster_hash):
+        """Return (movie id, upstream poster URL) of a movie with this poster, or None."""
+        row = self.db.session.query(Movie.id, Movie.poster).filter(Movie.poster_hash == poster_hash).limit(1).first()
+        return None if row is None else (row.id, row.poster)
+
+    def get_movies_without_poster(self, after_id=0, limit=DEFAULT_PAGE_SIZE):
+        """Return (id, poster URL) of movies with an upstream poster that is not cached yet."""
+        rows = self.db.session.query(Movie.id, Movie.poster).filter(
+            Movie.id > after_id, Movie.poster_hash.is_(None), Movie.poster.like('http%')
+        ).order_by(Movie.id).limit(limit).all()
+        return [(row.id, row.poster) for row in rows]
 
     def update_movie(self, user_id, movie_id, movie_data):
-        user = User.query.get(user_id)
+        user = self.db.session.get(User, user_id)
         if user:
-            movie = Movie.query.get(movie_id)
+            movie = self.db.session.get(Movie, movie_id)
             if movie:
                 # Update movie attributes if present in movie_data
                 movie.title = movie_data.get('title', movie.title)
+                movie.title_key = normalize_title(movie.title)
                 movie.director = movie_data.get('director', movie.director)
                 movie.year = movie_data.get('year', movie.year)
                 movie.rating = movie_data.get('rating', movie.rating)
+                # Titles also appear in review listings
+                self._bump_versions(f'movie:{movie_id}', 'catalog', 'reviews', *self._library_keys(movie_id))
                 self.db.session.commit()
                 return {'message': 'Movie updated successfully.'}
         return{'error': 'User or movie not found.'}
         
 
     def delete_movie(self, user_id, movie_id):
-        user = User.query.get(user_id)
-        if user:
-            movie = Movie.query.get(movie_id)
-            if movie:
-                user.movies.remove(movie)
-                self.db.session.commit()
-                return {'message': 'Movie deleted successfully.'}
+        # Delete the link row by its primary key instead of loading user.movies
+        deleted = UserMoviesRelationship.query.filter_by(user_id=user_id, movie_id=movie_id).delete()
+        if deleted:
+            self._bump_versions(f'user_movies:{user_id}')
+        self.db.session.commit()
+        if deleted:
+            return {'message': 'Movie deleted successfully.'}
         return {'error': 'User or movie not found.'}
     
     def add_review(self, user_id, movie_id, review_text, rating):
-        user = User.query.get(user_id)
-        movie = Movie.query.get(movie_id)
+        user = self.db.session.get(User, user_id)
+        movie = self.db.session.get(Movie, movie_id)
 
         if user and movie:
-            # Create a new Review instance and add it to the database
-            new_review = Review(user_id=user.id, movie_id=movie.id, review_text=review_text, rating=rating)
-            self.db.session.add(new_review)
+            rating = float(rating)
+            new_review = self.db.session.execute(insert(Review).values(
+                user_id=user.id, movie_id=movie.id, review_text=review_text, rating=rating
+            ).returning(*REVIEW_COLUMNS)).first()
+            self._add_to_movie_stats(movie.id, rating)
+            self._bump_versions(f'movie:{movie.id}', 'reviews', f'user_reviews:{user.id}',
+                                *self._library_keys(movie.id))
             self.db.session.commit()
-            return new_review
+            return ReviewRow(*new_review)
         return None
-    
+
+    def _add_to_movie_stats(self, movie_id, rating):
+        # A single upsert, so concurrent reviews of one movie cannot lose updates
+        bucket_path = f'$[{rating_bucket(rating)}]'
+        histogram = json.loads(empty_histogram())
+        histogram[rating_bucket(rating)] = 1
+        statement = sqlite_insert(MovieStats).values(
+            movie_id=movie_id, review_count=1, rating_sum=rating, rating_mean=rating, histogram=json.dumps(histogram)
+        )
+        statement = statement.on_conflict_do_update(index_elements=[MovieStats.movie_id], set_={
+            'review_count': MovieStats.review_count + 1,
+            'rating_sum': MovieStats.rating_sum + rating,
+            'rating_mean': (MovieStats.rating_sum + rating) / (MovieStats.review_count + 1),
+            'histogram': func.json_set(MovieStats.histogram, bucket_path,
+                                       func.json_extract(MovieStats.histogram, bucket_path) + 1)
+        })
+        self.db.session.execute(statement)
+
+    def get_movie_stats(self, movie_id):
+        row = self.db.session.query(Movie.id, Movie.title, MovieStats.review_count, MovieStats.rating_mean,
+                                    MovieStats.rating_sum, MovieStats.histogram).outerjoin(
+            MovieStats, MovieStats.movie_id == Movie.id).filter(Movie.id == movie_id).first()
+        if row is None:
+            return None
+        return {
+            'movie_id': row.id,
+            'title': row.title,
+            'review_count': row.review_count or 0,
+            'rating_sum': row.rating_sum or 0.0,
+            'rating_mean': row.rating_mean,
+            'histogram': json.loads(row.histogram or empty_histogram())
+        }
+
+    def get_top_rated_movies(self, limit=DEFAULT_PAGE_SIZE, min_reviews=1):
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        rows = self.db.session.query(Movie.id, Movie.title, Movie.year, MovieStats.review_count,
+                                     MovieStats.rating_mean).join(MovieStats, MovieStats.movie_id == Movie.id).filter(
+            MovieStats.review_count >= min_reviews
+        ).order_by(MovieStats.rating_mean.desc(), Movie.id).limit(limit).all()
+        return [{'movie_id': row.id, 'title': row.title, 'year': row.year, 'review_count': row.review_count,
+                 'rating_mean': row.rating_mean} for row in rows]
+
+    def rebuild_movie_stats(self, movie_ids=None):
+        rebuild_movie_stats(self.db.session, movie_ids)
+        # Stats show up on movie, library and leaderboard responses alike
+        ResourceVersion.query.update({'version': ResourceVersion.version + 1, 'updated_at': utcnow()})
+        self.db.session.commit()
+
     def get_review_by_id(self, review_id):
-        review = Review.query.get(review_id)
-        return review
-    
+        row = self.db.session.execute(select(*REVIEW_COLUMNS).where(Review.id == review_id)).first()
+        return ReviewRow(*row) if row else None
+
     def get_movie_reviews(self, movie_id):
-        movie = Movie.query.get(movie_id)
-        if movie:
-            reviews =  Review.query.filter_by(movie_id=movie_id).all()
-            return [{
-                'id': review.id,
-                'user_id': review.user_id,
-                'review_text': review.review_text,
-            } for review in reviews]
-        return
-    
+        rows = self.db.session.execute(select(*REVIEW_COLUMNS).where(Review.movie_id == movie_id)).all()
+        # Only a movie without reviews needs the extra lookup to tell "none" from "no such movie"
+        if not rows and self.db.session.execute(select(Movie.id).where(Movie.id == movie_id)).first() is None:
+            return None
+        return [ReviewRow(*row) for row in rows]
+
     def get_user_reviews(self, user_id):
-        user = User.query.get(user_id)
-        if user:
-            user_movies = self.get_user_movies(user_id)
-            reviews = [{'id': review.id, 'movie_id': review.movie_id, 'review_text': review.review_text, 'rating': review.rating}
-                        for review in user.reviews]
-            
-            if not reviews:
-                return user_movies, None
-            
-            return user_movies, reviews
-        return None, None
-
-    def get_all_movie_reviews(self):
-        reviews = Review.query.all()
-        all_movie_reviews = []
-
-        for review in reviews:
-            movie = Movie.query.get(review.movie_id)
-            if movie:
-                user = User.query.get(review.user_id)
-                if user:
-                    review_data = {
-                        'user_name': user.name,
-                        'movie_title': movie.title,
-                        'review_text': review.review_text,
-                        'rating': review.rating
-                    }
-                    all_movie_reviews.append(review_data)
-        
-        return all_movie_reviews
-        
-    
\ No newline at end of file
+        if not self._user_exists(user_id):
+            return None, None
+        user_movies = self.get_user_movies(user_id)
+        reviews = [ReviewRow(*row) for row in self.db.session.execute(
+            select(*REVIEW_COLUMNS).where(Review.user_id == user_id)
+        )]
+        if not reviews:
+            return user_movies, None
+        return user_movies, reviews
+
+    def iter_user_reviews(self, user_id, batch_size=EXPORT_BATCH_SIZE):
+        """Yield a user's reviews one dict at a time, streamed like iter_user_movies."""
+        statement = select(
+            Review.id, Review.movie_id, Movie.title, Review.review_text, Review.rating
+        ).join(Movie, Movie.id == Review.movie_id).where(
+            Review.user_id == user_id
+        ).order_by(Review.id).execution_options(yield_per=batch_size)
+        for row in self.db.session.execute(statement):
+            yield {'id': row.id, 'movie_id': row.movie_id, 'movie_title': row.title,
+                   'review_text': row.review_text, 'rating': row.rating}
+
+    def get_all_movie_reviews(self, after=None, before=None, limit=DEFAULT_PAGE_SIZE):
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+        # One Review/Movie/User join instead of two lookups per review,
+        # paginated on the review id so deep pages stay as cheap as the first.
+        query = self.db.session.query(
+            Review.id, User.name, Movie.title, Review.review_text, Review.rating
+        ).join(Movie, Movie.id == Review.movie_id).join(User, User.id == Review.user_id)
+
+        if before is not None:
+            query = query.filter(Review.id < before).order_by(Review.id.desc())
+        else:
+            if after is not None:
+                query = query.filter(Review.id > after)
+            query = query.order_by(Review.id.asc())
+
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if before is not None:
+            rows.reverse()
+
+        all_movie_reviews = [ReviewListingRow(*row) for row in rows]
+
+        next_cursor = prev_cursor = None
+        if all_movie_reviews:
+            if before is not None or has_more:
+                next_cursor = all_movie_reviews[-1].id
+            if after is not None or (before is not None and has_more):
+                prev_cursor = all_movie_reviews[0].id
+
+        return {
+            'reviews': all_movie_reviews,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
+        }
@@ -0,0 +1,13 @@
+"""
+Objects shared by the HTML views in app.py and the JSON API in api_blueprint.py.
+
+There is one data manager, so the two interfaces read from the same cache
+and a write made through either one invalidates what both serve.
+"""
+from data_manager.cache import CachingDataManager
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from http_cache import HTTPCache
+from models.models import db
+
+data_manager = CachingDataManager(SQLiteDataManager(db))
+http_cache = HTTPCache(data_manager)
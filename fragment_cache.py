@@ -0,0 +1,97 @@
+import os
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+from data_manager.cache import LRUCacheBackend, _MISSING
+
+
+class FragmentCache:
+    """
+    Cache of rendered per-row HTML for the list pages.
+
+    List templates render each row through a small fragment template with
+    `cached_fragments(template_name, rows, name, **shared)`, and the page is
+    the concatenation of the fragments. A fragment is keyed by the compiled
+    template, the row and the shared arguments. Rows (data_manager.rows) are
+    immutable and compare by value, so the row doubles as its version: a
+    change to any column gives a new key, only that row is rendered again,
+    and the stale fragment ages out of the LRU. A template reloaded in debug
+    mode is a new object, so its fragments are re-rendered too.
+
+    Fragments do not see the context processors (request, session, g): they
+    may only use their arguments and template globals such as url_for.
+
+    Args:
+        max_size (int): Maximum cached fragments; 0 disables caching.
+        ttl (float): Seconds a fragment is kept.
+    """
+
+    def __init__(self, max_size=10000, ttl=24 * 3600):
+        self.backend = LRUCacheBackend(max_size=max_size, ttl=ttl) if max_size else None
+
+    def init_app(self, app):
+        app.jinja_env.globals['cached_fragments'] = self.render
+        app.extensions['fragment_cache'] = self
+
+    def render(self, template_name, rows, name, **shared):
+        """
+        Render `template_name` once per row, with the row bound to `name`.
+
+        Returns:
+            Markup: The fragments of all rows, in order.
+        """
+        template = current_app.jinja_env.get_template(template_name)
+        # Merge the globals once per list; Template.render would copy them for every row
+        parent = dict(template.globals, **shared)
+        if self.backend is None:
+            return Markup(''.join(_render_row(template, parent, name, row) for row in rows))
+
+        shared_key = tuple(sorted(shared.items()))
+        parts = []
+        for row in rows:
+            key = (template, row, shared_key)
+            html = self.backend.get(key)
+            if html is _MISSING:
+                html = _render_row(template, parent, name, row)
+                self.backend.set(key, html)
+            parts.append(html)
+        return Markup(''.join(parts))
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def get_stats(self):
+        if self.backend is None:
+            return {'enabled': False}
+        return dict(self.backend.stats, enabled=True, max_size=self.backend.max_size)
+
+
+def _render_row(template, parent, name, row):
+    context = template.new_context(dict(parent, **{name: row}), shared=True)
+    try:
+        return template.environment.concat(template.root_render_func(context))
+    except Exception:
+        template.environment.handle_exception()
+
+
+def precompile_templates(app, bytecode_cache_path=None):
+    """
+    Compile every template at startup, so no request pays for it.
+
+    With a bytecode cache directory the compiled code is also written to
+    disk, and later starts load it instead of parsing the templates again.
+
+    Returns:
+        int: Number of templates compiled or loaded.
+    """
+    env = app.jinja_env
+    if bytecode_cache_path:
+        os.makedirs(bytecode_cache_path, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(bytecode_cache_path)
+    names = env.list_templates(extensions=['html'])
+    for name in names:
+        env.get_template(name)
+    return len(names)
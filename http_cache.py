@@ -0,0 +1,92 @@
+import hashlib
+import os
+import subprocess
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+
+def release_id(path=None):
+    """
+    Identify the deployed code, for HTTP_CACHE_SALT.
+
+    Returns the git revision checked out at `path` (the application
+    directory by default), or 'dev' outside a git checkout. Every worker
+    and every restart of the same release gets the same value, so ETags
+    stay valid across them and only change when a deploy may have changed
+    the templates.
+    """
+    try:
+        revision = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=path or os.path.dirname(os.path.abspath(__file__)),
+                                  capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return 'dev'
+    return revision.stdout.strip() if revision.returncode == 0 else 'dev'
+
+
+class HTTPCache:
+    """
+    Conditional GET support for read views, driven by the resource version
+    counters the data manager bumps on every write.
+
+    A view declares which resources it renders; the ETag is a hash of their
+    versions, so a matching If-None-Match is answered with 304 Not Modified
+    before the view queries or renders anything. Last-Modified is sent for
+    information only; If-Modified-Since alone never produces a 304.
+    """
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+
+    def versioned(self, resource_keys):
+        """
+        Decorate a GET view with ETag, Last-Modified and Cache-Control handling.
+
+        Args:
+            resource_keys (callable): Called with the view's keyword arguments,
+                returns the resource keys the response depends on.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return view(*args, **kwargs)
+
+                keys = sorted(resource_keys(**kwargs))
+                versions = self.data_manager.get_resource_versions(keys)
+                # The body must be read at (at least) the versions in the ETag
+                self.data_manager.scope_to_versions(versions)
+                etag = self.make_etag(keys, versions)
+                timestamps = [updated_at for _, updated_at in versions.values()]
+                last_modified = max(timestamps).replace(microsecond=0) if timestamps else None
+
+                # Only the ETag is trusted: Last-Modified has one-second resolution,
+                # so If-Modified-Since would hide a second write within that second
+                not_modified = request.if_none_match.contains(etag)
+                response = make_response('', 304) if not_modified else make_response(view(*args, **kwargs))
+                if response.status_code in (200, 304):
+                    response.set_etag(etag)
+                    if last_modified is not None:
+                        response.last_modified = last_modified
+                    self.set_cache_control(response)
+                return response
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def make_etag(keys, versions):
+        # The path and query string pick the representation (page, sort,
+        # format); the salt changes on deploys, when templates may change.
+        parts = [current_app.config['HTTP_CACHE_SALT'], request.path, request.query_string.decode('latin-1')]
+        parts += [f'{key}={versions[key][0] if key in versions else 0}' for key in keys]
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def set_cache_control(response):
+        max_age = current_app.config['HTTP_CACHE_MAX_AGE']
+        response.cache_control.public = True
+        if max_age:
+            response.cache_control.max_age = max_age
+        else:
+            # Store, but revalidate with the ETag before every reuse
+            response.cache_control.no_cache = True
@@ -0,0 +1,234 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS job ('
+    ' id INTEGER PRIMARY KEY,'
+    ' task TEXT NOT NULL,'
+    ' payload TEXT NOT NULL,'
+    ' dedupe_key TEXT,'
+    # queued -> running -> done, or back to queued for a retry, or failed
+    " status TEXT NOT NULL DEFAULT 'queued',"
+    ' attempts INTEGER NOT NULL DEFAULT 0,'
+    ' max_attempts INTEGER NOT NULL,'
+    ' enqueued_at REAL NOT NULL,'
+    # Queued: when the job may run. Running: when its lease expires.
+    ' run_at REAL NOT NULL,'
+    # When the current attempt became runnable, for the queue wait statistics
+    ' ready_at REAL,'
+    ' started_at REAL,'
+    ' finished_at REAL,'
+    ' worker TEXT,'
+    ' last_error TEXT)',
+    # Deduplication only applies while a job is waiting or running
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_job_dedupe_key ON job (dedupe_key) WHERE status IN ('queued', 'running')",
+    "CREATE INDEX IF NOT EXISTS ix_job_runnable ON job (run_at) WHERE status IN ('queued', 'running')",
+    'CREATE INDEX IF NOT EXISTS ix_job_finished_at ON job (finished_at) WHERE finished_at IS NOT NULL',
+]
+
+MAX_RETRY_DELAY = 3600
+# Finished jobs read per get_stats() call, newest first
+STATS_SAMPLE_SIZE = 10000
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    id: int
+    task: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    worker: str
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an unsorted list, or None if it is empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class JobQueue:
+    """
+    Durable job queue in its own SQLite file, shared by the web and worker processes.
+
+    A worker claims a job by leasing it for `visibility_timeout` seconds. A
+    worker that dies mid-job never completes it, so the lease runs out and
+    the job becomes runnable again. Failed attempts are retried with
+    exponential backoff until `max_attempts`; after that the job stays
+    'failed' for inspection. A job enqueued with a dedupe_key is dropped
+    while another job with the same key is still queued or running.
+
+    Args:
+        path (str): SQLite database file.
+        visibility_timeout (float): Seconds a claimed job is leased to its worker.
+        max_attempts (int): Default attempts per job, including the first.
+        retry_delay (float): Seconds before the first retry; doubles per attempt.
+    """
+
+    def __init__(self, path, visibility_timeout=120, max_attempts=5, retry_delay=30):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._local = threading.local()
+        with self._connect() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        # One connection per thread, and a new one in forked worker processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def enqueue(self, task, payload=None, dedupe_key=None, delay=0, max_attempts=None):
+        """
+        Add a job.
+
+        Args:
+            task (str): Name of the handler that runs the job.
+            payload (dict): JSON-serializable arguments of the handler.
+            dedupe_key (str): Drop the job if one with this key is queued or running.
+            delay (float): Seconds before the job may run.
+            max_attempts (int): Attempts before giving up; defaults to the queue's.
+
+        Returns:
+            int: The job ID, or None if it was deduplicated.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO job (task, payload, dedupe_key, max_attempts, enqueued_at, run_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (task, json.dumps(payload or {}), dedupe_key, max_attempts or self.max_attempts, now, now + delay)
+            )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def claim(self, worker=None, now=None):
+        """
+        Lease the next runnable job: a queued one that is due, or a running one whose lease expired.
+
+        Returns:
+            Job: The claimed job, or None if nothing is runnable.
+        """
+        worker = worker or default_worker_id()
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            # A job whose last attempt's lease ran out is not retried again
+            conn.execute(
+                "UPDATE job SET status = 'failed', finished_at = ?, last_error = 'Visibility timeout expired'"
+                " WHERE status = 'running' AND run_at <= ? AND attempts >= max_attempts", (now, now)
+            )
+            # One statement, so two workers can never claim the same job
+            row = conn.execute(
+                "UPDATE job SET status = 'running', attempts = attempts + 1, worker = ?, started_at = ?,"
+                ' ready_at = run_at, run_at = ?'
+                " WHERE id = (SELECT id FROM job WHERE status IN ('queued', 'running') AND run_at <= ?"
+                ' ORDER BY run_at LIMIT 1)'
+                ' RETURNING id, task, payload, attempts, max_attempts',
+                (worker, now, now + self.visibility_timeout, now)
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(row[0], row[1], json.loads(row[2]), row[3], row[4], worker)
+
+    def _finish(self, job, status, run_at, error, now):
+        # Matching the worker and attempt makes a late answer for an expired
+        # lease a no-op instead of overwriting the attempt that replaced it
+        finished_at = now if status != 'queued' else None
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE job SET status = ?, run_at = ?, finished_at = ?, last_error = ?'
+                " WHERE id = ? AND status = 'running' AND worker = ? AND attempts = ?",
+                (status, run_at, finished_at, error, job.id, job.worker, job.attempts)
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job, now=None):
+        """Mark a claimed job done. Returns False if its lease had expired and it was claimed again."""
+        now = time.time() if now is None else now
+        return self._finish(job, 'done', now, None, now)
+
+    def fail(self, job, error, retry=True, now=None):
+        """Record a failed attempt and schedule a retry, or mark the job failed once its attempts are used up."""
+        now = time.time() if now is None else now
+        if retry and job.attempts < job.max_attempts:
+            delay = min(self.retry_delay * 2 ** (job.attempts - 1), MAX_RETRY_DELAY)
+            return self._finish(job, 'queued', now + delay, error, now)
+        return self._finish(job, 'failed', now, error, now)
+
+    def purge(self, older_than, now=None):
+        """Delete done and failed jobs that finished more than `older_than` seconds ago."""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM job WHERE status IN ('done', 'failed') AND finished_at < ?", (now - older_than,)
+            ).rowcount
+
+    def get_stats(self, window=3600, now=None):
+        """
+        Queue depth now, and latency of the jobs finished in the last `window` seconds.
+
+        Returns:
+            dict: Job counts by state, the age of the oldest runnable job,
+            and per task the queue wait and run time percentiles in milliseconds.
+        """
+        now = time.time() if now is None else now
+        conn = self._connect()
+        depth = dict.fromkeys(('ready', 'delayed', 'running', 'expired', 'done', 'failed'), 0)
+        for status, due, count in conn.execute(
+            'SELECT status, run_at <= ?, COUNT(*) FROM job GROUP BY status, run_at <= ?', (now, now)
+        ):
+            if status == 'queued':
+                depth['ready' if due else 'delayed'] += count
+            elif status == 'running':
+                depth['expired' if due else 'running'] += count
+            else:
+                depth[status] += count
+        oldest = conn.execute(
+            "SELECT MIN(run_at) FROM job WHERE status = 'queued' AND run_at <= ?", (now,)
+        ).fetchone()[0]
+
+        tasks = {}
+        for task, status, ready_at, started_at, finished_at in conn.execute(
+            'SELECT task, status, ready_at, started_at, finished_at FROM job WHERE finished_at >= ?'
+            ' ORDER BY finished_at DESC LIMIT ?', (now - window, STATS_SAMPLE_SIZE)
+        ):
+            samples = tasks.setdefault(task, {'done': 0, 'failed': 0, 'wait': [], 'run': []})
+            samples[status] += 1
+            samples['wait'].append(started_at - ready_at)
+            samples['run'].append(finished_at - started_at)
+
+        def milliseconds(values, fraction):
+            value = percentile(values, fraction)
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            'depth': depth,
+            'oldest_ready_seconds': round(now - oldest, 1) if oldest is not None else 0,
+            'window_seconds': window,
+            'tasks': {task: {
+                'done': samples['done'],
+                'failed': samples['failed'],
+                'wait_p50_ms': milliseconds(samples['wait'], 0.5),
+                'wait_p95_ms': milliseconds(samples['wait'], 0.95),
+                'run_p50_ms': milliseconds(samples['run'], 0.5),
+                'run_p95_ms': milliseconds(samples['run'], 0.95)
+            } for task, samples in sorted(tasks.items())}
+        }
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from models.models import utcnow
+from posters.store import is_poster_url
+from .worker import PermanentJobError
+
+REFRESH_MOVIE = 'refresh_movie'
+CACHE_POSTER = 'cache_poster'
+
+
+def enqueue_movie_refresh(queue, movie_id, max_age=None):
+    """
+    Queue a re-fetch of a catalog movie's OMDb details.
+
+    The worker skips it if the details are younger than `max_age` seconds
+    (default: the handlers' max_age); 0 always refreshes.
+    """
+    return queue.enqueue(REFRESH_MOVIE, {'movie_id': movie_id, 'max_age': max_age},
+                         dedupe_key=f'{REFRESH_MOVIE}:{movie_id}')
+
+
+def enqueue_poster_download(queue, movie_id, url):
+    """
+    Queue caching a movie's poster in the local poster store, if it has one
+    ('N/A' otherwise) on a poster host. Poster URLs can come from API clients,
+    so the worker checks them again before downloading.
+    """
+    if not is_poster_url(url):
+        return None
+    return queue.enqueue(CACHE_POSTER, {'movie_id': movie_id, 'url': url}, dedupe_key=f'{CACHE_POSTER}:{movie_id}')
+
+
+def movie_task_handlers(queue, data_manager, omdb_client, poster_store, max_age):
+    """
+    Handlers of the movie follow-up jobs, by task name.
+
+    Args:
+        queue (JobQueue): Queue that follow-up jobs are added to.
+        data_manager (SQLiteDataManager): Data manager used to store results.
+        omdb_client (OMDbClient): OMDb client.
+        poster_store (PosterStore): Local poster cache.
+        max_age (float): Seconds after which a movie's OMDb details are stale, unless the job says otherwise.
+
+    Returns:
+        dict: Task names mapped to handlers for JobWorker.
+    """
+    def refresh_movie(payload):
+        movie = data_manager.get_movie_status(payload['movie_id'])
+        # Deleted, or a pending lookup will fill it in anyway
+        if movie is None or movie['status'] != 'ready':
+            return
+        fetched_at = movie['fetched_at']
+        job_max_age = max_age if payload.get('max_age') is None else payload['max_age']
+        if fetched_at and fetched_at > utcnow() - timedelta(seconds=job_max_age):
+            return
+        if movie['imdb_id']:
+            movie_data = omdb_client.get_movie_by_imdb_id(movie['imdb_id'])
+        else:
+            movie_data = omdb_client.get_movie(movie['title'], refresh=True)
+        if movie_data is None:
+            raise ConnectionError('OMDb could not be reached')
+        if movie_data.get('Response') != 'True':
+            raise PermanentJobError(f"OMDb has no details for {movie['title']!r}: {movie_data.get('Error')}")
+        refreshed = data_manager.refresh_movie(movie['id'], movie_data)
+        if refreshed is not None and refreshed.poster_hash is None:
+            enqueue_poster_download(queue, refreshed.id, refreshed.poster)
+
+    def cache_poster(payload):
+        url = payload['url']
+        if not poster_store.is_allowed(url):
+            raise PermanentJobError(f'Poster {url} is not on an allowed poster host')
+        if poster_store.cache_movie_poster(data_manager, payload['movie_id'], url) is None:
+            raise ConnectionError(f'Poster {url} could not be downloaded')
+
+    return {REFRESH_MOVIE: refresh_movie, CACHE_POSTER: cache_poster}
@@ -0,0 +1,126 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+from .queue import default_worker_id
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """Raised by a task handler to fail its job without retrying it."""
+
+
+class JobWorker:
+    """
+    Claims jobs from a JobQueue and runs their handlers, one at a time.
+
+    Handlers are looked up by the job's task name and called with its
+    payload inside an app context. A handler that returns completes the
+    job; an exception schedules a retry, except PermanentJobError, which
+    fails the job at once.
+
+    Args:
+        app (Flask): Application whose context handlers run in.
+        queue (JobQueue): Queue to claim jobs from.
+        handlers (dict): Maps task names to callables taking the payload dict.
+        poll_interval (float): Seconds to sleep when no job is runnable.
+        retention (float): Seconds finished jobs are kept; purged about hourly.
+    """
+
+    def __init__(self, app, queue, handlers, poll_interval=1.0, retention=7 * 24 * 3600):
+        self.app = app
+        self.queue = queue
+        self.handlers = handlers
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.worker_id = default_worker_id()
+        self._next_purge = 0
+
+    def run_once(self):
+        """
+        Run one runnable job, if there is one.
+
+        Returns:
+            bool: Whether a job was claimed.
+        """
+        job = self.queue.claim(self.worker_id)
+        if job is None:
+            return False
+        handler = self.handlers.get(job.task)
+        if handler is None:
+            self.queue.fail(job, f'Unknown task {job.task!r}', retry=False)
+            return True
+        try:
+            with self.app.app_context():
+                handler(job.payload)
+        except PermanentJobError as error:
+            logger.warning('Job %s (%s) failed: %s', job.id, job.task, error)
+            self.queue.fail(job, str(error), retry=False)
+        except Exception as error:
+            logger.exception('Job %s (%s) failed, attempt %d of %d', job.id, job.task, job.attempts,
+                             job.max_attempts)
+            self.queue.fail(job, f'{type(error).__name__}: {error}')
+        else:
+            if not self.queue.complete(job):
+                logger.warning('Job %s (%s) finished after its lease expired', job.id, job.task)
+        return True
+
+    def run(self, stop):
+        """Process jobs until `stop` (a threading or multiprocessing Event) is set."""
+        while not stop.is_set():
+            if time.time() >= self._next_purge:
+                self._next_purge = time.time() + 3600
+                self.queue.purge(self.retention)
+            if not self.run_once():
+                stop.wait(self.poll_interval)
+
+
+def _run_child(target, stop):
+    # Ctrl-C reaches the whole process group; only the parent acts on it, by
+    # setting `stop`, so the child finishes its current job first. A SIGTERM
+    # sent to the child itself still ends it at once; its job's lease expires
+    # and another worker retries it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    target(stop)
+
+
+def run_worker_pool(target, processes):
+    """
+    Run `target(stop)` in `processes` worker processes until SIGINT or SIGTERM.
+
+    A worker that dies is started again. On shutdown every worker finishes
+    the job it is running before exiting.
+
+    Args:
+        target (callable): Module-level function that processes jobs until `stop` is set.
+        processes (int): Number of worker processes.
+    """
+    stop = multiprocessing.Event()
+    stopping = []
+
+    def start(index):
+        process = multiprocessing.Process(target=_run_child, args=(target, stop), name=f'job-worker-{index}')
+        process.start()
+        return process
+
+    def request_stop(signum, frame):
+        # Setting the Event here could deadlock with a wait() it interrupted
+        stopping.append(signum)
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    workers = [start(index) for index in range(processes)]
+    logger.info('Started %d job workers', processes)
+    while not stopping:
+        for index, process in enumerate(workers):
+            if not process.is_alive():
+                logger.warning('Job worker %s exited with code %s, restarting it', process.name, process.exitcode)
+                workers[index] = start(index)
+        time.sleep(1)
+    logger.info('Stopping job workers after their current jobs')
+    stop.set()
+    for process in workers:
+        process.join()
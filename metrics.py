@@ -0,0 +1,195 @@
+import hmac
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, abort, current_app, g, has_app_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, shared by every histogram
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+# Clients that may read /metrics without METRICS_TOKEN
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with one series per label set."""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(labels, dict(values, counts=list(values['counts']))) for labels, values in series]
+        for labels, values in series:
+            label_text = ','.join(f'{name}="{escape(value)}"' for name, value in zip(self.label_names, labels))
+            prefix = label_text + ',' if label_text else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets, values['counts']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {values["count"]}')
+            suffix = '{' + label_text + '}' if label_text else ''
+            lines.append(f'{self.name}_sum{suffix} {values["sum"]}')
+            lines.append(f'{self.name}_count{suffix} {values["count"]}')
+        return lines
+
+
+class Counter:
+    """Monotonic Prometheus-style counter with one value per label set."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            label_text = ','.join(f'{name}="{escape(label)}"' for name, label in zip(self.label_names, labels))
+            lines.append(f'{self.name}{{{label_text}}} {value}' if label_text else f'{self.name} {value}')
+        return lines
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency by endpoint.',
+                            ('endpoint', 'method'))
+REQUESTS = Counter('http_requests_total', 'Requests by endpoint and status.', ('endpoint', 'method', 'status'))
+REQUEST_QUERIES = Histogram('http_request_sql_queries', 'SQL statements executed per request.',
+                            ('endpoint',), buckets=QUERY_COUNT_BUCKETS)
+SQL_LATENCY = Histogram('sql_query_duration_seconds', 'SQL statement latency.', ())
+OMDB_LATENCY = Histogram('omdb_request_duration_seconds', 'OMDb API call latency by outcome.', ('outcome',))
+
+ALL_METRICS = [REQUEST_LATENCY, REQUESTS, REQUEST_QUERIES, SQL_LATENCY, OMDB_LATENCY]
+
+
+def observe_omdb(seconds, outcome):
+    """Record one OMDb HTTP call; outcome is 'ok', 'http_error', 'network_error' or 'invalid_response'."""
+    OMDB_LATENCY.observe(seconds, outcome)
+
+
+def render():
+    """Return all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in ALL_METRICS:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    SQL_LATENCY.observe(elapsed)
+    # Background workers run in an app context too, but only requests are profiled
+    if has_app_context() and 'metrics_started' in g:
+        g.metrics_queries += 1
+        g.metrics_sql_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_sql_seconds = 0.0
+
+
+def _after_request(response):
+    if 'metrics_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.metrics_started
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_LATENCY.observe(elapsed, endpoint, request.method)
+    REQUESTS.inc(endpoint, request.method, response.status_code)
+    REQUEST_QUERIES.observe(g.metrics_queries, endpoint)
+
+    slow = elapsed * 1000 >= current_app.config['METRICS_SLOW_REQUEST_MS']
+    chatty = g.metrics_queries > current_app.config['METRICS_MAX_QUERIES']
+    if slow or chatty:
+        # One JSON object per line, so log shippers can index the fields
+        logger.warning(json.dumps({
+            'event': 'slow_request' if slow else 'many_queries',
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 1),
+            'sql_queries': g.metrics_queries,
+            'sql_ms': round(g.metrics_sql_seconds * 1000, 1)
+        }))
+    return response
+
+
+def _metrics_view():
+    # Per-route latency and SQL counts are not for the public; a proxy in
+    # front of the app makes its requests look local, so those are refused
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        authorization = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            abort(401)
+    elif request.remote_addr not in LOCAL_ADDRESSES or 'X-Forwarded-For' in request.headers:
+        abort(404)
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app, engine):
+    """
+    Record request latency, per-request SQL counts and SQL time, and serve
+    them at /metrics, to local requests or with METRICS_TOKEN.
+
+    Args:
+        app (Flask): Application to instrument.
+        engine (Engine): SQLAlchemy engine whose statements are counted.
+    """
+    app.config.setdefault('METRICS_SLOW_REQUEST_MS', 500)
+    app.config.setdefault('METRICS_MAX_QUERIES', 20)
+    app.config.setdefault('METRICS_TOKEN', None)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', _metrics_view)
@@ -0,0 +1,101 @@
+import logging
+import os
+
+from sqlalchemy import event, text
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new SQLite connection. cache_size is negative to mean KiB.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY'
+}
+
+DEFAULT_POOL = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 3600
+}
+
+
+def load_settings(environ=os.environ):
+    """
+    Read the SQLite pragmas and pool settings, allowing environment overrides.
+
+    Every key can be overridden with an upper-cased SQLITE_ variable, e.g.
+    SQLITE_JOURNAL_MODE=DELETE or SQLITE_POOL_SIZE=5.
+
+    Returns:
+        tuple: (pragmas, pool) dicts.
+    """
+    pragmas = {}
+    for name, default in DEFAULT_PRAGMAS.items():
+        value = environ.get(f'SQLITE_{name.upper()}', default)
+        pragmas[name] = int(value) if isinstance(default, int) else value
+    pool = {name: int(environ.get(f'SQLITE_{name.upper()}', default)) for name, default in DEFAULT_POOL.items()}
+    return pragmas, pool
+
+
+def engine_options(pragmas, pool):
+    """Build SQLAlchemy create_engine() keyword arguments for a tuned SQLite engine."""
+    return dict(pool, connect_args={
+        # sqlite3's own busy handler, in seconds; matches PRAGMA busy_timeout
+        'timeout': pragmas.get('busy_timeout', 5000) / 1000,
+        'check_same_thread': False
+    })
+
+
+def install_pragmas(engine, pragmas):
+    """
+    Run the given PRAGMA statements on every connection the engine opens.
+
+    Args:
+        engine (Engine): SQLAlchemy engine.
+        pragmas (dict): Pragma names and values.
+    """
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+    event.listen(engine, 'connect', set_pragmas)
+
+
+def read_settings(engine, pragmas):
+    """Return the pragma values actually in effect on a pooled connection."""
+    with engine.connect() as conn:
+        return {name: conn.execute(text(f'PRAGMA {name}')).scalar() for name in pragmas}
+
+
+def configure_app(app):
+    """
+    Set SQLALCHEMY_ENGINE_OPTIONS and SQLITE_PRAGMAS on a Flask app.
+
+    Must be called before db.init_app(app); call `setup_engine` once the
+    engine exists.
+    """
+    pragmas, pool = load_settings()
+    app.config.setdefault('SQLITE_PRAGMAS', pragmas)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLITE_PRAGMAS'], pool))
+
+
+def setup_engine(app, db):
+    """
+    Install the pragmas on the app's engine and log the active settings.
+
+    Must run inside an app context, before anything connects.
+    """
+    pragmas = app.config['SQLITE_PRAGMAS']
+    install_pragmas(db.engine, pragmas)
+    active = read_settings(db.engine, pragmas)
+    pool = {name: value for name, value in app.config['SQLALCHEMY_ENGINE_OPTIONS'].items() if name != 'connect_args'}
+    logger.info('SQLite settings: %s; pool: %s',
+                ', '.join(f'{name}={value}' for name, value in active.items()),
+                ', '.join(f'{name}={value}' for name, value in pool.items()))
+    return active
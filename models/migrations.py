@@ -0,0 +1,233 @@
+from sqlalchemy import text
+
+from models.models import MovieStats, RefreshCheckpoint, ResourceVersion, UserMoviesRelationship
+from models.stats import rebuild_movie_stats
+from omdb.cache import normalize_title
+
+
+class MigrationError(Exception):
+    """A schema change that needs the operator to fix the data first."""
+
+
+def _column_exists(conn, table, column):
+    rows = conn.execute(text(f'PRAGMA table_info("{table}")')).fetchall()
+    return any(row[1] == column for row in rows)
+
+
+def add_movie_title_key(conn):
+    """Add the normalized title lookup column on movie and backfill it."""
+    if not _column_exists(conn, 'movie', 'title_key'):
+        conn.execute(text('ALTER TABLE movie ADD COLUMN title_key VARCHAR(255)'))
+    # Not unique: remakes share a title ('Dune' 1984 and 2021), and a pending
+    # lookup's placeholder sits next to the catalog movie it will merge into.
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_movie_title_key ON movie (title_key)'))
+
+    rows = conn.execute(text('SELECT id, title FROM movie WHERE title_key IS NULL')).fetchall()
+    if rows:
+        conn.execute(text('UPDATE movie SET title_key = :title_key WHERE id = :id'),
+                     [{'id': movie_id, 'title_key': normalize_title(title)} for movie_id, title in rows])
+
+
+def add_movie_status(conn):
+    """Add the OMDb fetch status column on movie."""
+    if not _column_exists(conn, 'movie', 'status'):
+        conn.execute(text("ALTER TABLE movie ADD COLUMN status VARCHAR(20) NOT NULL DEFAULT 'ready'"))
+
+
+def add_secondary_indexes(conn):
+    """Add the lookup indexes and the unique user name/email constraints."""
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_review_movie_id ON review (movie_id)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_review_user_id ON review (user_id)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_movies_relationship_movie_id '
+                      'ON user_movies_relationship (movie_id)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_movie_catalog_lookup '
+                      'ON movie (title, director, year, rating)'))
+
+    add_unique_user_constraints(conn)
+
+
+def add_unique_user_constraints(conn):
+    """
+    Make user names and emails unique.
+
+    create_user_if_absent relies on these indexes to detect an existing
+    user, so a database with duplicates is not upgraded past this step.
+    Versions before 12 fell back to a plain index on duplicates; that index
+    is replaced here.
+
+    Raises:
+        MigrationError: If existing users share a name or email.
+    """
+    for column in ('name', 'email'):
+        duplicates = conn.execute(text(
+            f'SELECT {column} FROM user GROUP BY {column} HAVING COUNT(*) > 1'
+        )).fetchall()
+        if duplicates:
+            raise MigrationError(
+                f'Cannot add unique index on user.{column}, duplicate values: '
+                f'{", ".join(row[0] for row in duplicates)}. Merge or rename these users, then restart '
+                f'to finish upgrading the database.'
+            )
+        conn.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS uq_user_{column} ON user ({column})'))
+        conn.execute(text(f'DROP INDEX IF EXISTS ix_user_{column}'))
+
+
+def add_link_added_at(conn):
+    """Record when a movie was added to a library, for the 'date added' sort."""
+    if not _column_exists(conn, 'user_movies_relationship', 'added_at'):
+        # ALTER TABLE cannot add a CURRENT_TIMESTAMP default, so backfill
+        # instead, in the microsecond format SQLAlchemy writes for DateTime.
+        conn.execute(text('ALTER TABLE user_movies_relationship ADD COLUMN added_at DATETIME'))
+        conn.execute(text("UPDATE user_movies_relationship SET added_at = strftime('%Y-%m-%d %H:%M:%f000', 'now')"))
+
+
+FULL_TEXT_SCHEMA = [
+    # Word index with prefix indexes for search-as-you-type
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movie_fts USING fts5("
+    " title, director, content='movie', content_rowid='id',"
+    " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    # Trigram index on titles, used as a typo-tolerant fallback
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movie_trigram_fts USING fts5("
+    " title, content='movie', content_rowid='id', tokenize='trigram')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS review_fts USING fts5("
+    " review_text, content='review', content_rowid='id',"
+    " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    "CREATE TRIGGER IF NOT EXISTS movie_fts_insert AFTER INSERT ON movie BEGIN"
+    " INSERT INTO movie_fts (rowid, title, director) VALUES (new.id, new.title, new.director);"
+    " INSERT INTO movie_trigram_fts (rowid, title) VALUES (new.id, new.title);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS movie_fts_delete AFTER DELETE ON movie BEGIN"
+    " INSERT INTO movie_fts (movie_fts, rowid, title, director) VALUES ('delete', old.id, old.title, old.director);"
+    " INSERT INTO movie_trigram_fts (movie_trigram_fts, rowid, title) VALUES ('delete', old.id, old.title);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS movie_fts_update AFTER UPDATE OF title, director ON movie BEGIN"
+    " INSERT INTO movie_fts (movie_fts, rowid, title, director) VALUES ('delete', old.id, old.title, old.director);"
+    " INSERT INTO movie_trigram_fts (movie_trigram_fts, rowid, title) VALUES ('delete', old.id, old.title);"
+    " INSERT INTO movie_fts (rowid, title, director) VALUES (new.id, new.title, new.director);"
+    " INSERT INTO movie_trigram_fts (rowid, title) VALUES (new.id, new.title);"
+    " END",
+
+    "CREATE TRIGGER IF NOT EXISTS review_fts_insert AFTER INSERT ON review BEGIN"
+    " INSERT INTO review_fts (rowid, review_text) VALUES (new.id, new.review_text);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS review_fts_delete AFTER DELETE ON review BEGIN"
+    " INSERT INTO review_fts (review_fts, rowid, review_text) VALUES ('delete', old.id, old.review_text);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS review_fts_update AFTER UPDATE OF review_text ON review BEGIN"
+    " INSERT INTO review_fts (review_fts, rowid, review_text) VALUES ('delete', old.id, old.review_text);"
+    " INSERT INTO review_fts (rowid, review_text) VALUES (new.id, new.review_text);"
+    " END",
+]
+
+
+def add_full_text_search(conn):
+    """Create the FTS5 indexes over movies and reviews and their sync triggers."""
+    for statement in FULL_TEXT_SCHEMA:
+        conn.execute(text(statement))
+    for table in ('movie_fts', 'movie_trigram_fts', 'review_fts'):
+        conn.execute(text(f"INSERT INTO {table} ({table}) VALUES ('rebuild')"))
+
+
+def add_movie_stats(conn):
+    """Create the per-movie review aggregates table and backfill it."""
+    MovieStats.__table__.create(conn, checkfirst=True)
+    rebuild_movie_stats(conn)
+
+
+def add_resource_versions(conn):
+    """Create the change counters behind the HTTP ETags."""
+    ResourceVersion.__table__.create(conn, checkfirst=True)
+
+
+def add_movie_poster_hash(conn):
+    """Add the column linking a movie to its locally cached poster."""
+    if not _column_exists(conn, 'movie', 'poster_hash'):
+        conn.execute(text('ALTER TABLE movie ADD COLUMN poster_hash VARCHAR(64)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_movie_poster_hash ON movie (poster_hash)'))
+
+
+def add_movie_fetched_at(conn):
+    """Record when each movie's OMDb details were fetched; existing movies count as stale."""
+    if not _column_exists(conn, 'movie', 'fetched_at'):
+        conn.execute(text('ALTER TABLE movie ADD COLUMN fetched_at DATETIME'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_movie_fetched_at ON movie (fetched_at)'))
+
+
+def add_movie_imdb_id(conn):
+    """Add the OMDb imdbID column; existing movies get it on their next refresh."""
+    if not _column_exists(conn, 'movie', 'imdb_id'):
+        conn.execute(text('ALTER TABLE movie ADD COLUMN imdb_id VARCHAR(16)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_movie_imdb_id ON movie (imdb_id)'))
+
+
+def add_refresh_checkpoints(conn):
+    """Create the table the metadata refresher saves its progress in."""
+    RefreshCheckpoint.__table__.create(conn, checkfirst=True)
+
+
+def add_link_ids(conn):
+    """
+    Give library links an AUTOINCREMENT id.
+
+    SQLite hands the rowid of a deleted newest row to the next insert, so
+    the recommendation index, which syncs links newer than its rowid
+    watermark, missed that insert. The table is rebuilt with each link's
+    rowid as its id, which keeps existing watermarks valid.
+    """
+    if _column_exists(conn, 'user_movies_relationship', 'id'):
+        return
+    # The index name moves with a renamed table, so free it for the new one
+    conn.execute(text('DROP INDEX IF EXISTS ix_user_movies_relationship_movie_id'))
+    conn.execute(text('ALTER TABLE user_movies_relationship RENAME TO user_movies_relationship_old'))
+    UserMoviesRelationship.__table__.create(conn)
+    conn.execute(text('INSERT INTO user_movies_relationship (id, user_id, movie_id, added_at) '
+                      'SELECT rowid, user_id, movie_id, added_at FROM user_movies_relationship_old ORDER BY rowid'))
+    conn.execute(text('DROP TABLE user_movies_relationship_old'))
+
+
+# Ordered (version, step) pairs. Every step must be idempotent, because a
+# freshly created database already has the tables in their latest shape.
+MIGRATIONS = [
+    (1, add_movie_title_key),
+    (2, add_movie_status),
+    (3, add_secondary_indexes),
+    (4, add_link_added_at),
+    (5, add_full_text_search),
+    (6, add_movie_stats),
+    (7, add_resource_versions),
+    (8, add_movie_poster_hash),
+    (9, add_movie_fetched_at),
+    (10, add_movie_imdb_id),
+    (11, add_refresh_checkpoints),
+    (12, add_unique_user_constraints),
+    (13, add_link_ids),
+]
+
+
+def upgrade(db):
+    """
+    Bring an existing database up to the latest schema version.
+
+    The applied version is tracked in SQLite's `user_version` pragma.
+
+    Args:
+        db (SQLAlchemy): The Flask-SQLAlchemy instance, inside an app context.
+
+    All pending steps run in one transaction: if one fails, none is applied
+    and the next startup tries again.
+
+    Returns:
+        int: The schema version after upgrading.
+
+    Raises:
+        MigrationError: If a step cannot be applied to the existing data.
+    """
+    with db.engine.begin() as conn:
+        current_version = conn.execute(text('PRAGMA user_version')).scalar()
+        for version, step in MIGRATIONS:
+            if version > current_version:
+                step(conn)
+                conn.execute(text(f'PRAGMA user_version = {version}'))
+                current_version = version
+    return current_version
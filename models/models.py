@@ -1,9 +1,21 @@
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
+
+def utcnow():
+    # Naive UTC, the form SQLAlchemy's SQLite DateTime stores and compares
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class User(db.Model):
     __tablename__ = 'user'
+    __table_args__ = (
+        db.Index('uq_user_name', 'name', unique=True),
+        db.Index('uq_user_email', 'email', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(255), nullable=False)
@@ -12,22 +24,78 @@ class User(db.Model):
 
 class Movie(db.Model):
     __tablename__ = 'movie'
+    __table_args__ = (
+        # Catalog dedupe lookup in SQLiteDataManager.add_movie
+        db.Index('ix_movie_catalog_lookup', 'title', 'director', 'year', 'rating'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     director = db.Column(db.String(255), nullable=False)
     year = db.Column(db.Integer, nullable=False)
     rating = db.Column(db.Float, nullable=False)
     poster = db.Column(db.String(255))
+    # SHA-256 of the locally cached poster image, served from /posters/<hash>
+    poster_hash = db.Column(db.String(64), index=True)
+    # Normalized title (see omdb.cache.normalize_title), used to find catalog
+    # entries without going to OMDb. Not unique, see add_movie_title_key.
+    title_key = db.Column(db.String(255), index=True)
+    # 'pending' while details are being fetched from OMDb, then 'ready' or 'failed'
+    status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
+    # When the details were last fetched from OMDb; NULL if unknown. Older
+    # movies are refreshed by the refresh_movie background job and by
+    # `flask refresh-metadata`.
+    fetched_at = db.Column(db.DateTime, index=True)
+    # OMDb's imdbID; lets a refresh look the movie up without going by title
+    imdb_id = db.Column(db.String(16), index=True)
 
 class Review(db.Model):
     __tablename__ = 'review'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), nullable=False, index=True)
     review_text = db.Column(db.Text, nullable=False)
     rating = db.Column(db.Float, nullable=False)
 
 class UserMoviesRelationship(db.Model):
     __tablename__ = 'user_movies_relationship'
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
-    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), primary_key=True)
\ No newline at end of file
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'movie_id'),
+        # Ids are never reused, not even the newest one's after it is deleted,
+        # so the recommendation index can pick up new links by id
+        {'sqlite_autoincrement': True},
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), nullable=False, index=True)
+    added_at = db.Column(db.DateTime, default=utcnow)
+
+
+class MovieStats(db.Model):
+    """Review aggregates per movie, maintained by SQLiteDataManager.add_review."""
+    __tablename__ = 'movie_stats'
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0)
+    rating_mean = db.Column(db.Float, index=True)
+    # JSON array of review counts per rating bucket: [0-1), [1-2), ... [9-10]
+    histogram = db.Column(db.Text, nullable=False)
+
+
+class RefreshCheckpoint(db.Model):
+    """Progress of a resumable batch walk over the movie table, saved with each batch."""
+    __tablename__ = 'refresh_checkpoint'
+    name = db.Column(db.String(50), primary_key=True)
+    # Highest movie id handled in the current pass; 0 when no pass is in progress
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    pass_started_at = db.Column(db.DateTime)
+    pass_finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+
+class ResourceVersion(db.Model):
+    """Change counter per cacheable resource, bumped in the same transaction as the write."""
+    __tablename__ = 'resource_version'
+    # 'users', 'catalog', 'reviews', 'user_movies:<id>', 'user_reviews:<id>' or 'movie:<id>'
+    key = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow)
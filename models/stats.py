@@ -0,0 +1,41 @@
+import json
+
+from sqlalchemy import bindparam, text
+
+# Ratings are 0-10; bucket i counts ratings in [i, i + 1), with 10 in the last bucket.
+HISTOGRAM_BUCKETS = 10
+
+_BUCKET_SQL = 'MIN(MAX(CAST(rating AS INTEGER), 0), {last})'.format(last=HISTOGRAM_BUCKETS - 1)
+_REBUILD_SQL = (
+    'INSERT INTO movie_stats (movie_id, review_count, rating_sum, rating_mean, histogram) '
+    'SELECT movie_id, COUNT(*), SUM(rating), AVG(rating), json_array({buckets}) FROM review {where} '
+    'GROUP BY movie_id'
+)
+
+
+def rating_bucket(rating):
+    return min(max(int(rating), 0), HISTOGRAM_BUCKETS - 1)
+
+
+def empty_histogram():
+    return json.dumps([0] * HISTOGRAM_BUCKETS)
+
+
+def rebuild_movie_stats(conn, movie_ids=None):
+    """
+    Recompute movie_stats from the review table.
+
+    Args:
+        conn: SQLAlchemy connection or session.
+        movie_ids (list): Only rebuild these movies; None rebuilds everything.
+    """
+    buckets = ', '.join(f'SUM({_BUCKET_SQL} = {bucket})' for bucket in range(HISTOGRAM_BUCKETS))
+    if movie_ids is None:
+        conn.execute(text('DELETE FROM movie_stats'))
+        conn.execute(text(_REBUILD_SQL.format(buckets=buckets, where='')))
+        return
+    movie_ids = list(movie_ids)
+    conn.execute(text('DELETE FROM movie_stats WHERE movie_id IN :movie_ids').bindparams(
+        bindparam('movie_ids', expanding=True)), {'movie_ids': movie_ids})
+    conn.execute(text(_REBUILD_SQL.format(buckets=buckets, where='WHERE movie_id IN :movie_ids')).bindparams(
+        bindparam('movie_ids', expanding=True)), {'movie_ids': movie_ids})
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+
+MOVIE_EXPORT_FIELDS = ['id', 'title', 'director', 'year', 'rating', 'poster', 'status', 'added_at']
+REVIEW_EXPORT_FIELDS = ['id', 'movie_id', 'movie_title', 'review_text', 'rating']
+# Records buffered into one chunk of the streamed response
+EXPORT_CHUNK_ROWS = 200
+
+
+def ndjson_stream(records):
+    """
+    Serialize records as newline-delimited JSON, one chunk per batch of records.
+
+    Args:
+        records (iterable): Dicts to serialize; consumed lazily.
+
+    Yields:
+        str: Chunks of NDJSON text.
+    """
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def csv_stream(records, fieldnames):
+    """
+    Serialize records as CSV with a header row, one chunk per batch of records.
+
+    Args:
+        records (iterable): Dicts to serialize; consumed lazily.
+        fieldnames (list): Column order; other keys are ignored.
+
+    Yields:
+        str: Chunks of CSV text.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    rows = 0
+    for record in records:
+        writer.writerow(record)
+        rows += 1
+        if rows >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    yield buffer.getvalue()
+
+
+def user_export_records(data_manager, user):
+    """
+    Yield a user's full account export as typed records: the user, then every
+    movie in their library, then every review they wrote.
+
+    Args:
+        data_manager (SQLiteDataManager): Data manager.
+        user (UserRow): The exported user.
+    """
+    yield {'type': 'user', 'id': user.id, 'name': user.name, 'email': user.email}
+    for movie in data_manager.iter_user_movies(user.id):
+        yield dict(movie, type='movie')
+    for review in data_manager.iter_user_reviews(user.id):
+        yield dict(review, type='review')
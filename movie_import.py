@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data_manager.sqlite_data_manager import parse_omdb_movie
+from jobs.tasks import enqueue_poster_download
+from omdb.cache import normalize_title
+
+logger = logging.getLogger(__name__)
+
+
+def parse_titles(data, content_type):
+    """
+    Read a list of movie titles from a JSON or CSV payload.
+
+    JSON may be a list of titles, a list of {"title": ...} objects or an
+    object with a "titles" list. CSV uses the "title" column when there is
+    a header row, otherwise the first column.
+
+    Args:
+        data (str): Request body or file contents.
+        content_type (str): 'json' or 'csv'.
+
+    Returns:
+        list: Titles in input order, blanks removed.
+
+    Raises:
+        ValueError: If the payload cannot be parsed.
+    """
+    if content_type == 'csv':
+        rows = list(csv.reader(io.StringIO(data)))
+        if rows and 'title' in [cell.strip().lower() for cell in rows[0]]:
+            column = [cell.strip().lower() for cell in rows[0]].index('title')
+            rows = rows[1:]
+        else:
+            column = 0
+        titles = [row[column] for row in rows if len(row) > column]
+    else:
+        payload = json.loads(data)
+        if isinstance(payload, dict):
+            payload = payload.get('titles', [])
+        if not isinstance(payload, list):
+            raise ValueError('Expected a list of titles.')
+        titles = [item.get('title', '') if isinstance(item, dict) else item for item in payload]
+
+    return [title.strip() for title in titles if isinstance(title, str) and title.strip()]
+
+
+def _lookup(omdb_client, title):
+    # One bad OMDb answer fails its own title, not the whole import
+    try:
+        return omdb_client.get_movie(title)
+    except Exception:
+        logger.exception('OMDb lookup of %r failed during a bulk import', title)
+        return None
+
+
+def import_movies(data_manager, omdb_client, user_id, titles, concurrency=8, job_queue=None):
+    """
+    Add many movies to a user's library at once.
+
+    Titles already in the catalog are linked without calling OMDb; the rest
+    are resolved concurrently (at most `concurrency` requests in flight),
+    then every new Movie row and every link is written in one transaction.
+    A title whose lookup or OMDb response fails is reported as 'error' and
+    the others are still imported. Posters are not downloaded here: a
+    cache_poster job is queued for each new movie.
+
+    Args:
+        data_manager (SQLiteDataManager): Data manager.
+        omdb_client (OMDbClient): OMDb client.
+        user_id (int): User ID.
+        titles (list): Movie titles.
+        concurrency (int): Maximum concurrent OMDb requests.
+        job_queue (JobQueue): Queue for the poster downloads of new movies, if given.
+
+    Returns:
+        dict: Per-title outcomes, a summary and throughput, or None if the
+        user does not exist.
+    """
+    if data_manager.get_user_by_id(user_id) is None:
+        return None
+
+    started = time.perf_counter()
+    outcomes = [{'title': title, 'status': None, 'movie_id': None} for title in titles]
+
+    # Drop repeated titles and titles the user already has
+    owned_keys = data_manager.get_user_movie_title_keys(user_id)
+    first_by_key = {}
+    for outcome in outcomes:
+        key = normalize_title(outcome['title'])
+        if key in owned_keys:
+            outcome['status'] = 'already_added'
+        elif key in first_by_key:
+            outcome['status'] = 'duplicate'
+        else:
+            first_by_key[key] = outcome
+
+    # Titles already in the catalog need no OMDb call
+    catalog = data_manager.get_movie_ids_by_title_keys(first_by_key.keys())
+    link_ids = {}
+    for key, outcome in first_by_key.items():
+        if key in catalog:
+            outcome['status'] = 'linked'
+            link_ids[key] = catalog[key]
+
+    missing = [outcome for key, outcome in first_by_key.items() if key not in catalog]
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        responses = list(pool.map(_lookup, [omdb_client] * len(missing), [outcome['title'] for outcome in missing]))
+
+    # OMDb may answer with a title that is already in the catalog or that
+    # another title in this batch resolved to
+    resolved = {}
+    for outcome, movie_data in zip(missing, responses):
+        if movie_data is None:
+            outcome['status'] = 'error'
+        elif movie_data.get('Response') != 'True':
+            outcome['status'] = 'not_found'
+        else:
+            try:
+                fields = parse_omdb_movie(movie_data)
+                fields['title_key'] = normalize_title(fields['title'])
+            except (TypeError, ValueError):
+                logger.warning('Unusable OMDb response for %r: %r', outcome['title'], movie_data)
+                outcome['status'] = 'error'
+                continue
+            resolved.setdefault(fields['title_key'], (fields, []))[1].append(outcome)
+
+    catalog = data_manager.get_movie_ids_by_title_keys(resolved.keys())
+    new_movies = []
+    for key, (fields, resolved_outcomes) in resolved.items():
+        if key in owned_keys:
+            status = 'already_added'
+        elif key in catalog:
+            status = 'linked'
+            link_ids[key] = catalog[key]
+        else:
+            status = 'added'
+            new_movies.append(fields)
+        for outcome in resolved_outcomes:
+            outcome['status'] = status
+            outcome['key'] = key
+
+    new_ids = data_manager.bulk_add_movies(user_id, new_movies, link_ids.values())
+    link_ids.update(new_ids)
+
+    posters_queued = 0
+    if job_queue is not None:
+        # The worker processes download the posters after the response is sent
+        for movie in new_movies:
+            if movie['title_key'] in new_ids and enqueue_poster_download(
+                    job_queue, new_ids[movie['title_key']], movie['poster']) is not None:
+                posters_queued += 1
+    for outcome in outcomes:
+        key = outcome.pop('key', None) or normalize_title(outcome['title'])
+        if outcome['status'] in ('added', 'linked'):
+            outcome['movie_id'] = link_ids.get(key)
+
+    elapsed = time.perf_counter() - started
+    summary = {}
+    for outcome in outcomes:
+        summary[outcome['status']] = summary.get(outcome['status'], 0) + 1
+    return {
+        'user_id': user_id,
+        'outcomes': outcomes,
+        'summary': summary,
+        'omdb_requests': len(missing),
+        'posters_queued': posters_queued,
+        'elapsed_seconds': round(elapsed, 3),
+        'titles_per_second': round(len(titles) / elapsed, 1) if elapsed else None
+    }
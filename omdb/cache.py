@@ -0,0 +1,199 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_title(title):
+    """
+    Normalize a movie title into the key used for cache and catalog lookups.
+
+    Args:
+        title (str): Title as typed by the user or returned by OMDb.
+
+    Returns:
+        str: Case-folded title with collapsed whitespace.
+    """
+    title = unicodedata.normalize('NFKC', title or '')
+    return ' '.join(title.casefold().split())
+
+
+class CacheStats:
+    """Hit, miss and eviction counters shared by both cache tiers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'negative_hits': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'stores': 0
+        }
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded in-process cache.
+
+    Entries are stored as (payload, expires_at) tuples; expired entries are
+    dropped when they are read.
+    """
+
+    def __init__(self, max_size, stats):
+        self.max_size = max_size
+        self.stats = stats
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                self.stats.incr('expirations')
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, payload, expires_at):
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.incr('evictions')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteResponseCache:
+    """
+    On-disk cache of OMDb responses, keyed by normalized title.
+
+    Uses its own SQLite file so it survives restarts and is shared by every
+    worker process on the host.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS omdb_response ('
+                ' title_key TEXT PRIMARY KEY,'
+                ' payload TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        # One connection per thread, and a new one in forked worker processes:
+        # an SQLite handle must not be used on both sides of a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, now=None):
+        now = time.time() if now is None else now
+        row = self._connect().execute(
+            'SELECT payload, expires_at FROM omdb_response WHERE title_key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, payload, expires_at):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO omdb_response (title_key, payload, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(payload), expires_at)
+            )
+
+    def purge_expired(self, now=None):
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM omdb_response WHERE expires_at <= ?', (now,)).rowcount
+
+
+class OMDbCache:
+    """
+    Two-tier OMDb response cache: an in-process LRU in front of SQLite.
+
+    Successful lookups live for `ttl` seconds, "Movie not found!" answers for
+    `negative_ttl` seconds. Any other error response is never cached.
+    """
+
+    def __init__(self, path, max_size=1024, ttl=7 * 24 * 3600, negative_ttl=3600):
+        self.stats = CacheStats()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = LRUCache(max_size, self.stats)
+        self.disk = SQLiteResponseCache(path) if path else None
+
+    def get(self, title):
+        key = normalize_title(title)
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.stats.incr('memory_hits')
+        elif self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.stats.incr('disk_hits')
+                self.memory.set(key, *entry)
+
+        if entry is None:
+            self.stats.incr('misses')
+            return None
+
+        payload = entry[0]
+        if payload.get('Response') != 'True':
+            self.stats.incr('negative_hits')
+        return payload
+
+    def set(self, title, payload):
+        if payload.get('Response') == 'True':
+            ttl = self.ttl
+        elif is_not_found(payload):
+            ttl = self.negative_ttl
+        else:
+            return
+
+        key = normalize_title(title)
+        expires_at = time.time() + ttl
+        self.memory.set(key, payload, expires_at)
+        if self.disk is not None:
+            self.disk.set(key, payload, expires_at)
+        self.stats.incr('stores')
+
+    def get_stats(self):
+        stats = self.stats.snapshot()
+        stats['memory_size'] = len(self.memory)
+        return stats
+
+
+def is_not_found(payload):
+    return payload.get('Response') == 'False' and payload.get('Error') == 'Movie not found!'
@@ -0,0 +1,115 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+from .cache import OMDbCache
+
+DEFAULT_API_URL = 'http://www.omdbapi.com/'
+
+
+class OMDbClient:
+    """
+    Small OMDb API client with a response cache in front of it.
+
+    Requests go through one pooled keep-alive session that retries
+    connection errors and 429/5xx answers with exponential backoff.
+
+    Args:
+        api_key (str): OMDb API key.
+        api_url (str): Base URL of the API, overridable for the fake server.
+        cache (OMDbCache): Response cache, or None to disable caching.
+        timeout (tuple): (connect, read) timeouts in seconds.
+        retries (int): Retry attempts per request.
+        pool_size (int): Maximum number of pooled connections.
+    """
+
+    def __init__(self, api_key, api_url=DEFAULT_API_URL, cache=None, timeout=(3.05, 10), retries=3, pool_size=10):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.cache = cache
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_config(cls, config):
+        cache = OMDbCache(
+            config.get('OMDB_CACHE_PATH'),
+            max_size=config.get('OMDB_CACHE_SIZE', 1024),
+            ttl=config.get('OMDB_CACHE_TTL', 7 * 24 * 3600),
+            negative_ttl=config.get('OMDB_NEGATIVE_CACHE_TTL', 3600)
+        )
+        return cls(config['OMDB_API_KEY'], config.get('OMDB_API_URL', DEFAULT_API_URL), cache=cache,
+                   timeout=config.get('OMDB_TIMEOUT', (3.05, 10)), retries=config.get('OMDB_RETRIES', 3),
+                   pool_size=config.get('OMDB_POOL_SIZE', 10))
+
+    def get_movie(self, title, refresh=False):
+        """
+        Look up a movie by title, serving repeated lookups from the cache.
+
+        Args:
+            title (str): Movie title.
+            refresh (bool): Skip the cached response and replace it with a fresh one.
+
+        Returns:
+            dict: The OMDb JSON response, or None if the API could not be reached.
+        """
+        if self.cache is not None and not refresh:
+            cached = self.cache.get(title)
+            if cached is not None:
+                return cached
+
+        movie_data = self._request({'t': title})
+        if movie_data is not None and self.cache is not None:
+            self.cache.set(title, movie_data)
+        return movie_data
+
+    def get_movie_by_imdb_id(self, imdb_id):
+        """
+        Look up a movie by its IMDb ID, always asking the API.
+
+        The response cache is keyed by title, so it is not read here; a
+        found movie replaces the cached response for its title.
+
+        Args:
+            imdb_id (str): IMDb ID such as 'tt0133093'.
+
+        Returns:
+            dict: The OMDb JSON response, or None if the API could not be reached.
+        """
+        movie_data = self._request({'i': imdb_id})
+        if movie_data is not None and movie_data.get('Response') == 'True' and self.cache is not None:
+            self.cache.set(movie_data['Title'], movie_data)
+        return movie_data
+
+    def _request(self, params):
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.api_url, params={'apikey': self.api_key, **params, 'plot': 'full'},
+                                        timeout=self.timeout)
+        except requests.RequestException:
+            metrics.observe_omdb(time.perf_counter() - started, 'network_error')
+            return None
+        if response.status_code != 200:
+            metrics.observe_omdb(time.perf_counter() - started, 'http_error')
+            return None
+        try:
+            movie_data = response.json()
+        except ValueError:
+            movie_data = None
+        if not isinstance(movie_data, dict):
+            # An HTML error page or a truncated body: a failed lookup, like OMDb's own errors
+            metrics.observe_omdb(time.perf_counter() - started, 'invalid_response')
+            return {'Response': 'False', 'Error': 'Invalid response from OMDb.'}
+        metrics.observe_omdb(time.perf_counter() - started, 'ok')
+        return movie_data
+
+    def get_stats(self):
+        return self.cache.get_stats() if self.cache is not None else {}
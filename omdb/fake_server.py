@@ -0,0 +1,119 @@
+"""
+Local stand-in for the OMDb API, for tests and benchmarks.
+
+Run it with `python -m omdb.fake_server --port 8765` and point the app at it
+by setting OMDB_API_URL=http://127.0.0.1:8765/.
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .cache import normalize_title
+
+SAMPLE_MOVIES = [
+    {'Title': 'The Matrix', 'Year': '1999', 'Director': 'Lana Wachowski, Lilly Wachowski',
+     'imdbRating': '8.7', 'imdbID': 'tt0133093', 'Poster': 'N/A'},
+    {'Title': 'Inception', 'Year': '2010', 'Director': 'Christopher Nolan',
+     'imdbRating': '8.8', 'imdbID': 'tt1375666', 'Poster': 'N/A'},
+    {'Title': 'Alien', 'Year': '1979', 'Director': 'Ridley Scott',
+     'imdbRating': '8.5', 'imdbID': 'tt0078748', 'Poster': 'N/A'}
+]
+
+
+class FakeOMDbServer:
+    """
+    Threaded HTTP server answering OMDb `?t=<title>` and `?i=<imdbID>` lookups from memory.
+
+    Args:
+        movies (list): OMDb-shaped movie dicts to serve.
+        host (str): Interface to bind.
+        port (int): Port to bind, 0 picks a free one.
+        latency (float): Artificial delay per request in seconds.
+    """
+
+    def __init__(self, movies=None, host='127.0.0.1', port=0, latency=0.0):
+        self.movies = {}
+        self.movies_by_imdb_id = {}
+        for movie in movies or SAMPLE_MOVIES:
+            self.add_movie(movie)
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def add_movie(self, movie):
+        self.movies[normalize_title(movie['Title'])] = movie
+        if movie.get('imdbID'):
+            self.movies_by_imdb_id[movie['imdbID']] = movie
+
+    def lookup(self, params):
+        if 'i' in params:
+            movie = self.movies_by_imdb_id.get(params['i'][0])
+            if movie is None:
+                return {'Response': 'False', 'Error': 'Incorrect IMDb ID.'}
+        else:
+            movie = self.movies.get(normalize_title(params.get('t', [''])[0]))
+            if movie is None:
+                return {'Response': 'False', 'Error': 'Movie not found!'}
+        return dict(movie, Response='True')
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                body = json.dumps(server.lookup(parse_qs(urlparse(self.path).query))).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a fake OMDb API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--movies', help='JSON file with a list of OMDb movie objects')
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    movies = None
+    if args.movies:
+        with open(args.movies) as movies_file:
+            movies = json.load(movies_file)
+    fake = FakeOMDbServer(movies, host=args.host, port=args.port, latency=args.latency)
+    print(f'Fake OMDb API listening on {fake.url}')
+    fake._server.serve_forever()
@@ -0,0 +1,119 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class FetchQueueFull(Exception):
+    """Raised when too many OMDb fetches are already waiting."""
+
+
+class MovieFetcher:
+    """
+    Resolves pending movies against OMDb on a bounded background thread pool.
+
+    `add_movie` stores a placeholder movie with status 'pending' and hands
+    it to the fetcher, so the request returns without waiting on OMDb. The
+    worker fills in the movie once the lookup completes, or marks it
+    'failed'.
+
+    Args:
+        app (Flask): Application whose context the workers run in.
+        data_manager (SQLiteDataManager): Data manager used to store results.
+        client (OMDbClient): OMDb client.
+        max_workers (int): Worker threads; 0 resolves inline in the caller.
+        max_pending (int): Maximum queued plus running fetches.
+        poster_store (PosterStore): Caches the poster of each resolved movie, if given.
+    """
+
+    def __init__(self, app, data_manager, client, max_workers=4, max_pending=100, poster_store=None):
+        self.app = app
+        self.data_manager = data_manager
+        self.client = client
+        self.poster_store = poster_store
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='omdb-fetch') if max_workers else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.counters = {'queued': 0, 'running': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+
+    def submit(self, user_id, title):
+        """
+        Add a pending movie for the user and schedule its OMDb lookup.
+
+        Args:
+            user_id (int): User ID.
+            title (str): Movie title as entered by the user.
+
+        Returns:
+            Movie: The pending movie, or None if the user does not exist.
+
+        Raises:
+            FetchQueueFull: If max_pending fetches are already in flight.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise FetchQueueFull()
+        movie = self.data_manager.add_pending_movie(user_id, title)
+        if movie is None:
+            self._slots.release()
+            return None
+        self._schedule(movie.id, title)
+        return movie
+
+    def retry(self, movie_id, title):
+        """Re-run the lookup for a movie whose earlier fetch failed."""
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise FetchQueueFull()
+        self.data_manager.mark_movie_pending(movie_id)
+        self._schedule(movie_id, title)
+
+    def _schedule(self, movie_id, title):
+        self._count('queued')
+        if self.executor is None:
+            self._resolve(movie_id, title)
+        else:
+            self.executor.submit(self._resolve, movie_id, title)
+
+    def _resolve(self, movie_id, title):
+        self._count('queued', -1)
+        self._count('running')
+        try:
+            with self.app.app_context():
+                movie_data = self.client.get_movie(title)
+                if movie_data and movie_data.get('Response') == 'True':
+                    movie = self.data_manager.complete_pending_movie(movie_id, movie_data)
+                    self._count('completed')
+                    if self.poster_store is not None and movie is not None and movie.poster_hash is None:
+                        self._cache_poster(movie)
+                else:
+                    self.data_manager.fail_pending_movie(movie_id)
+                    self._count('failed')
+        except Exception:
+            logger.exception('OMDb fetch for movie %s (%r) failed', movie_id, title)
+            with self.app.app_context():
+                self.data_manager.fail_pending_movie(movie_id)
+            self._count('failed')
+        finally:
+            self._count('running', -1)
+            self._slots.release()
+
+    def _cache_poster(self, movie):
+        # A missing poster is not a failed fetch; the movie stays 'ready'
+        try:
+            self.poster_store.cache_movie_poster(self.data_manager, movie.id, movie.poster)
+        except Exception:
+            logger.exception('Caching the poster of movie %s failed', movie.id)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def shutdown(self, wait=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
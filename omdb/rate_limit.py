@@ -0,0 +1,49 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often the OMDb API is called.
+
+    Tokens accrue at `rate` per second up to `capacity`, so short bursts of
+    `capacity` requests go out at once while the long-run rate stays at
+    `rate`. Every request takes one token, waiting for it if the bucket is
+    empty.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (int): Most tokens the bucket holds; the largest burst.
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0 or capacity < 1:
+            raise ValueError('rate must be positive and capacity at least 1')
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        # Total seconds callers spent waiting for a token
+        self.waited = 0.0
+
+    def _take(self):
+        # Returns 0 if a token was taken, otherwise the seconds until one accrues
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Take a token, sleeping until one is available."""
+        while True:
+            delay = self._take()
+            if not delay:
+                return
+            with self._lock:
+                self.waited += delay
+            time.sleep(delay)
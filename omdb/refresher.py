@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from data_manager.sqlite_data_manager import movie_changes
+from models.models import utcnow
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'omdb_metadata'
+
+
+class MetadataRefresher:
+    """
+    Re-fetches the OMDb details of catalog movies in id-ordered batches.
+
+    Each run walks the ready movies whose details are older than `max_age`,
+    starting after the saved checkpoint. Movies are looked up by imdbID, or
+    by title until their imdbID is known. Up to `concurrency` lookups run at
+    once, and each one first takes a token from `rate_limiter`, which keeps
+    the run inside the API quota.
+
+    A batch is stored in one transaction. The rows whose values changed are
+    rewritten with one bulk UPDATE. The other rows only get a new fetched_at.
+    The checkpoint commits in the same transaction. A run stopped at any
+    point, by a crash, by `limit` or by an OMDb outage, resumes after the
+    last stored batch. When a pass reaches the end of the table, the
+    checkpoint is reset so the next run starts a new pass.
+
+    Args:
+        data_manager (SQLiteDataManager): Data manager used to read and store movies.
+        client (OMDbClient): OMDb client.
+        rate_limiter (TokenBucket): Limits OMDb requests per second.
+        max_age (float): Seconds after which a movie's details are refreshed.
+        batch_size (int): Movies per batch and transaction.
+        concurrency (int): Maximum concurrent OMDb requests.
+        name (str): Checkpoint name.
+    """
+
+    def __init__(self, data_manager, client, rate_limiter, max_age, batch_size=100, concurrency=4,
+                 name=CHECKPOINT_NAME):
+        self.data_manager = data_manager
+        self.client = client
+        self.rate_limiter = rate_limiter
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.name = name
+
+    def _fetch(self, movie, outage):
+        # After one lookup finds OMDb unreachable, the rest of the batch is not sent
+        if outage.is_set():
+            return None
+        self.rate_limiter.acquire()
+        if movie['imdb_id']:
+            movie_data = self.client.get_movie_by_imdb_id(movie['imdb_id'])
+        else:
+            movie_data = self.client.get_movie(movie['title'], refresh=True)
+        if movie_data is None:
+            outage.set()
+        return movie_data
+
+    def run(self, limit=None, restart=False, progress=None):
+        """
+        Refresh stale movies from the checkpoint on.
+
+        Stops at the end of the table, after `limit` lookups, or at the first
+        batch in which OMDb could not be reached.
+
+        Args:
+            limit (int): Maximum OMDb lookups in this run; None for no limit.
+            restart (bool): Ignore the checkpoint and start a new pass.
+            progress (callable): Called with the summary after each batch.
+
+        Returns:
+            dict: Movies fetched, changed, unknown to OMDb and unreachable,
+            the checkpoint reached, whether the pass finished, and timings.
+        """
+        started = time.perf_counter()
+        waited = self.rate_limiter.waited
+        checkpoint = self.data_manager.get_refresh_checkpoint(self.name) or {}
+        after_id = 0 if restart else checkpoint.get('last_id', 0)
+        pass_started_at = checkpoint.get('pass_started_at') if after_id else utcnow()
+        if not after_id:
+            self.data_manager.save_refresh_checkpoint(self.name, last_id=0, pass_started_at=pass_started_at)
+        fetched_before = utcnow() - timedelta(seconds=self.max_age)
+        outage = threading.Event()
+        summary = {'fetched': 0, 'changed': 0, 'not_found': 0, 'unreachable': 0, 'last_id': after_id,
+                   'finished': False}
+
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency), thread_name_prefix='omdb-refresh') as pool:
+            while limit is None or summary['fetched'] + summary['unreachable'] < limit:
+                size = self.batch_size if limit is None else min(
+                    self.batch_size, limit - summary['fetched'] - summary['unreachable'])
+                movies = self.data_manager.get_stale_movies(fetched_before, after_id=after_id, limit=size)
+                if not movies:
+                    self.data_manager.save_refresh_checkpoint(self.name, last_id=0, pass_finished_at=utcnow())
+                    summary['finished'] = True
+                    break
+
+                changes = {}
+                fetched_ids = []
+                # The checkpoint may only pass movies that were actually fetched
+                resume_id = movies[-1]['id']
+                for index, movie_data in enumerate(pool.map(self._fetch, movies, [outage] * len(movies))):
+                    movie = movies[index]
+                    if movie_data is None:
+                        if not summary['unreachable']:
+                            resume_id = movies[index - 1]['id'] if index else after_id
+                        summary['unreachable'] += 1
+                        continue
+                    fetched_ids.append(movie['id'])
+                    if movie_data.get('Response') != 'True':
+                        summary['not_found'] += 1
+                        continue
+                    movie_changed = movie_changes(movie, movie_data)
+                    if movie_changed:
+                        changes[movie['id']] = movie_changed
+                summary['fetched'] += len(fetched_ids)
+                summary['changed'] += len(changes)
+
+                self.data_manager.apply_movie_refreshes(changes, fetched_ids, checkpoint={
+                    'name': self.name, 'last_id': resume_id, 'pass_started_at': pass_started_at
+                })
+                after_id = summary['last_id'] = resume_id
+                if progress is not None:
+                    progress(summary)
+                if summary['unreachable']:
+                    logger.warning('OMDb could not be reached; metadata refresh stopped after movie %s', after_id)
+                    break
+
+        elapsed = time.perf_counter() - started
+        summary['elapsed_seconds'] = round(elapsed, 2)
+        summary['requests_per_second'] = round((summary['fetched'] + summary['unreachable']) / elapsed, 1)
+        summary['rate_limited_seconds'] = round(self.rate_limiter.waited - waited, 2)
+        return summary
@@ -0,0 +1,294 @@
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+try:
+    from PIL import Image, UnidentifiedImageError
+except ImportError:  # Thumbnails need Pillow; without it only originals are served
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+POSTER_HASH_RE = re.compile(r'[0-9a-f]{64}')
+# Upstream posters are a few hundred KB; anything far larger is not a poster
+MAX_DOWNLOAD_BYTES = 5 * 1024 * 1024
+# Re-touching a file on every read would turn reads into writes
+TOUCH_INTERVAL = 3600
+
+# Magic numbers of the formats OMDb posters come in
+IMAGE_SIGNATURES = [(b'\xff\xd8\xff', 'jpg'), (b'\x89PNG\r\n\x1a\n', 'png'), (b'GIF8', 'gif')]
+MIMETYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif', 'webp': 'image/webp'}
+# Hosts OMDb poster URLs point at; subdomains are allowed too. Poster URLs
+# also arrive from API clients, so nothing else is ever fetched.
+POSTER_HOSTS = ('media-amazon.com', 'ssl-images-amazon.com', 'images-amazon.com', 'media-imdb.com', 'omdbapi.com')
+
+
+def is_poster_url(url, hosts=POSTER_HOSTS):
+    """Return whether `url` is an http(s) URL on one of the poster hosts."""
+    try:
+        parts = urlsplit(url or '')
+        host = (parts.hostname or '').rstrip('.').lower()
+    except ValueError:
+        return False
+    if parts.scheme not in ('http', 'https') or parts.username or parts.password:
+        return False
+    return any(host == allowed or host.endswith('.' + allowed) for allowed in hosts)
+
+
+def resolves_to_public_address(host):
+    """Return whether every address `host` resolves to is a public one."""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except (OSError, UnicodeError):
+        return False
+    return bool(addresses) and all(ipaddress.ip_address(address.split('%')[0]).is_global for address in addresses)
+
+
+def sniff_image(data):
+    """Return the file extension of JPEG/PNG/GIF/WebP bytes, or None."""
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    return None
+
+
+class PosterStore:
+    """
+    Content-addressed on-disk cache of movie posters and their thumbnails.
+
+    A poster is stored once under the SHA-256 of the downloaded image, so a
+    poster URL never changes content and can be cached by clients forever.
+    When Pillow is installed, a thumbnail is written next to the original in
+    WebP and JPEG. Total size is capped; the least recently served posters
+    are evicted first, using file modification times as the access clock.
+
+    Args:
+        root (str): Directory the posters are stored in.
+        max_bytes (int): Size cap for all stored files.
+        thumb_width (int): Thumbnail width in pixels.
+        timeout (tuple): (connect, read) download timeouts in seconds.
+        hosts (tuple): Hosts posters may be downloaded from, see POSTER_HOSTS.
+    """
+
+    def __init__(self, root, max_bytes=500 * 1024 * 1024, thumb_width=300, timeout=(3.05, 10), hosts=POSTER_HOSTS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.thumb_width = thumb_width
+        self.timeout = timeout
+        self.hosts = tuple(hosts)
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.counters = {'downloads': 0, 'download_errors': 0, 'stores': 0, 'evictions': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['POSTER_CACHE_PATH'], max_bytes=config.get('POSTER_CACHE_MAX_BYTES', 500 * 1024 * 1024),
+                   thumb_width=config.get('POSTER_THUMB_WIDTH', 300))
+
+    def is_allowed(self, url):
+        """Return whether `url` is on a poster host and resolves to public addresses only."""
+        return is_poster_url(url, self.hosts) and resolves_to_public_address(urlsplit(url).hostname)
+
+    def _directory(self, poster_hash):
+        return os.path.join(self.root, poster_hash[:2])
+
+    def _variants(self, poster_hash):
+        directory = self._directory(poster_hash)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in os.listdir(directory) if name.startswith(poster_hash)]
+
+    def download(self, url):
+        """
+        Download a poster and store it. URLs off the poster hosts, or on
+        hosts that resolve to private or loopback addresses, are refused.
+
+        Args:
+            url (str): Upstream poster URL.
+
+        Returns:
+            str: The poster hash, or None if the URL did not yield an image.
+        """
+        if not self.is_allowed(url):
+            logger.warning('Poster URL %r is not on an allowed poster host, skipped', url)
+            return None
+        try:
+            # A redirect could lead anywhere, so it is not followed
+            with self.session.get(url, timeout=self.timeout, stream=True, allow_redirects=False) as response:
+                response.raise_for_status()
+                data = response.raw.read(MAX_DOWNLOAD_BYTES + 1, decode_content=True)
+        except requests.RequestException as error:
+            logger.warning('Poster download from %s failed: %s', url, error)
+            self._count('download_errors')
+            return None
+        self._count('downloads')
+        if len(data) > MAX_DOWNLOAD_BYTES:
+            logger.warning('Poster at %s is larger than %d bytes, skipped', url, MAX_DOWNLOAD_BYTES)
+            return None
+        return self.store(data)
+
+    def store(self, data):
+        """
+        Store poster image bytes and their thumbnails.
+
+        Returns:
+            str: The poster hash, or None if the bytes are not an image.
+        """
+        extension = sniff_image(data)
+        if extension is None:
+            return None
+        poster_hash = hashlib.sha256(data).hexdigest()
+        if self._variants(poster_hash):
+            return poster_hash
+
+        os.makedirs(self._directory(poster_hash), exist_ok=True)
+        written = self._write(f'{poster_hash}.{extension}', poster_hash, data)
+        for name, thumbnail in self._thumbnails(data):
+            written += self._write(f'{poster_hash}-{name}', poster_hash, thumbnail)
+        self._count('stores')
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += written
+        if self._current_size() > self.max_bytes:
+            self.evict()
+        return poster_hash
+
+    def _write(self, name, poster_hash, data):
+        # Write to a temporary file first, so readers never see half a poster
+        directory = self._directory(poster_hash)
+        handle, temporary_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(handle, 'wb') as temporary_file:
+            temporary_file.write(data)
+        os.replace(temporary_path, os.path.join(directory, name))
+        return len(data)
+
+    def _thumbnails(self, data):
+        if Image is None:
+            return []
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.thumbnail((self.thumb_width, self.thumb_width * 3))
+                image = image.convert('RGB')
+                thumbnails = []
+                for extension, image_format in (('webp', 'WEBP'), ('jpg', 'JPEG')):
+                    output = io.BytesIO()
+                    image.save(output, image_format, quality=80)
+                    thumbnails.append((f'thumb.{extension}', output.getvalue()))
+                return thumbnails
+        except (Image.DecompressionBombError, UnidentifiedImageError, OSError, ValueError) as error:
+            # The original is still stored and served; only the thumbnails are skipped
+            logger.warning('Could not make poster thumbnails: %s', error)
+            return []
+
+    def find(self, poster_hash, size='full', accept_webp=False):
+        """
+        Locate the stored file for a poster, preferring WebP thumbnails when
+        the client accepts them.
+
+        Args:
+            poster_hash (str): Poster hash.
+            size (str): 'full' or 'thumb'; falls back to the original when
+                there is no thumbnail.
+            accept_webp (bool): Whether the client accepts image/webp.
+
+        Returns:
+            tuple: (path, mimetype), or None if the poster is not stored.
+        """
+        if not POSTER_HASH_RE.fullmatch(poster_hash or ''):
+            return None
+        paths = {os.path.basename(path)[len(poster_hash):]: path for path in self._variants(poster_hash)}
+        candidates = []
+        if size == 'thumb':
+            candidates += ['-thumb.webp'] if accept_webp else []
+            candidates += ['-thumb.jpg']
+        candidates += [f'.{extension}' for extension in MIMETYPES]
+        for suffix in candidates:
+            if suffix in paths:
+                self._touch(paths.values())
+                return paths[suffix], MIMETYPES[suffix.rsplit('.', 1)[1]]
+        return None
+
+    def _touch(self, paths):
+        now = time.time()
+        for path in paths:
+            try:
+                if now - os.path.getmtime(path) > TOUCH_INTERVAL:
+                    os.utime(path, (now, now))
+            except OSError:
+                pass
+
+    def _scan(self):
+        """Group the stored files by poster hash: {hash: (last_used, bytes, paths)}."""
+        posters = {}
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                last_used, size, paths = posters.get(name[:64], (0, 0, []))
+                posters[name[:64]] = (max(last_used, stat.st_mtime), size + stat.st_size, paths + [path])
+        return posters
+
+    def _current_size(self):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan().values())
+            return self._total_bytes
+
+    def evict(self):
+        """Remove the least recently served posters until the store is under 90% of its cap."""
+        with self._lock:
+            posters = sorted(self._scan().values())
+            total = sum(size for _, size, _ in posters)
+            target = self.max_bytes * 0.9
+            for _, size, paths in posters:
+                if total <= target:
+                    break
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+                self.counters['evictions'] += 1
+            self._total_bytes = total
+
+    def cache_movie_poster(self, data_manager, movie_id, url):
+        """
+        Download a movie's poster and record its hash on the movie.
+
+        Returns:
+            str: The poster hash, or None if the poster could not be stored.
+        """
+        poster_hash = self.download(url)
+        if poster_hash is not None:
+            data_manager.set_movie_poster_hashes({movie_id: poster_hash})
+        return poster_hash
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def get_stats(self):
+        stats = {'bytes': self._current_size(), 'max_bytes': self.max_bytes, 'thumbnails': Image is not None}
+        with self._lock:
+            stats.update(self.counters)
+        return stats
@@ -0,0 +1,384 @@
+import heapq
+import logging
+import math
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from operator import itemgetter
+
+from sqlalchemy import text
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # Without NumPy/SciPy full builds run in pure Python; the results are the same
+    np = sparse = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 50
+# Added to the cosine denominator, so pairs only a user or two share score low
+SHRINKAGE = 5.0
+# Only a user's first interactions count toward similarities: a library of
+# thousands of movies adds millions of pairs but little signal
+MAX_USER_ITEMS = 300
+# Highest-weighted library movies whose neighbors are scored for a user
+MAX_SEED_ITEMS = 200
+SNAPSHOT_VERSION = 1
+
+
+def interaction_weight(rating_sum=0.0, rating_count=0):
+    """A library movie weighs 1.0; reviews scale it from 0.5 (mean rating 0) to 1.5 (mean rating 10)."""
+    if not rating_count:
+        return 1.0
+    return 0.5 + rating_sum / rating_count / 10
+
+
+def top_neighbors(similarities, top_k):
+    return tuple(heapq.nlargest(top_k, similarities.items(), key=itemgetter(1)))
+
+
+def load_interactions(session, after_link_rowid=0, after_review_id=0):
+    """
+    Read the library links and reviews written after the given watermarks.
+
+    Link rowids are AUTOINCREMENT ids and reviews are never deleted, so no
+    id is reused and every row inserted after the watermarks is read.
+
+    Returns:
+        tuple: (rowid, user_id, movie_id) link rows and
+        (id, user_id, movie_id, rating) review rows, oldest first.
+    """
+    links = session.execute(text(
+        'SELECT rowid, user_id, movie_id FROM user_movies_relationship WHERE rowid > :after ORDER BY rowid'
+    ), {'after': after_link_rowid}).all()
+    reviews = session.execute(text(
+        'SELECT id, user_id, movie_id, rating FROM review WHERE id > :after ORDER BY id'
+    ), {'after': after_review_id}).all()
+    return links, reviews
+
+
+def _python_neighbors(contributions, norms, top_k):
+    dots = defaultdict(lambda: defaultdict(float))
+    for items in contributions.values():
+        pairs = list(items.items())
+        for movie_id, weight in pairs:
+            row = dots[movie_id]
+            for other_id, other_weight in pairs:
+                if other_id != movie_id:
+                    row[other_id] += weight * other_weight
+    return {
+        movie_id: top_neighbors({other_id: dot / (math.sqrt(norms[movie_id] * norms[other_id]) + SHRINKAGE)
+                                 for other_id, dot in row.items()}, top_k)
+        for movie_id, row in dots.items() if row
+    }
+
+
+def _sparse_neighbors(contributions, top_k):
+    # Users x movies weight matrix; X.T @ X holds every pairwise dot product
+    movie_ids = sorted({movie_id for items in contributions.values() for movie_id in items})
+    column = {movie_id: index for index, movie_id in enumerate(movie_ids)}
+    rows, columns, weights = [], [], []
+    for row, items in enumerate(contributions.values()):
+        for movie_id, weight in items.items():
+            rows.append(row)
+            columns.append(column[movie_id])
+            weights.append(weight)
+    matrix = sparse.csr_matrix((weights, (rows, columns)), shape=(len(contributions), len(movie_ids)))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    dots = (matrix.T @ matrix).tocsr()
+    dots.setdiag(0)
+    dots.eliminate_zeros()
+    row_index = np.repeat(np.arange(len(movie_ids)), np.diff(dots.indptr))
+    similarities = dots.data / (norms[row_index] * norms[dots.indices] + SHRINKAGE)
+
+    neighbors = {}
+    for index, movie_id in enumerate(movie_ids):
+        start, end = dots.indptr[index], dots.indptr[index + 1]
+        if start == end:
+            continue
+        row = similarities[start:end]
+        best = np.argpartition(-row, top_k)[:top_k] if end - start > top_k else np.arange(end - start)
+        best = best[np.argsort(-row[best])]
+        neighbors[movie_id] = tuple((movie_ids[dots.indices[start + i]], float(row[i])) for i in best)
+    return neighbors
+
+
+class RecommendationModel:
+    """
+    Item-item model over the user x movie interaction matrix.
+
+    Every movie in a library, or with a review, is an interaction weighted
+    by the user's mean rating (interaction_weight). Movies are compared by
+    shrunk cosine similarity of their interaction columns and the top_k
+    neighbors of each are kept. A user is recommended the neighbors of their
+    library, scored by similarity times the weight of the movie they came
+    from.
+
+    Readers never lock: dicts they iterate are replaced, not mutated.
+    """
+
+    def __init__(self, top_k=DEFAULT_TOP_K):
+        self.top_k = top_k
+        self.items_by_user = {}  # user -> {movie: weight}, every interaction
+        self.contributions = {}  # user -> {movie: weight}, at most MAX_USER_ITEMS per user
+        self.users_by_item = {}  # movie -> {user: weight}, contributions transposed
+        self.norms = {}  # movie -> sum of squared contributed weights
+        self.ratings = {}  # (user, movie) -> [rating sum, rating count]
+        self.neighbors = {}  # movie -> ((movie, similarity), ...), best first
+        self.last_link_rowid = 0
+        self.last_review_id = 0
+        self.built_at = None
+        self.build_seconds = None
+
+    @classmethod
+    def build(cls, links, reviews, top_k=DEFAULT_TOP_K):
+        """Build the full model from the rows returned by load_interactions."""
+        started = time.perf_counter()
+        model = cls(top_k)
+        for review_id, user_id, movie_id, rating in reviews:
+            model._add_rating(user_id, movie_id, rating)
+            model.last_review_id = review_id
+        for rowid, user_id, movie_id in links:
+            model._set_weight(user_id, movie_id, copy=False)
+            model.last_link_rowid = rowid
+        # Reviewed movies that are no longer in the library
+        for user_id, movie_id in model.ratings:
+            model._set_weight(user_id, movie_id, copy=False)
+
+        if sparse is not None:
+            model.neighbors = _sparse_neighbors(model.contributions, top_k)
+        else:
+            model.neighbors = _python_neighbors(model.contributions, model.norms, top_k)
+        model.built_at = time.time()
+        model.build_seconds = round(time.perf_counter() - started, 3)
+        return model
+
+    def _add_rating(self, user_id, movie_id, rating):
+        total = self.ratings.setdefault((user_id, movie_id), [0.0, 0])
+        total[0] += rating
+        total[1] += 1
+
+    def _set_weight(self, user_id, movie_id, copy=True):
+        """Store the current weight of an interaction; returns whether similarities changed."""
+        weight = interaction_weight(*self.ratings.get((user_id, movie_id), (0.0, 0)))
+        items = self.items_by_user.get(user_id, {})
+        if items.get(movie_id) == weight:
+            return False
+        if copy:
+            self.items_by_user[user_id] = {**items, movie_id: weight}
+        else:
+            self.items_by_user.setdefault(user_id, items)[movie_id] = weight
+
+        contributed = self.contributions.setdefault(user_id, {})
+        if movie_id not in contributed and len(contributed) >= MAX_USER_ITEMS:
+            return False
+        previous = contributed.get(movie_id, 0.0)
+        contributed[movie_id] = weight
+        self.users_by_item.setdefault(movie_id, {})[user_id] = weight
+        self.norms[movie_id] = self.norms.get(movie_id, 0.0) + weight * weight - previous * previous
+        return True
+
+    def _update_neighbors(self, movie_id):
+        # Only pairs involving movie_id changed: recompute its row exactly and
+        # patch its entry into the rows of the movies it co-occurs with.
+        dots = defaultdict(float)
+        for user_id, weight in self.users_by_item[movie_id].items():
+            for other_id, other_weight in self.contributions[user_id].items():
+                if other_id != movie_id:
+                    dots[other_id] += weight * other_weight
+        norm = self.norms[movie_id]
+        similarities = {other_id: dot / (math.sqrt(norm * self.norms[other_id]) + SHRINKAGE)
+                        for other_id, dot in dots.items()}
+        self.neighbors[movie_id] = top_neighbors(similarities, self.top_k)
+
+        for other_id, similarity in similarities.items():
+            current = self.neighbors.get(other_id, ())
+            if (len(current) < self.top_k or similarity > current[-1][1]
+                    or any(neighbor_id == movie_id for neighbor_id, _ in current)):
+                merged = dict(current)
+                merged[movie_id] = similarity
+                self.neighbors[other_id] = top_neighbors(merged, self.top_k)
+
+    def apply(self, links, reviews):
+        """
+        Fold new link and review rows (from load_interactions) into the model.
+
+        Returns:
+            int: Number of (user, movie) interactions updated.
+        """
+        changed = dict.fromkeys((user_id, movie_id) for _, user_id, movie_id in links)
+        if links:
+            self.last_link_rowid = max(self.last_link_rowid, links[-1][0])
+        for review_id, user_id, movie_id, rating in reviews:
+            self._add_rating(user_id, movie_id, rating)
+            changed[(user_id, movie_id)] = None
+            self.last_review_id = max(self.last_review_id, review_id)
+        for user_id, movie_id in changed:
+            if self._set_weight(user_id, movie_id):
+                self._update_neighbors(movie_id)
+        return len(changed)
+
+    def recommend(self, user_id, limit):
+        """Return up to `limit` (movie_id, score) pairs not in the user's library, best first."""
+        items = self.items_by_user.get(user_id)
+        if not items:
+            return []
+        seeds = items.items()
+        if len(items) > MAX_SEED_ITEMS:
+            seeds = heapq.nlargest(MAX_SEED_ITEMS, seeds, key=itemgetter(1))
+        scores = defaultdict(float)
+        for movie_id, weight in seeds:
+            for other_id, similarity in self.neighbors.get(movie_id, ()):
+                if other_id not in items:
+                    scores[other_id] += weight * similarity
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+
+class RecommendationIndex:
+    """
+    Serves recommendations from an in-memory RecommendationModel and keeps it current.
+
+    The model is built from scratch (vectorized with NumPy/SciPy when they
+    are installed) by `precompute-recommendations` or on first use, and
+    saved to `snapshot_path` so restarts only load it. After that, links and
+    reviews newer than the model's rowid watermarks are folded in every
+    `sync_interval` seconds on a background thread: each changed movie only
+    has its own neighbor list recomputed. Removed links stay in the model
+    until the next full rebuild, after `rebuild_interval` seconds.
+
+    Args:
+        app (Flask): Application whose context the background thread runs in.
+        db (SQLAlchemy): Database the interactions are read from.
+        snapshot_path (str): Pickle file the built model is saved to and loaded from, or None.
+        top_k (int): Neighbors kept per movie.
+        sync_interval (float): Seconds between syncs; 0 syncs inline before every read.
+        rebuild_interval (float): Age in seconds after which the model is rebuilt.
+    """
+
+    def __init__(self, app, db, snapshot_path=None, top_k=DEFAULT_TOP_K, sync_interval=1.0,
+                 rebuild_interval=24 * 3600):
+        self.app = app
+        self.db = db
+        self.snapshot_path = snapshot_path
+        self.top_k = top_k
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.model = None
+        # One writer at a time; _lock only guards the counters
+        self._write_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.counters = {'builds': 0, 'snapshot_loads': 0, 'syncs': 0, 'interactions_applied': 0, 'sync_errors': 0}
+
+    def recommend(self, user_id, limit):
+        """
+        Recommend movies for a user.
+
+        Returns:
+            list: (movie_id, score) pairs, best first, or None while the
+            model is still being built.
+        """
+        if not self.sync_interval:
+            self.refresh()
+        elif self._thread is None:
+            self._start()
+        model = self.model
+        if model is None:
+            return None
+        return model.recommend(user_id, limit)
+
+    def _start(self):
+        with self._write_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='recommendations', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    self.refresh()
+            except Exception:
+                logger.exception('Updating the recommendation model failed')
+                self._count('sync_errors')
+            self._stop.wait(self.sync_interval)
+
+    def refresh(self):
+        """Load or rebuild the model if it is missing or too old, else fold in new interactions."""
+        with self._write_lock:
+            if self.model is None:
+                self.model = self._load_snapshot()
+            if self.model is None or time.time() - self.model.built_at > self.rebuild_interval:
+                self._rebuild()
+                return
+            links, reviews = load_interactions(self.db.session, self.model.last_link_rowid,
+                                               self.model.last_review_id)
+            self._count('syncs')
+            if links or reviews:
+                self._count('interactions_applied', self.model.apply(links, reviews))
+
+    def rebuild(self):
+        """Build the model from scratch, save its snapshot and serve it."""
+        with self._write_lock:
+            return self._rebuild()
+
+    def _rebuild(self):
+        model = RecommendationModel.build(*load_interactions(self.db.session), top_k=self.top_k)
+        self._save_snapshot(model)
+        self.model = model
+        self._count('builds')
+        logger.info('Built recommendations for %d movies in %.2fs', len(model.neighbors), model.build_seconds)
+        return model
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'rb') as snapshot:
+                version, model = pickle.load(snapshot)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            logger.warning('Ignoring unreadable recommendation snapshot %s', self.snapshot_path)
+            return None
+        if version != SNAPSHOT_VERSION or model.top_k != self.top_k:
+            return None
+        self._count('snapshot_loads')
+        return model
+
+    def _save_snapshot(self, model):
+        if not self.snapshot_path:
+            return
+        directory = os.path.dirname(self.snapshot_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial snapshot
+        handle, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as snapshot:
+                pickle.dump((SNAPSHOT_VERSION, model), snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self.snapshot_path)
+        except OSError:
+            logger.exception('Saving the recommendation snapshot failed')
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def get_stats(self):
+        model = self.model
+        stats = dict(self.counters, ready=model is not None, backend='scipy' if sparse is not None else 'python')
+        if model is not None:
+            stats.update(users=len(model.items_by_user), movies=len(model.neighbors),
+                         built_at=model.built_at, build_seconds=model.build_seconds,
+                         last_link_rowid=model.last_link_rowid, last_review_id=model.last_review_id)
+        return stats
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
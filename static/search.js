@@ -0,0 +1,69 @@
+// Search-as-you-type against /api/search for every form.search-box on the page.
+// On the add movie page, picking a movie fills in the title field so the
+// existing catalog entry is linked instead of fetched from OMDb again.
+(function () {
+    function renderResults(list, results, titleInput) {
+        list.innerHTML = '';
+        results.movies.forEach(function (movie) {
+            var item = document.createElement('li');
+            item.textContent = movie.title + ' (' + movie.year + ') - ' + movie.director;
+            if (titleInput) {
+                item.className = 'search-pick';
+                item.addEventListener('click', function () {
+                    titleInput.value = movie.title;
+                    list.innerHTML = '';
+                });
+            }
+            list.appendChild(item);
+        });
+        results.reviews.forEach(function (review) {
+            var item = document.createElement('li');
+            item.textContent = review.movie_title + ': "' + review.snippet + '" by ' + review.user_name;
+            list.appendChild(item);
+        });
+        if (!results.movies.length && !results.reviews.length) {
+            var empty = document.createElement('li');
+            empty.textContent = 'No matches.';
+            list.appendChild(empty);
+        } else if (results.fuzzy) {
+            var hint = document.createElement('li');
+            hint.className = 'search-hint';
+            hint.textContent = 'No exact matches, showing similar titles.';
+            list.insertBefore(hint, list.firstChild);
+        }
+    }
+
+    document.querySelectorAll('form.search-box').forEach(function (form) {
+        var input = form.querySelector('input[name="q"]');
+        var list = form.querySelector('.search-results');
+        var titleInput = document.getElementById(form.dataset.fillTitle);
+        var timer = null;
+        var latest = 0;
+
+        function search() {
+            var query = input.value.trim();
+            var requestId = ++latest;
+            if (!query) {
+                list.innerHTML = '';
+                return;
+            }
+            fetch('/api/search?limit=8&q=' + encodeURIComponent(query))
+                .then(function (response) { return response.json(); })
+                .then(function (results) {
+                    // Ignore answers to queries the user has already typed past
+                    if (requestId === latest) {
+                        renderResults(list, results, titleInput);
+                    }
+                });
+        }
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(search, 200);
+        });
+        form.addEventListener('submit', function (event) {
+            event.preventDefault();
+            search();
+        });
+    });
+})();
@@ -0,0 +1,85 @@
+"""
+Shared fixtures.
+
+app.py keeps its database and caches in ./data and wires everything up at
+import time, so the tests import it once, from a scratch directory, with
+the background OMDb fetcher disabled. Every test starts from empty tables
+and empty caches.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MOVIE_DEFAULTS = {'Director': 'Jane Doe', 'Year': '2000', 'imdbRating': '7.0', 'Poster': 'N/A', 'Response': 'True'}
+
+
+def omdb_movie(title, **fields):
+    """An OMDb API response for `title`."""
+    return dict(MOVIE_DEFAULTS, Title=title, **fields)
+
+
+@pytest.fixture(scope='session')
+def workdir(tmp_path_factory):
+    return tmp_path_factory.mktemp('app')
+
+
+@pytest.fixture(scope='session')
+def application(workdir):
+    os.chdir(workdir)
+    os.environ.update(OMDB_FETCH_WORKERS='0', LOG_LEVEL='WARNING', OMDB_API_URL='http://127.0.0.1:9/')
+    import app as application
+    yield application
+    application.recommendation_index.shutdown()
+
+
+@pytest.fixture
+def app(application):
+    from extensions import data_manager
+    from models.models import db
+
+    with application.app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+    data_manager.backend.clear()
+    application.fragment_cache.clear()
+    return application.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def data_manager(app):
+    from extensions import data_manager
+
+    with app.app_context():
+        yield data_manager
+
+
+@pytest.fixture
+def write(app):
+    """
+    Run a data manager call in its own app context, as a separate request would.
+
+    Test client requests reuse an app context that is already pushed, and
+    with it the per-request memo in `g`, so tests that mix writes and HTTP
+    requests write through this instead of the data_manager fixture.
+    """
+    from extensions import data_manager
+
+    def write(method, *args):
+        with app.app_context():
+            return getattr(data_manager, method)(*args)
+    return write
+
+
+@pytest.fixture
+def user(data_manager):
+    return data_manager.create_user_if_absent('Alice', 'alice@example.com')
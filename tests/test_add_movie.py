@@ -0,0 +1,90 @@
+from conftest import omdb_movie
+from data_manager.rows import MovieRow, ReviewRow
+
+
+def test_existing_library_movie_is_found_by_normalized_title(data_manager, user):
+    movie = data_manager.add_movie(user['id'], omdb_movie('The Matrix'))
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+
+    assert data_manager.get_user_movie_by_title(user['id'], '  the MATRIX ').id == movie.id
+    assert data_manager.get_user_movie_by_title(other['id'], 'The Matrix') is None
+    assert data_manager.get_user_movie_by_title(user['id'], 'Matrix') is None
+
+
+def test_adding_a_movie_the_user_has_shows_it_instead(client, data_manager, user):
+    data_manager.add_movie(user['id'], omdb_movie('The Matrix', Director='Lana Wachowski'))
+
+    response = client.post(f"/users/{user['id']}/add_movie", data={'title': 'the matrix'})
+
+    assert response.status_code == 200
+    assert b'Director: Lana Wachowski' in response.data
+    assert len(data_manager.get_user_movies(user['id'])) == 1
+
+
+def test_missing_or_blank_title_is_rejected(client, data_manager, user):
+    assert client.post(f"/users/{user['id']}/add_movie", data={}).status_code == 400
+    assert client.post(f"/users/{user['id']}/add_movie", data={'title': '   '}).status_code == 400
+    assert data_manager.get_user_movies(user['id']) == []
+
+
+def test_pending_movie_completes_in_place(data_manager, user):
+    pending = data_manager.add_pending_movie(user['id'], ' Heat ')
+    assert data_manager.get_movie_status(pending.id)['status'] == 'pending'
+
+    movie = data_manager.complete_pending_movie(pending.id, omdb_movie('Heat', Director='Michael Mann'))
+
+    assert isinstance(pending, MovieRow) and isinstance(movie, MovieRow)
+    assert movie.id == pending.id
+    assert (movie.title, movie.status) == ('Heat', 'ready')
+    assert data_manager.get_user_movie(user['id'], pending.id).director == 'Michael Mann'
+    assert data_manager.get_movie_status(pending.id)['status'] == 'ready'
+
+
+def test_pending_movie_merges_into_the_catalog_movie_it_resolves_to(data_manager, user):
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+    catalog_movie = data_manager.add_movie(other['id'], omdb_movie('The Matrix'))
+    pending = data_manager.add_pending_movie(user['id'], 'Matrix, The')
+    assert isinstance(data_manager.add_review(user['id'], pending.id, 'Great', 9), ReviewRow)
+
+    merged = data_manager.complete_pending_movie(pending.id, omdb_movie('The Matrix'))
+
+    assert merged == catalog_movie
+    assert [movie.id for movie in data_manager.get_user_movies(user['id'])] == [catalog_movie.id]
+    assert data_manager.get_movie_status(pending.id) is None
+    assert [review.movie_id for review in data_manager.get_movie_reviews(catalog_movie.id)] == [catalog_movie.id]
+    assert data_manager.get_movie_stats(catalog_movie.id)['review_count'] == 1
+
+
+def test_failed_pending_movie_is_kept_as_failed(data_manager, user):
+    pending = data_manager.add_pending_movie(user['id'], 'No Such Film')
+
+    data_manager.fail_pending_movie(pending.id)
+
+    assert data_manager.get_movie_status(pending.id)['status'] == 'failed'
+    assert data_manager.get_movie_by_title('No Such Film') is None
+
+
+def test_pending_catalog_movie_is_not_linked_to_other_users(client, data_manager, user, application, monkeypatch):
+    data_manager.add_pending_movie(user['id'], 'Heat')
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+    submitted = []
+    monkeypatch.setattr(application.movie_fetcher, 'submit',
+                        lambda user_id, title: submitted.append((user_id, title)) or object())
+
+    response = client.post(f"/users/{other['id']}/add_movie", data={'title': 'heat'})
+
+    assert response.status_code == 302
+    assert submitted == [(other['id'], 'heat')]
+    assert data_manager.get_user_movies(other['id']) == []
+
+
+def test_concurrent_lookups_of_one_title_end_up_as_one_movie(data_manager, user):
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+    first = data_manager.add_pending_movie(user['id'], 'Heat')
+    second = data_manager.add_pending_movie(other['id'], 'heat')
+
+    data_manager.complete_pending_movie(first.id, omdb_movie('Heat'))
+    merged = data_manager.complete_pending_movie(second.id, omdb_movie('Heat'))
+
+    assert merged.id == first.id
+    assert [movie.id for movie in data_manager.get_user_movies(other['id'])] == [first.id]
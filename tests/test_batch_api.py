@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from conftest import omdb_movie
+
+
+@pytest.fixture
+def library(data_manager, user):
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+    heat = data_manager.add_movie(user['id'], omdb_movie('Heat'))
+    alien = data_manager.add_movie(user['id'], omdb_movie('Alien'))
+    data_manager.add_existing_movie(other['id'], heat.id)
+    data_manager.add_review(user['id'], heat.id, 'Tense', 8)
+    return {'users': [user['id'], other['id']], 'movies': [heat.id, alien.id]}
+
+
+def test_user_batch_keeps_the_requested_order_and_reports_missing_ids(client, library):
+    alice, bob = library['users']
+
+    response = client.get(f'/api/users?ids={bob},404,{alice}&include=movies,reviews')
+
+    assert response.status_code == 200
+    assert [user['id'] for user in response.json['users']] == [bob, alice]
+    assert response.json['missing'] == [404]
+    assert [movie['title'] for movie in response.json['users'][1]['movies']] == ['Alien', 'Heat']
+    assert [review['review_text'] for review in response.json['users'][1]['reviews']] == ['Tense']
+
+
+def test_user_batch_dates_match_the_library_pages(client, library):
+    alice = library['users'][0]
+
+    batch = client.get(f'/api/users?ids={alice}&include=movies').json['users'][0]['movies']
+    page = client.get(f'/api/users/{alice}/movies').json['movies']
+
+    assert [movie['added_at'] for movie in batch] == [movie['added_at'] for movie in page]
+    datetime.fromisoformat(batch[0]['added_at'])
+
+
+def test_sparse_fields_select_only_those_columns(client, library):
+    alice = library['users'][0]
+
+    response = client.get(f'/api/users?ids={alice}&include=movies&fields[users]=name&fields[movies]=title')
+
+    user = response.json['users'][0]
+    assert set(user) == {'id', 'name', 'movies'}
+    assert [set(movie) for movie in user['movies']] == [{'id', 'title'}, {'id', 'title'}]
+
+
+def test_movie_batch_includes_stats(client, library):
+    heat, alien = library['movies']
+
+    response = client.get(f'/api/movies?ids={heat},{alien}&include=stats&fields[movies]=title')
+
+    assert response.json['movies'] == [{'id': heat, 'title': 'Heat', 'review_count': 1, 'rating_mean': 8.0},
+                                       {'id': alien, 'title': 'Alien', 'review_count': 0, 'rating_mean': None}]
+
+
+@pytest.mark.parametrize('query', ['ids=1,x', 'ids=,', 'ids=1&include=friends', 'ids=1&fields[users]=password',
+                                   'ids=' + ','.join(str(number) for number in range(201))])
+def test_invalid_batch_arguments_are_rejected(client, query):
+    response = client.get(f'/api/users?{query}')
+
+    assert response.status_code == 400
+    assert response.json['message']
+
+
+def test_movie_batch_requires_ids(client):
+    assert client.get('/api/movies').status_code == 400
+
+
+def test_orjson_provider_matches_the_default_provider():
+    pytest.importorskip('orjson')
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    assert json_provider.init_app(app)
+    value = {'b': [1, 2.5, None], 'a': 'Amélie', 'when': datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc)}
+
+    assert app.json.loads(app.json.dumps(value)) == default.loads(default.dumps(value))
+    with app.app_context():
+        assert app.json.response(value).get_json() == default.loads(default.dumps(value))
+
+
+def test_orjson_provider_can_be_turned_off():
+    app = Flask(__name__)
+    app.config['JSON_USE_ORJSON'] = False
+
+    assert not json_provider.init_app(app)
+    assert not isinstance(app.json, json_provider.ORJSONProvider)
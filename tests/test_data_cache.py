@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import event
+
+from conftest import omdb_movie
+from models.models import db
+
+
+@pytest.fixture
+def statements(app):
+    """Counts the SQL statements run while the test reads through the cache."""
+    count = [0]
+
+    def before_cursor_execute(*args):
+        count[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield count
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def read(app, data_manager, method, *args):
+    # A new app context per read, so only the process-wide cache can answer
+    with app.app_context():
+        return getattr(data_manager, method)(*args)
+
+
+def test_repeated_reads_are_served_from_the_cache(app, data_manager, user, statements):
+    data_manager.add_movie(user['id'], omdb_movie('Heat'))
+    first = read(app, data_manager, 'get_user_movies', user['id'])
+    before = statements[0]
+
+    second = read(app, data_manager, 'get_user_movies', user['id'])
+
+    assert second == first
+    assert statements[0] == before
+
+
+def test_library_writes_invalidate_the_library(app, data_manager, user):
+    read(app, data_manager, 'get_user_movies', user['id'])
+
+    movie = data_manager.add_movie(user['id'], omdb_movie('Heat'))
+    assert [row.title for row in read(app, data_manager, 'get_user_movies', user['id'])] == ['Heat']
+
+    data_manager.delete_movie(user['id'], movie.id)
+    assert read(app, data_manager, 'get_user_movies', user['id']) == []
+
+
+def test_shared_movie_update_invalidates_every_library_holding_it(app, data_manager, user):
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+    movie = data_manager.add_movie(user['id'], omdb_movie('Heat'))
+    data_manager.add_existing_movie(other['id'], movie.id)
+    read(app, data_manager, 'get_user_movies', other['id'])
+
+    data_manager.update_movie(user['id'], movie.id, {'title': 'Heat (1995)'})
+
+    assert [row.title for row in read(app, data_manager, 'get_user_movies', other['id'])] == ['Heat (1995)']
+
+
+def test_reviews_invalidate_movie_and_user_reviews(app, data_manager, user):
+    movie = data_manager.add_movie(user['id'], omdb_movie('Heat'))
+    assert read(app, data_manager, 'get_movie_reviews', movie.id) == []
+
+    data_manager.add_review(user['id'], movie.id, 'Tense', 8)
+
+    assert [review.review_text for review in read(app, data_manager, 'get_movie_reviews', movie.id)] == ['Tense']
+    _, reviews = read(app, data_manager, 'get_user_reviews', user['id'])
+    assert [review.rating for review in reviews] == [8.0]
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+
+import pytest
+
+import movie_export
+from conftest import omdb_movie
+from movie_export import MOVIE_EXPORT_FIELDS, csv_stream, ndjson_stream
+
+AWKWARD_TITLES = ['Say "Hello", World', 'Line one\nLine two', 'Plain']
+
+
+@pytest.fixture
+def library(data_manager, user, monkeypatch):
+    # Small chunks, so the export spans several of them
+    monkeypatch.setattr(movie_export, 'EXPORT_CHUNK_ROWS', 3)
+    movies = [data_manager.add_movie(user['id'], omdb_movie(title)) for title in AWKWARD_TITLES]
+    movies += [data_manager.add_movie(user['id'], omdb_movie(f'Movie {number}')) for number in range(5)]
+    for movie in movies:
+        data_manager.add_review(user['id'], movie.id, f'On {movie.title}, "quoted",\nand multi-line', 7)
+    return movies
+
+
+def test_streams_are_split_into_chunks(monkeypatch):
+    monkeypatch.setattr(movie_export, 'EXPORT_CHUNK_ROWS', 2)
+    records = [{'id': number, 'title': f'Movie {number}'} for number in range(5)]
+
+    assert list(ndjson_stream(iter(records))) == [
+        '{"id": 0, "title": "Movie 0"}\n{"id": 1, "title": "Movie 1"}\n',
+        '{"id": 2, "title": "Movie 2"}\n{"id": 3, "title": "Movie 3"}\n',
+        '{"id": 4, "title": "Movie 4"}\n']
+    assert list(csv_stream(iter(records), ['id', 'title'])) == [
+        'id,title\r\n0,Movie 0\r\n1,Movie 1\r\n', '2,Movie 2\r\n3,Movie 3\r\n', '4,Movie 4\r\n']
+
+
+def test_ndjson_export_round_trips_the_library(client, data_manager, user, library):
+    response = client.get(f"/api/users/{user['id']}/export/movies")
+
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [record['id'] for record in records] == [movie['id'] for movie in data_manager.iter_user_movies(user['id'])]
+    assert {record['title'] for record in records} == {movie.title for movie in library}
+
+
+def test_export_reads_the_library_in_batches(data_manager, user, library):
+    assert list(data_manager.iter_user_movies(user['id'], batch_size=2)) == list(
+        data_manager.iter_user_movies(user['id']))
+    assert len(list(data_manager.iter_user_reviews(user['id'], batch_size=2))) == len(library)
+
+
+def test_csv_export_round_trips_quotes_commas_and_newlines(client, data_manager, user, library):
+    # Each streamed response is read before the next request is made
+    movies = client.get(f"/api/users/{user['id']}/export/movies?format=csv").get_data(as_text=True)
+    reviews = client.get(f"/api/users/{user['id']}/export/reviews?format=csv").get_data(as_text=True)
+
+    movie_rows = list(csv.DictReader(io.StringIO(movies, newline='')))
+    review_rows = list(csv.DictReader(io.StringIO(reviews, newline='')))
+    assert list(movie_rows[0]) == MOVIE_EXPORT_FIELDS
+    assert sorted(row['title'] for row in movie_rows) == sorted(movie.title for movie in library)
+    assert sorted(row['review_text'] for row in review_rows) == sorted(
+        f'On {movie.title}, "quoted",\nand multi-line' for movie in library)
+
+
+def test_account_export_has_the_user_then_movies_then_reviews(client, user, library):
+    lines = client.get(f"/api/users/{user['id']}/export").get_data(as_text=True).splitlines()
+
+    types = [json.loads(line)['type'] for line in lines]
+    assert types == ['user'] + ['movie'] * len(library) + ['review'] * len(library)
+
+
+def test_unknown_format_and_user_are_rejected(client, user):
+    assert client.get(f"/api/users/{user['id']}/export/movies?format=xml").status_code == 400
+    assert client.get('/api/users/404/export/movies').status_code == 404
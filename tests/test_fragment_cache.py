@@ -0,0 +1,94 @@
+import dataclasses
+
+import pytest
+
+from conftest import omdb_movie
+from fragment_cache import FragmentCache
+
+
+@pytest.fixture
+def library(write):
+    user = write('create_user_if_absent', 'Alice', 'alice@example.com')
+    movie_ids = [write('add_movie', user['id'], omdb_movie(title)).id for title in ('Heat', 'Alien', 'Ronin')]
+    return user['id'], movie_ids
+
+
+@pytest.fixture
+def fragment_stats(application):
+    return lambda: dict(application.fragment_cache.get_stats())
+
+
+def test_repeated_page_is_served_from_cached_fragments(client, library, fragment_stats):
+    user_id, _ = library
+    first = client.get(f'/user_movies/{user_id}').data
+    before = fragment_stats()
+
+    again = client.get(f'/user_movies/{user_id}').data
+
+    assert again == first
+    assert fragment_stats()['hits'] - before['hits'] == 3
+    assert fragment_stats()['misses'] == before['misses']
+
+
+def test_updated_movie_is_rendered_again(client, write, library, fragment_stats):
+    user_id, (heat_id, _, _) = library
+    client.get(f'/user_movies/{user_id}')
+    before = fragment_stats()
+
+    write('update_movie', user_id, heat_id, {'title': 'Heat (1995)', 'director': 'Michael Mann'})
+    page = client.get(f'/user_movies/{user_id}').data
+
+    assert b'<h3>Heat (1995)</h3>' in page
+    assert b'Director: Michael Mann' in page
+    assert b'<h3>Heat</h3>' not in page
+    # Only the changed row is rendered again
+    assert fragment_stats()['misses'] - before['misses'] == 1
+
+
+def test_new_review_stats_are_rendered_again(client, write, library):
+    user_id, (heat_id, _, _) = library
+    client.get(f'/user_movies/{user_id}')
+
+    write('add_review', user_id, heat_id, 'Tense', 8)
+    page = client.get(f'/user_movies/{user_id}').data
+
+    assert b'User rating: 8.0 (1 review)' in page
+
+
+def test_renamed_movie_changes_the_review_listing(client, write, library):
+    user_id, (heat_id, _, _) = library
+    write('add_review', user_id, heat_id, 'Tense', 8)
+    assert b'Heat<br>' in client.get('/movie_reviews').data
+
+    write('update_movie', user_id, heat_id, {'title': 'Heat (1995)'})
+
+    assert b'Heat (1995)<br>' in client.get('/movie_reviews').data
+
+
+def test_shared_arguments_are_part_of_the_key(client, write, library):
+    user_id, (heat_id, _, _) = library
+    other = write('create_user_if_absent', 'Bob', 'bob@example.com')
+    write('add_existing_movie', other['id'], heat_id)
+
+    mine = client.get(f'/user_movies/{user_id}').data
+    theirs = client.get(f"/user_movies/{other['id']}").data
+
+    assert f'/users/{user_id}/update_movie/{heat_id}'.encode() in mine
+    assert f"/users/{other['id']}/update_movie/{heat_id}".encode() in theirs
+    assert f'/users/{user_id}/update_movie/{heat_id}'.encode() not in theirs
+
+
+def test_rows_are_keyed_by_value(app, library, data_manager):
+    fragments = FragmentCache(max_size=10)
+    user_id, _ = library
+    movie = data_manager.get_user_movies(user_id)[0]
+
+    with app.test_request_context():
+        first = fragments.render('fragments/movie_card.html', [movie], 'movie', user_id=user_id)
+        renamed = fragments.render('fragments/movie_card.html', [dataclasses.replace(movie, title='Renamed')],
+                                   'movie', user_id=user_id)
+        again = fragments.render('fragments/movie_card.html', [dataclasses.replace(movie)], 'movie', user_id=user_id)
+
+    assert 'Renamed' in renamed and 'Renamed' not in first
+    assert again == first
+    assert fragments.get_stats()['hits'] == 1
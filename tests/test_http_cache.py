@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from conftest import ROOT, omdb_movie
+from http_cache import release_id
+
+# Renames a movie from a separate process, through the uncached data manager,
+# the way a job worker or `flask refresh-metadata` writes.
+OTHER_PROCESS_REFRESH = textwrap.dedent('''
+    import sys
+    sys.path.insert(0, {root!r})
+    import app
+    from data_manager.sqlite_data_manager import SQLiteDataManager
+    from models.models import db
+    with app.app.app_context():
+        SQLiteDataManager(db).refresh_movie({movie_id}, {movie_data!r})
+''')
+
+
+@pytest.fixture
+def library(write):
+    """A user with one movie; the test client's requests must not share the writer's app context."""
+    user = write('create_user_if_absent', 'Alice', 'alice@example.com')
+    movie_id = write('add_movie', user['id'], omdb_movie('Heat')).id
+    return user['id'], movie_id
+
+
+def test_unchanged_page_is_not_modified(client, library):
+    user_id, _ = library
+    response = client.get(f'/users/{user_id}/reviews')
+
+    again = client.get(f'/users/{user_id}/reviews', headers={'If-None-Match': response.headers['ETag']})
+
+    assert response.status_code == 200
+    assert again.status_code == 304
+    assert again.headers['ETag'] == response.headers['ETag']
+
+
+def test_write_changes_the_etag_and_the_body(client, library, write):
+    user_id, movie_id = library
+    response = client.get(f'/users/{user_id}/reviews')
+
+    write('update_movie', user_id, movie_id, {'title': 'Heat (1995)'})
+    after = client.get(f'/users/{user_id}/reviews', headers={'If-None-Match': response.headers['ETag']})
+
+    assert after.status_code == 200
+    assert after.headers['ETag'] != response.headers['ETag']
+    assert b'Heat (1995)' in after.data
+
+
+def test_write_from_another_process_is_not_served_stale(client, library, workdir):
+    user_id, movie_id = library
+    html = client.get(f'/users/{user_id}/reviews')
+    api = client.get(f'/api/users/{user_id}/reviews')
+
+    script = OTHER_PROCESS_REFRESH.format(root=ROOT, movie_id=movie_id, movie_data=omdb_movie('Heat Renamed'))
+    subprocess.run([sys.executable, '-c', script], cwd=workdir, check=True,
+                   env=dict(os.environ, OMDB_FETCH_WORKERS='0', LOG_LEVEL='WARNING'))
+
+    html_after = client.get(f'/users/{user_id}/reviews', headers={'If-None-Match': html.headers['ETag']})
+    api_after = client.get(f'/api/users/{user_id}/reviews', headers={'If-None-Match': api.headers['ETag']})
+    assert html_after.status_code == 200 and b'Heat Renamed' in html_after.data
+    assert api_after.status_code == 200 and b'Heat Renamed' in api_after.data
+    revalidated = client.get(f'/users/{user_id}/reviews', headers={'If-None-Match': html_after.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_if_modified_since_alone_never_gives_304(client, library):
+    user_id, _ = library
+    response = client.get(f'/users/{user_id}/reviews')
+
+    again = client.get(f'/users/{user_id}/reviews', headers={'If-Modified-Since': response.headers['Last-Modified']})
+
+    assert again.status_code == 200
+
+
+def test_etag_salt_is_stable_across_processes(app, tmp_path):
+    assert release_id() == release_id()
+    assert release_id(str(tmp_path)) == 'dev'
+    if 'HTTP_CACHE_SALT' not in os.environ:
+        assert app.config['HTTP_CACHE_SALT'] == release_id()
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from jobs.queue import JobQueue
+from omdb.cache import SQLiteResponseCache
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / 'jobs.db'), visibility_timeout=60, max_attempts=3, retry_delay=10)
+
+
+def job_status(queue, job_id):
+    with sqlite3.connect(queue.path) as conn:
+        return conn.execute('SELECT status FROM job WHERE id = ?', (job_id,)).fetchone()[0]
+
+
+def test_each_job_is_claimed_by_one_worker(queue):
+    job_ids = {queue.enqueue('task', {'number': number}) for number in range(50)}
+    # Separate JobQueue objects, like separate worker processes
+    workers = [JobQueue(queue.path) for _ in range(4)]
+    claimed = []
+
+    def work(worker_queue):
+        while (job := worker_queue.claim()) is not None:
+            claimed.append(job.id)
+
+    threads = [threading.Thread(target=work, args=(worker_queue,)) for worker_queue in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job_ids)
+
+
+def test_dedupe_key_drops_jobs_while_one_is_waiting_or_running(queue):
+    first = queue.enqueue('refresh', {'movie_id': 1}, dedupe_key='refresh:1')
+    assert queue.enqueue('refresh', {'movie_id': 1}, dedupe_key='refresh:1') is None
+
+    job = queue.claim()
+    assert job.id == first
+    assert queue.enqueue('refresh', {'movie_id': 1}, dedupe_key='refresh:1') is None
+
+    queue.complete(job)
+    assert queue.enqueue('refresh', {'movie_id': 1}, dedupe_key='refresh:1') is not None
+
+
+def test_delayed_job_is_not_claimed_early(queue):
+    queue.enqueue('task', delay=30)
+
+    assert queue.claim() is None
+
+
+def test_expired_lease_is_claimed_again_and_the_late_answer_ignored(queue):
+    job_id = queue.enqueue('task')
+    stuck = queue.claim(worker='dead')
+
+    retried = queue.claim(worker='alive', now=time.time() + 61)
+
+    assert retried.id == job_id and retried.attempts == 2
+    assert queue.complete(stuck) is False
+    assert queue.complete(retried) is True
+    assert job_status(queue, job_id) == 'done'
+
+
+def test_failed_attempts_back_off_then_give_up(queue):
+    job_id = queue.enqueue('task')
+    now = time.time()
+    job = queue.claim(now=now)
+
+    # Retries after 10s, then 20s; the third failure uses up max_attempts
+    queue.fail(job, 'boom', now=now)
+    assert queue.claim(now=now + 5) is None
+    job = queue.claim(now=now + 10)
+    assert job.attempts == 2
+    queue.fail(job, 'boom', now=now + 10)
+    assert queue.claim(now=now + 25) is None
+    job = queue.claim(now=now + 30)
+    queue.fail(job, 'boom', now=now + 30)
+
+    assert job_status(queue, job_id) == 'failed'
+    assert queue.claim(now=now + 10_000) is None
+
+
+def test_permanent_failure_is_not_retried(queue):
+    job_id = queue.enqueue('task')
+
+    queue.fail(queue.claim(), 'no such movie', retry=False)
+
+    assert job_status(queue, job_id) == 'failed'
+
+
+@pytest.mark.parametrize('make_store', [
+    lambda path: JobQueue(str(path / 'jobs.db')),
+    lambda path: SQLiteResponseCache(str(path / 'omdb_cache.db')),
+], ids=['job_queue', 'omdb_cache'])
+def test_forked_process_opens_its_own_connection(tmp_path, make_store):
+    store = make_store(tmp_path)
+    parent_connection = store._connect()
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if store._connect() is not parent_connection else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert store._connect() is parent_connection
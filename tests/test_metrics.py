@@ -0,0 +1,27 @@
+import pytest
+
+REMOTE = {'REMOTE_ADDR': '203.0.113.5'}
+
+
+def test_metrics_are_served_to_local_requests(client):
+    client.get('/users')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert b'endpoint="get_users"' in response.data
+
+
+@pytest.mark.parametrize('options', [{'environ_base': REMOTE},
+                                     {'headers': {'X-Forwarded-For': '203.0.113.5'}}])
+def test_metrics_are_hidden_from_remote_and_proxied_requests(client, options):
+    assert client.get('/metrics', **options).status_code == 404
+
+
+def test_metrics_token_is_required_when_set(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 's3cret')
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    authorized = client.get('/metrics', environ_base=REMOTE, headers={'Authorization': 'Bearer s3cret'})
+    assert authorized.status_code == 200
@@ -0,0 +1,110 @@
+import shutil
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+from conftest import ROOT
+from bench.seed import create_app
+from models.migrations import MIGRATIONS, MigrationError, upgrade
+from models.models import db
+
+LATEST = MIGRATIONS[-1][0]
+
+
+@pytest.fixture
+def database():
+    """Open a database file with its own app; yields a function taking the path."""
+    apps = []
+
+    def open_database(path):
+        app = create_app(str(path))
+        context = app.app_context()
+        context.push()
+        apps.append(context)
+        return app
+
+    yield open_database
+    for context in reversed(apps):
+        db.engine.dispose()
+        context.pop()
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """A copy of the committed database, created before any migration existed."""
+    path = tmp_path / 'baseline.db'
+    shutil.copy(f'{ROOT}/data/database.db', path)
+    return path
+
+
+def query(sql, **params):
+    with db.engine.connect() as conn:
+        return conn.execute(text(sql), params).all()
+
+
+def indexes(table):
+    return {name for name, in query("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table",
+                                    table=table)}
+
+
+def test_baseline_database_upgrades_once(database, baseline):
+    users = sqlite3.connect(baseline).execute('SELECT id, name, email FROM user ORDER BY id').fetchall()
+    database(baseline)
+
+    assert upgrade(db) == LATEST
+    assert upgrade(db) == LATEST
+    assert query('PRAGMA user_version')[0][0] == LATEST
+    assert [tuple(row) for row in query('SELECT id, name, email FROM user ORDER BY id')] == users
+    assert {'uq_user_name', 'uq_user_email'} <= indexes('user')
+
+
+def test_every_step_is_idempotent_on_a_new_database(database, tmp_path):
+    database(tmp_path / 'new.db')
+    db.create_all()
+
+    for _, step in MIGRATIONS:
+        with db.engine.begin() as conn:
+            step(conn)
+            step(conn)
+    assert upgrade(db) == LATEST
+
+
+def test_duplicate_users_stop_the_upgrade_until_merged(database, baseline):
+    with sqlite3.connect(baseline) as conn:
+        conn.execute("INSERT INTO user (name, email) SELECT name, 'other@example.com' FROM user LIMIT 1")
+    database(baseline)
+
+    with pytest.raises(MigrationError, match='user.name'):
+        upgrade(db)
+    assert query('PRAGMA user_version')[0][0] == 0
+
+    with db.engine.begin() as conn:
+        conn.execute(text("DELETE FROM user WHERE email = 'other@example.com'"))
+    assert upgrade(db) == LATEST
+
+
+def test_plain_user_index_from_older_versions_becomes_unique(database, baseline):
+    database(baseline)
+    upgrade(db)
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP INDEX uq_user_email'))
+        conn.execute(text('CREATE INDEX ix_user_email ON user (email)'))
+        conn.execute(text('PRAGMA user_version = 11'))
+
+    assert upgrade(db) == LATEST
+    assert 'uq_user_email' in indexes('user')
+    assert 'ix_user_email' not in indexes('user')
+
+
+def test_links_keep_their_rowids_as_autoincrement_ids(database, baseline):
+    links = sqlite3.connect(baseline).execute(
+        'SELECT rowid, user_id, movie_id FROM user_movies_relationship ORDER BY rowid').fetchall()
+    database(baseline)
+
+    upgrade(db)
+
+    assert [tuple(row) for row in query('SELECT id, user_id, movie_id FROM user_movies_relationship ORDER BY id')] \
+        == links
+    assert 'AUTOINCREMENT' in query("SELECT sql FROM sqlite_master WHERE name = 'user_movies_relationship'")[0][0]
+    assert 'ix_user_movies_relationship_movie_id' in indexes('user_movies_relationship')
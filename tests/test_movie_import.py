@@ -0,0 +1,65 @@
+import pytest
+
+from conftest import omdb_movie
+from jobs.queue import JobQueue
+from jobs.tasks import CACHE_POSTER
+
+
+class FakeOMDb:
+    """Answers every title except 'Broken' (raises) and 'Garbled' (unreadable rating)."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_movie(self, title):
+        self.requests.append(title)
+        if title == 'Broken':
+            raise RuntimeError('connection reset')
+        if title == 'Garbled':
+            return omdb_movie(title, imdbRating='eight')
+        return omdb_movie(title, Poster=f'https://m.media-amazon.com/images/M/{title}.jpg')
+
+
+@pytest.fixture
+def omdb(app, monkeypatch):
+    fake = FakeOMDb()
+    monkeypatch.setitem(app.extensions, 'omdb_client', fake)
+    return fake
+
+
+@pytest.fixture
+def job_queue(app, monkeypatch, tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    monkeypatch.setitem(app.extensions, 'job_queue', queue)
+    return queue
+
+
+def test_failing_titles_do_not_fail_the_import(client, data_manager, user, omdb, job_queue):
+    response = client.post(f"/api/users/{user['id']}/movies/bulk", json=['Heat', 'Broken', 'Garbled', 'Alien'])
+
+    assert response.status_code == 200
+    statuses = {outcome['title']: outcome['status'] for outcome in response.json['outcomes']}
+    assert statuses == {'Heat': 'added', 'Broken': 'error', 'Garbled': 'error', 'Alien': 'added'}
+    assert sorted(movie.title for movie in data_manager.get_user_movies(user['id'])) == ['Alien', 'Heat']
+
+
+def test_posters_are_queued_not_downloaded(client, data_manager, user, omdb, job_queue):
+    response = client.post(f"/api/users/{user['id']}/movies/bulk", json=['Heat', 'Alien'])
+
+    assert response.json['posters_queued'] == 2
+    jobs = [job_queue.claim(), job_queue.claim()]
+    assert {job.task for job in jobs} == {CACHE_POSTER}
+    assert {job.payload['url'] for job in jobs} == {'https://m.media-amazon.com/images/M/Heat.jpg',
+                                                     'https://m.media-amazon.com/images/M/Alien.jpg'}
+    assert all(movie.poster_hash is None for movie in data_manager.get_user_movies(user['id']))
+
+
+def test_catalog_titles_are_linked_without_omdb(client, data_manager, user, omdb, job_queue):
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+    movie = data_manager.add_movie(other['id'], omdb_movie('Heat'))
+
+    response = client.post(f"/api/users/{user['id']}/movies/bulk", json=['heat', 'Heat'])
+
+    assert [outcome['status'] for outcome in response.json['outcomes']] == ['linked', 'duplicate']
+    assert response.json['outcomes'][0]['movie_id'] == movie.id
+    assert omdb.requests == []
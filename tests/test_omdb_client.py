@@ -0,0 +1,42 @@
+import pytest
+import requests
+
+from omdb.client import OMDbClient
+
+
+def fake_response(body, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    return response
+
+
+@pytest.fixture
+def omdb_client(monkeypatch):
+    client = OMDbClient('test-key', cache=None)
+    responses = []
+    monkeypatch.setattr(client.session, 'get', lambda url, params, timeout: responses.pop(0))
+    client.responses = responses
+    return client
+
+
+@pytest.mark.parametrize('body', [b'<html><body>502 Bad Gateway</body></html>', b'{"Title": "The Ma', b'[]'])
+def test_unreadable_body_is_a_failed_lookup(omdb_client, body):
+    omdb_client.responses.append(fake_response(body))
+
+    movie_data = omdb_client.get_movie('The Matrix')
+
+    assert movie_data['Response'] == 'False'
+    assert movie_data['Error']
+
+
+def test_json_body_is_returned(omdb_client):
+    omdb_client.responses.append(fake_response(b'{"Response": "True", "Title": "The Matrix"}'))
+
+    assert omdb_client.get_movie('The Matrix') == {'Response': 'True', 'Title': 'The Matrix'}
+
+
+def test_http_error_means_unreachable(omdb_client):
+    omdb_client.responses.append(fake_response(b'', status_code=500))
+
+    assert omdb_client.get_movie_by_imdb_id('tt0133093') is None
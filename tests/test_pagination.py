@@ -0,0 +1,104 @@
+import pytest
+
+from conftest import omdb_movie
+
+
+def walk_reviews(data_manager, limit):
+    pages = []
+    page = data_manager.get_all_movie_reviews(limit=limit)
+    while True:
+        pages.append([review.id for review in page['reviews']])
+        if page['next_cursor'] is None:
+            return pages
+        page = data_manager.get_all_movie_reviews(after=page['next_cursor'], limit=limit)
+
+
+def add_reviews(data_manager, user, count):
+    movie = data_manager.add_movie(user['id'], omdb_movie('Heat'))
+    return [data_manager.add_review(user['id'], movie.id, f'Review {number}', number % 10).id
+            for number in range(count)]
+
+
+def test_review_pages_cover_every_review_once(data_manager, user):
+    review_ids = add_reviews(data_manager, user, 7)
+
+    pages = walk_reviews(data_manager, limit=3)
+
+    assert pages == [review_ids[0:3], review_ids[3:6], review_ids[6:7]]
+
+
+def test_review_pages_walk_back_with_prev_cursor(data_manager, user):
+    review_ids = add_reviews(data_manager, user, 7)
+    first = data_manager.get_all_movie_reviews(limit=3)
+    second = data_manager.get_all_movie_reviews(after=first['next_cursor'], limit=3)
+
+    back = data_manager.get_all_movie_reviews(before=second['prev_cursor'], limit=3)
+
+    assert [review.id for review in back['reviews']] == review_ids[0:3]
+    assert back['prev_cursor'] is None
+    assert back['next_cursor'] == review_ids[2]
+
+
+def test_review_page_size_is_capped(data_manager, user):
+    add_reviews(data_manager, user, 3)
+
+    assert len(data_manager.get_all_movie_reviews(limit=0)['reviews']) == 1
+    assert len(data_manager.get_all_movie_reviews(limit=10_000)['reviews']) == 3
+
+
+def add_library(data_manager, user):
+    # Three movies share each year, so the year sort needs the id tiebreak
+    return [data_manager.add_movie(user['id'], omdb_movie(f'Movie {number}', Year=str(2000 + number % 3))).id
+            for number in range(8)]
+
+
+def walk_movies(data_manager, user, limit, **options):
+    movie_ids = []
+    page = data_manager.get_user_movies_page(user['id'], limit=limit, **options)
+    while True:
+        movie_ids += [movie.id for movie in page['movies']]
+        if page['next_cursor'] is None:
+            return movie_ids
+        page = data_manager.get_user_movies_page(user['id'], limit=limit, after=page['next_cursor'], **options)
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_movie_pages_cover_the_library_in_sort_order(data_manager, user, order):
+    add_library(data_manager, user)
+    expected = [movie.id for movie in sorted(data_manager.get_user_movies(user['id']),
+                                             key=lambda movie: (movie.year, movie.id), reverse=order == 'desc')]
+
+    assert walk_movies(data_manager, user, limit=3, sort='year', order=order) == expected
+
+
+def test_movie_pages_walk_back_with_prev_cursor(data_manager, user):
+    add_library(data_manager, user)
+    first = data_manager.get_user_movies_page(user['id'], sort='year', limit=3)
+    second = data_manager.get_user_movies_page(user['id'], sort='year', limit=3, after=first['next_cursor'])
+
+    back = data_manager.get_user_movies_page(user['id'], sort='year', limit=3, before=second['prev_cursor'])
+
+    assert [movie.id for movie in back['movies']] == [movie.id for movie in first['movies']]
+
+
+def test_movie_pages_filter_and_count_in_sql(data_manager, user):
+    add_library(data_manager, user)
+
+    page = data_manager.get_user_movies_page(user['id'], year_from=2001, limit=2)
+
+    assert page['total'] == 5
+    assert all(movie.year >= 2001 for movie in page['movies'])
+    assert len(walk_movies(data_manager, user, limit=2, year_from=2001)) == 5
+
+
+def test_invalid_cursor_starts_from_the_first_page(data_manager, user):
+    add_library(data_manager, user)
+    first = data_manager.get_user_movies_page(user['id'], limit=3)
+
+    page = data_manager.get_user_movies_page(user['id'], limit=3, after='not-a-cursor')
+
+    assert page['movies'] == first['movies']
+
+
+def test_unknown_user_has_no_pages(data_manager):
+    assert data_manager.get_user_movies_page(404) is None
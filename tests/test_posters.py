@@ -0,0 +1,84 @@
+import socket
+
+import pytest
+
+from conftest import omdb_movie
+from jobs.queue import JobQueue
+from jobs.tasks import CACHE_POSTER, movie_task_handlers
+from jobs.worker import PermanentJobError
+from posters.store import PosterStore, is_poster_url
+
+POSTER_URL = 'https://m.media-amazon.com/images/M/heat.jpg'
+
+
+def resolve_to(monkeypatch, address):
+    monkeypatch.setattr(socket, 'getaddrinfo', lambda host, port: [(socket.AF_INET, 0, 0, '', (address, 0))])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PosterStore(str(tmp_path / 'posters'))
+
+
+@pytest.fixture
+def job_queue(application, monkeypatch, tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    monkeypatch.setattr(application, 'job_queue', queue)
+    monkeypatch.setitem(application.app.extensions, 'job_queue', queue)
+    return queue
+
+
+@pytest.mark.parametrize('url', [POSTER_URL, 'http://ia.media-imdb.com/images/M/heat.jpg',
+                                 'https://img.omdbapi.com/?i=tt0113277'])
+def test_poster_hosts_are_accepted(url):
+    assert is_poster_url(url)
+
+
+@pytest.mark.parametrize('url', ['N/A', None, 'file:///etc/passwd', 'ftp://m.media-amazon.com/heat.jpg',
+                                 'http://127.0.0.1/heat.jpg', 'http://169.254.169.254/latest/meta-data/',
+                                 'https://media-amazon.com.evil.example/heat.jpg',
+                                 'https://evilmedia-amazon.com/heat.jpg', 'https://user@m.media-amazon.com/heat.jpg'])
+def test_other_urls_are_refused(url):
+    assert not is_poster_url(url)
+
+
+@pytest.mark.parametrize('address', ['127.0.0.1', '10.0.0.5', '169.254.169.254', '::1'])
+def test_poster_hosts_resolving_to_private_addresses_are_not_fetched(store, monkeypatch, address):
+    resolve_to(monkeypatch, address)
+    monkeypatch.setattr(store.session, 'get', lambda *args, **kwargs: pytest.fail('fetched'))
+
+    assert store.download(POSTER_URL) is None
+
+
+def test_cache_poster_job_refuses_other_hosts_for_good(store, data_manager):
+    handlers = movie_task_handlers(None, data_manager, None, store, max_age=0)
+
+    with pytest.raises(PermanentJobError):
+        handlers[CACHE_POSTER]({'movie_id': 1, 'url': 'http://localhost:8080/admin'})
+
+
+def test_api_rejects_posters_off_the_poster_hosts(client, data_manager, user, job_queue):
+    movie = dict(omdb_movie('Heat', Poster='http://10.0.0.5/internal'), title='Heat', director='', year=1995, rating=8)
+
+    response = client.post(f"/api/users/{user['id']}/add_movie", json=movie)
+
+    assert response.status_code == 400
+    assert data_manager.get_user_movies(user['id']) == []
+    assert job_queue.claim() is None
+
+
+def test_evicted_poster_redirects_upstream_and_queues_a_download(client, data_manager, user, job_queue):
+    movie = data_manager.add_movie(user['id'], omdb_movie('Heat', Poster=POSTER_URL))
+    data_manager.set_movie_poster_hashes({movie.id: 'a' * 64})
+
+    response = client.get(f"/posters/{'a' * 64}")
+
+    assert response.status_code == 302
+    assert response.location == POSTER_URL
+    job = job_queue.claim()
+    assert (job.task, job.payload) == (CACHE_POSTER, {'movie_id': movie.id, 'url': POSTER_URL})
+
+
+def test_unknown_poster_is_not_found(client, job_queue):
+    assert client.get(f"/posters/{'b' * 64}").status_code == 404
+    assert job_queue.claim() is None
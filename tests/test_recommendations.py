@@ -0,0 +1,40 @@
+import pytest
+
+from conftest import omdb_movie
+from models.models import db
+from recommendations.index import RecommendationIndex
+
+
+@pytest.fixture
+def index(app):
+    index = RecommendationIndex(app, db, sync_interval=0, rebuild_interval=3600)
+    yield index
+    index.shutdown()
+
+
+def test_link_ids_are_not_reused(data_manager, user):
+    first = data_manager.add_movie(user['id'], omdb_movie('Heat'))
+    newest = data_manager.add_movie(user['id'], omdb_movie('Alien'))
+    link_ids = dict(db.session.execute(db.text('SELECT movie_id, id FROM user_movies_relationship')).all())
+
+    data_manager.delete_movie(user['id'], newest.id)
+    data_manager.add_existing_movie(user['id'], newest.id)
+
+    relinked_id = db.session.execute(db.text('SELECT id FROM user_movies_relationship WHERE movie_id = :movie_id'),
+                                     {'movie_id': newest.id}).scalar()
+    assert relinked_id > max(link_ids[first.id], link_ids[newest.id])
+
+
+def test_sync_picks_up_a_link_added_after_the_newest_was_deleted(data_manager, user, index):
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+    heat = data_manager.add_movie(other['id'], omdb_movie('Heat'))
+    data_manager.add_existing_movie(user['id'], heat.id)
+    # The newest link, at the index's watermark
+    alien = data_manager.add_movie(user['id'], omdb_movie('Alien'))
+    index.rebuild()
+
+    data_manager.delete_movie(user['id'], alien.id)
+    data_manager.add_existing_movie(other['id'], alien.id)
+    index.refresh()
+
+    assert set(index.model.items_by_user[other['id']]) == {heat.id, alien.id}
@@ -0,0 +1,125 @@
+import pytest
+
+from conftest import omdb_movie
+from omdb.client import OMDbClient
+from omdb.fake_server import FakeOMDbServer
+from omdb.rate_limit import TokenBucket
+from omdb.refresher import MetadataRefresher
+
+
+class StubOMDb:
+    """Answers title lookups from `responses`; titles in `down` look unreachable (None)."""
+
+    def __init__(self, responses):
+        self.movies = dict(responses)
+        self.down = set()
+        self.requests = []
+
+    def get_movie(self, title, refresh=False):
+        self.requests.append(title)
+        if title in self.down:
+            return None
+        return self.movies.get(title, {'Response': 'False', 'Error': 'Movie not found!'})
+
+
+def refresher(data_manager, client, **options):
+    return MetadataRefresher(data_manager, client, TokenBucket(rate=1000, capacity=100), max_age=0, **options)
+
+
+@pytest.fixture
+def catalog(data_manager, user):
+    return [data_manager.add_movie(user['id'], omdb_movie(f'Movie {number}')) for number in range(5)]
+
+
+def test_changed_movies_are_rewritten_in_every_library(data_manager, user, catalog):
+    other = data_manager.create_user_if_absent('Bob', 'bob@example.com')
+    data_manager.add_existing_movie(other['id'], catalog[0].id)
+    client = StubOMDb({'Movie 0': omdb_movie('Movie Zero', Director='New Director'),
+                       **{title: omdb_movie(title) for title in ('Movie 1', 'Movie 2', 'Movie 3')}})
+    before = data_manager.get_resource_versions([f"user_movies:{other['id']}", 'catalog'])
+
+    summary = refresher(data_manager, client).run()
+
+    assert (summary['fetched'], summary['changed'], summary['not_found'], summary['finished']) == (5, 1, 1, True)
+    renamed = data_manager.get_user_movies(other['id'])
+    assert [(movie.title, movie.director) for movie in renamed] == [('Movie Zero', 'New Director')]
+    assert data_manager.get_movie_by_title('Movie Zero').id == catalog[0].id
+    assert data_manager.get_movie_by_title('Movie 0') is None
+    assert [movie.title for movie in data_manager.get_user_movies(user['id'])].count('Movie Zero') == 1
+    after = data_manager.get_resource_versions([f"user_movies:{other['id']}", 'catalog'])
+    assert after[f"user_movies:{other['id']}"][0] == before[f"user_movies:{other['id']}"][0] + 1
+
+
+def test_unchanged_movies_only_get_a_new_fetch_time(data_manager, catalog):
+    client = StubOMDb({movie.title: omdb_movie(movie.title) for movie in catalog})
+    fetched_at = data_manager.get_movie_status(catalog[0].id)['fetched_at']
+    before = data_manager.get_resource_versions([f'movie:{catalog[0].id}'])
+
+    summary = refresher(data_manager, client).run()
+
+    assert (summary['fetched'], summary['changed']) == (5, 0)
+    assert data_manager.get_movie_status(catalog[0].id)['fetched_at'] > fetched_at
+    assert data_manager.get_resource_versions([f'movie:{catalog[0].id}']) == before
+
+
+def test_a_limited_run_resumes_from_its_checkpoint(data_manager, catalog):
+    client = StubOMDb({movie.title: omdb_movie(movie.title) for movie in catalog})
+
+    first = refresher(data_manager, client, batch_size=2).run(limit=3)
+
+    assert (first['fetched'], first['last_id'], first['finished']) == (3, catalog[2].id, False)
+    assert data_manager.get_refresh_checkpoint('omdb_metadata')['last_id'] == catalog[2].id
+
+    second = refresher(data_manager, client, batch_size=2).run()
+
+    assert client.requests == [movie.title for movie in catalog]
+    assert (second['fetched'], second['finished']) == (2, True)
+    checkpoint = data_manager.get_refresh_checkpoint('omdb_metadata')
+    assert checkpoint['last_id'] == 0 and checkpoint['pass_finished_at'] is not None
+
+
+def test_restart_ignores_the_checkpoint(data_manager, catalog):
+    client = StubOMDb({movie.title: omdb_movie(movie.title) for movie in catalog})
+    refresher(data_manager, client).run(limit=3)
+
+    summary = refresher(data_manager, client).run(restart=True)
+
+    assert summary['fetched'] == 5
+
+
+def test_an_outage_stops_the_run_before_the_unreachable_movie(data_manager, catalog):
+    client = StubOMDb({movie.title: omdb_movie(movie.title) for movie in catalog})
+    client.down = {'Movie 2'}
+    fetched_at = data_manager.get_movie_status(catalog[3].id)['fetched_at']
+
+    summary = refresher(data_manager, client, batch_size=10, concurrency=1).run()
+
+    # Lookups after the first unreachable one are not sent
+    assert client.requests == ['Movie 0', 'Movie 1', 'Movie 2']
+    assert (summary['fetched'], summary['unreachable'], summary['finished']) == (2, 3, False)
+    assert data_manager.get_refresh_checkpoint('omdb_metadata')['last_id'] == catalog[1].id
+    assert data_manager.get_movie_status(catalog[3].id)['fetched_at'] == fetched_at
+
+    client.down = set()
+    client.requests = []
+    resumed = refresher(data_manager, client, batch_size=10, concurrency=1).run()
+
+    assert client.requests == ['Movie 2', 'Movie 3', 'Movie 4']
+    assert resumed['finished']
+
+
+def test_refresh_against_the_fake_omdb_server(data_manager, user):
+    movie = data_manager.add_movie(user['id'], omdb_movie('Alien', imdbID='tt0078748', Year='1979'))
+    with FakeOMDbServer() as server:
+        client = OMDbClient('test', api_url=server.url, retries=0)
+
+        summary = refresher(data_manager, client).run()
+
+        assert server.request_count == 1
+    assert (summary['fetched'], summary['changed']) == (1, 1)
+    refreshed = data_manager.get_user_movie(user['id'], movie.id)
+    assert (refreshed.director, refreshed.rating) == ('Ridley Scott', 8.5)
+
+    # The server is gone now: an outage, not a "not found"
+    summary = refresher(data_manager, client).run(restart=True)
+    assert (summary['fetched'], summary['unreachable']) == (0, 1)
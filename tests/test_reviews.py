@@ -0,0 +1,36 @@
+import pytest
+
+from conftest import omdb_movie
+
+
+@pytest.fixture
+def movie(data_manager, user):
+    return data_manager.add_movie(user['id'], omdb_movie('Heat'))
+
+
+@pytest.mark.parametrize('rating', ['x', {'stars': 5}, None, -1, 10.5, 'nan'])
+def test_api_rejects_ratings_that_are_not_0_to_10(client, data_manager, user, movie, rating):
+    response = client.post(f"/api/add_review/{user['id']}/{movie.id}", json={'review_text': 'Tense', 'rating': rating})
+
+    assert response.status_code == 400
+    assert data_manager.get_movie_reviews(movie.id) == []
+
+
+def test_api_stores_a_valid_review_and_its_stats(client, data_manager, user, movie):
+    response = client.post(f"/api/add_review/{user['id']}/{movie.id}", json={'review_text': 'Tense', 'rating': '8.5'})
+
+    assert response.status_code == 200
+    assert [review.rating for review in data_manager.get_movie_reviews(movie.id)] == [8.5]
+    assert data_manager.get_movie_stats(movie.id)['review_count'] == 1
+
+
+def test_rebuilding_stats_bumps_each_version_once(data_manager, user, movie):
+    data_manager.add_review(user['id'], movie.id, 'Tense', 8)
+    before = data_manager.get_resource_versions(['reviews', f"user_movies:{user['id']}"])
+
+    data_manager.rebuild_movie_stats()
+
+    after = data_manager.get_resource_versions(['reviews', f"user_movies:{user['id']}"])
+    assert {key: version for key, (version, _) in after.items()} == {
+        key: version + 1 for key, (version, _) in before.items()}
+    assert data_manager.get_movie_stats(movie.id)['rating_mean'] == 8
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import delete, text, update
+
+from conftest import omdb_movie
+from models.models import Movie, Review, db
+
+
+@pytest.fixture
+def catalog(data_manager, user):
+    movies = {title: data_manager.add_movie(user['id'], omdb_movie(title, Director=director))
+              for title, director in [('The Matrix', 'Lana Wachowski'), ('Heat', 'Michael Mann'),
+                                      ('Heathers', 'Michael Lehmann'), ('Alien', 'Ridley Scott')]}
+    data_manager.add_review(user['id'], movies['Heat'].id, 'The diner scene with De Niro is perfect', 9)
+    return movies
+
+
+def titles(results):
+    return [movie['title'] for movie in results['movies']]
+
+
+def test_words_match_titles_and_directors(data_manager, catalog):
+    assert titles(data_manager.search('matrix')) == ['The Matrix']
+    assert titles(data_manager.search('ridley')) == ['Alien']
+
+
+def test_words_match_as_prefixes(data_manager, catalog):
+    results = data_manager.search('hea')
+
+    assert set(titles(results)) == {'Heat', 'Heathers'}
+    assert not results['fuzzy']
+
+
+def test_reviews_are_searched_with_a_snippet(data_manager, catalog):
+    reviews = data_manager.search('diner')['reviews']
+
+    assert [(review['movie_title'], review['user_name']) for review in reviews] == [('Heat', 'Alice')]
+    assert '[diner]' in reviews[0]['snippet']
+
+
+@pytest.mark.parametrize('query, title', [('matirx', 'The Matrix'), ('haet', 'Heat'), ('alein', 'Alien')])
+def test_typos_fall_back_to_fuzzy_matches(data_manager, catalog, query, title):
+    results = data_manager.search(query)
+
+    assert titles(results)[0] == title
+    assert results['fuzzy']
+
+
+def test_unrelated_queries_find_nothing(data_manager, catalog):
+    assert data_manager.search('zzzz') == {'movies': [], 'reviews': [], 'fuzzy': False}
+    assert data_manager.search('  ') == {'movies': [], 'reviews': [], 'fuzzy': False}
+
+
+def test_short_query_candidates_come_from_the_title_key_index(data_manager, catalog):
+    plan = db.session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM movie WHERE title_key >= 'h' AND title_key < 'i' "
+        'AND length(title_key) BETWEEN 3 AND 5'
+    )).all()
+
+    assert 'ix_movie_title_key' in ' '.join(row[-1] for row in plan)
+
+
+def test_pending_movies_are_not_found(data_manager, user, catalog):
+    data_manager.add_pending_movie(user['id'], 'Heat 2')
+
+    assert 'Heat 2' not in titles(data_manager.search('heat 2'))
+
+
+def test_index_follows_movie_updates_and_deletes(data_manager, user, catalog):
+    data_manager.update_movie(user['id'], catalog['Alien'].id, {'title': 'Aliens'})
+    assert titles(data_manager.search('aliens')) == ['Aliens']
+    assert titles(data_manager.search('ridley')) == ['Aliens']
+
+    db.session.execute(delete(Movie).where(Movie.id == catalog['Heathers'].id))
+    db.session.commit()
+    assert 'Heathers' not in titles(data_manager.search('heathers'))
+
+
+def test_index_follows_review_updates_and_deletes(data_manager, catalog):
+    review_id = data_manager.search('diner')['reviews'][0]['id']
+
+    db.session.execute(update(Review).where(Review.id == review_id).values(review_text='The bank heist'))
+    db.session.commit()
+    assert data_manager.search('diner')['reviews'] == []
+    assert [review['id'] for review in data_manager.search('heist')['reviews']] == [review_id]
+
+    db.session.execute(delete(Review).where(Review.id == review_id))
+    db.session.commit()
+    assert data_manager.search('heist')['reviews'] == []